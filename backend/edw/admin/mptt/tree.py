@@ -1,6 +1,8 @@
 #-*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import json
+
 from bitfield import BitField
 from bitfield.forms import BitFieldCheckboxSelectMultiple
 
@@ -9,12 +11,19 @@ from salmonella.admin import SalmonellaMixin
 from django_mptt_admin.admin import DjangoMpttAdmin
 from django_mptt_admin.util import get_tree_from_queryset
 
+from django.db.models import Q
 from django.forms import Media
-from django.utils import six
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.utils import six, translation
+from django.utils.encoding import force_text
 from django.contrib import messages
+from django.contrib.admin.utils import quote
+from django.core.cache import cache
 from django.conf import settings
 
+from edw import settings as edw_settings
 from edw.admin.mptt.utils import get_mptt_admin_node_template, mptt_admin_node_info_update_with_template
+from edw.utils.hash_helpers import create_hash
 
 
 class EdwMpttAdmin(SalmonellaMixin, DjangoMpttAdmin):
@@ -33,6 +42,15 @@ class EdwMpttAdmin(SalmonellaMixin, DjangoMpttAdmin):
 
     prepopulated_fields = {"slug": ("name",)}
 
+    # Дерево загружается по требованию: верхние уровни или путь к выбранному узлу,
+    # дети подгружаются при раскрытии узла
+    tree_lazy_loading = True
+
+    tree_load_on_demand = 1
+
+    NODE_HTML_CACHE_KEY_PATTERN = 'mptt_adm:{model}:{id}:{version}:{language}'
+    NODE_HTML_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['mptt_admin_node']
+
     def get_list_filter(self, request):
         return super(EdwMpttAdmin, self).get_list_filter(request) if request.path.endswith('/grid/') else ()
 
@@ -76,11 +94,117 @@ class EdwMpttAdmin(SalmonellaMixin, DjangoMpttAdmin):
                                                       template=get_mptt_admin_node_template(instance),
                                                       instance=instance,
                                                       node_info=node_info)
+        if self.tree_lazy_loading:
+            return self.get_lazy_tree_data(qs, max_level)
+
         args = [qs, handle_create_node, max_level]
         if six.PY3:
             args.append('name')
         return get_tree_from_queryset(*args)
 
+    # отображаемые в шаблоне узла поля
+    NODE_VERSION_FIELDS = ('name', 'path', 'active', 'view_class', 'semantic_rule', 'specification_mode')
+
+    NODE_VERSION_BIT_FIELDS = ('attributes', 'system_flags')
+
+    @classmethod
+    def get_node_version(cls, instance):
+        """
+        Версия узла, вычисляется только по отображаемым в шаблоне узла полям: не меняется при перестроении
+        дерева и меняется при изменениях без сохранения узла (распространение активности)
+        """
+        values = [force_text(getattr(instance, field, '')) for field in cls.NODE_VERSION_FIELDS]
+        values.extend([int(getattr(instance, field, None) or 0) for field in cls.NODE_VERSION_BIT_FIELDS])
+        return create_hash(json.dumps(values))
+
+    def get_node_html_cache_key(self, instance):
+        return self.NODE_HTML_CACHE_KEY_PATTERN.format(
+            model=instance._meta.model_name,
+            id=instance.pk,
+            version=self.get_node_version(instance),
+            language=translation.get_language()
+        )
+
+    def get_lazy_tree_data(self, qs, max_level):
+        """
+        Создает дерево только из узлов запроса не глубже `max_level`, узлы с невыгруженными детьми
+        помечаются `load_on_demand`. HTML узлов кэшируется по версии узла, шаблоны отрисовываются только
+        для отсутствующих в кэше узлов
+        """
+        if max_level is not None:
+            qs = qs.filter(level__lte=max_level)
+        instances = list(qs.order_by('tree_id', 'lft'))
+        keys = dict((instance.pk, self.get_node_html_cache_key(instance)) for instance in instances)
+        labels = cache.get_many(list(keys.values()))
+        to_cache = {}
+
+        nodes, roots = {}, []
+        for instance in instances:
+            pk = quote(instance.pk)
+            node_info = {
+                'id': instance.pk,
+                'name': force_text(instance),
+                'label': force_text(instance),
+                'url': self.get_admin_url('change', (pk,)),
+                'move_url': self.get_admin_url('move', (pk,)),
+            }
+            label = labels.get(keys[instance.pk])
+            if label is None:
+                mptt_admin_node_info_update_with_template(admin_instance=self,
+                                                          template=get_mptt_admin_node_template(instance),
+                                                          instance=instance,
+                                                          node_info=node_info)
+                to_cache[keys[instance.pk]] = node_info['label']
+            else:
+                node_info['label'] = label
+            if not instance.is_leaf_node():
+                node_info['children'] = []
+            nodes[instance.pk] = node_info
+            parent = nodes.get(instance.parent_id)
+            if parent is not None:
+                parent['children'].append(node_info)
+            else:
+                roots.append(node_info)
+        if to_cache:
+            cache.set_many(to_cache, self.NODE_HTML_CACHE_TIMEOUT)
+
+        for node_info in nodes.values():
+            if 'children' in node_info and not node_info['children']:
+                del node_info['children']
+                node_info['load_on_demand'] = True
+        return roots
+
+    def tree_json_view(self, request):
+        """
+        Легковесный JSON дерева: без параметров возвращает верхние уровни, с параметром `node` детей узла,
+        с параметром `selected_node` верхние уровни и детей всех предков выбранного узла
+        """
+        if not self.tree_lazy_loading:
+            return super(EdwMpttAdmin, self).tree_json_view(request)
+
+        qs = self.get_queryset(request)
+        node_id = request.GET.get('node')
+        if node_id:
+            try:
+                node_id = int(node_id)
+            except ValueError:
+                return HttpResponseBadRequest("Invalid node id")
+            return JsonResponse(self.get_lazy_tree_data(qs.filter(parent_id=node_id), None), safe=False)
+
+        max_level = self.tree_load_on_demand - 1 if self.tree_load_on_demand else None
+        selected_node_id = request.GET.get('selected_node')
+        if selected_node_id and max_level is not None:
+            try:
+                selected_node = qs.get(pk=selected_node_id)
+            except (self.model.DoesNotExist, ValueError):
+                pass
+            else:
+                opened_ids = list(selected_node.get_ancestors().values_list('id', flat=True))
+                if opened_ids:
+                    qs = qs.filter(Q(level__lte=max_level) | Q(parent_id__in=opened_ids))
+                    max_level = None
+        return JsonResponse(self.get_lazy_tree_data(qs, max_level), safe=False)
+
     def i18n_javascript(self, request):
         """
         Библиотека переводов текста
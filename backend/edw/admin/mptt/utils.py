@@ -12,7 +12,7 @@ def get_mptt_admin_node_template(instance):
     return 'edw/admin/mptt/_%s_node.html' % instance.__class__.__name__.lower()
 
 
-def mptt_admin_node_info_update_with_template(admin_instance, template, instance, node_info, context={}):
+def mptt_admin_node_info_update_with_template(admin_instance, template, instance, node_info, context=None):
     '''
     Update MPTT admin node with rendered by html template node label.
     :param admin_instance: mptt admin instance
@@ -26,6 +26,7 @@ def mptt_admin_node_info_update_with_template(admin_instance, template, instance
     pk_attname = admin_instance.model._meta.pk.attname
     pk = quote(getattr(instance, pk_attname))
 
+    context = dict(context or {})
     context.update({
         'instance': instance,
         'node_info': node_info,
@@ -2,10 +2,6 @@
 from __future__ import unicode_literals
 
 
-from operator import __or__ as OR
-from functools import reduce
-
-from django.conf import settings
 try:
     from django.utils.encoding import force_unicode as force_text
 except ImportError:
@@ -15,8 +11,6 @@ from django.template.response import TemplateResponse
 from django.contrib.admin import helpers
 from django.contrib.admin.utils import model_ngettext
 
-from celery import chain
-
 from edw.tasks import update_terms_parent as update_terms_parent_task
 
 from edw.admin.term.forms import TermsUpdateParentAdminForm
@@ -27,8 +21,6 @@ def update_terms_parent(modeladmin, request, queryset):
     ENG: Update related data marts for multiple entities
     RUS: Обновляет множество родительских терминов
     """
-    CHUNK_SIZE = getattr(settings, 'EDW_UPDATE_TERMS_PARENT_ACTION_CHUNK_SIZE', 100)
-
     opts = modeladmin.model._meta
     app_label = opts.app_label
 
@@ -40,22 +32,15 @@ def update_terms_parent(modeladmin, request, queryset):
 
             n = queryset.count()
             if n and to_set_parent_term_id:
-                i = 0
-                tasks = []
-                while i < n:
-                    chunk = queryset[i:i + CHUNK_SIZE]
-                    for obj in chunk:
-                        obj_display = force_text(obj)
-                        modeladmin.log_change(request, obj, obj_display)
-
-                    tasks.append(update_terms_parent_task.si(
-                        [x.id for x in chunk],
-                        to_set_parent_term_id.id
-                    ))
-
-                    i += CHUNK_SIZE
-
-                chain(reduce(OR, tasks)).apply_async()
+                for obj in queryset:
+                    obj_display = force_text(obj)
+                    modeladmin.log_change(request, obj, obj_display)
+
+                # one task moves all terms, so tree is recalculated and caches are invalidated once
+                update_terms_parent_task.si(
+                    list(queryset.values_list('id', flat=True)),
+                    to_set_parent_term_id.id
+                ).apply_async()
 
                 modeladmin.message_user(request, _("Successfully proceed %(count)d %(items)s.") % {
                     "count": n, "items": model_ngettext(modeladmin.opts, n)
@@ -0,0 +1,66 @@
+# ------------------------------------------------------------------------
+# coding=utf-8
+# ------------------------------------------------------------------------
+"""
+``benchmark_index_prepare``
+---------------------
+
+``benchmark_index_prepare`` compare search index documents preparation entity by entity
+with the batched preparation (`EntityIndex.prepare_batch`), print time and number of queries.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from haystack import connections
+
+from edw.models.entity import EntityModel
+
+
+class Command(BaseCommand):
+    help = "Benchmark search index documents preparation with and without batching"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--using', dest='using', default='default',
+                            help="Search connection alias, default: default")
+        parser.add_argument('--count', dest='count', type=int, default=1000,
+                            help="Number of entities")
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=100,
+                            help="Number of entities in batch")
+
+    def get_entities(self, index, using, count):
+        return list(index.index_queryset(using=using).order_by('pk')[:count])
+
+    def run(self, title, prepare):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.time()
+            documents = prepare()
+            duration = time.time() - start
+        self.stdout.write("{}: {} documents, {:.3f} s, {} queries".format(
+            title, len(documents), duration, len(ctx.captured_queries)))
+        return duration
+
+    def handle(self, **options):
+        using, count, batch_size = options['using'], options['count'], options['batch_size']
+        try:
+            index = connections[using].get_unified_index().get_index(EntityModel.materialized)
+        except Exception as e:
+            raise CommandError("Entity search index not found: {}".format(e))
+
+        def prepare_one_by_one():
+            return [index.full_prepare(entity) for entity in self.get_entities(index, using, count)]
+
+        def prepare_batched():
+            entities = self.get_entities(index, using, count)
+            documents = []
+            for start in range(0, len(entities), batch_size):
+                documents.extend([index.full_prepare(entity) for entity in index.prepare_batch(
+                    entities[start:start + batch_size])])
+            return documents
+
+        one_by_one = self.run("One by one", prepare_one_by_one)
+        batched = self.run("Batched", prepare_batched)
+        if batched:
+            self.stdout.write("Speedup: {:.2f}x".format(one_by_one / batched))
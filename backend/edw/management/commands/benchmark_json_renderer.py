@@ -0,0 +1,125 @@
+# ------------------------------------------------------------------------
+# coding=utf-8
+# ------------------------------------------------------------------------
+"""
+``benchmark_json_renderer``
+---------------------
+
+``benchmark_json_renderer`` serialize and render synthetic entities summary page with DRF serializers and
+`JSONRenderer` and with plain representation serializers and `FastJSONRenderer`, check that output is the
+same and print time of both ways.
+"""
+from __future__ import unicode_literals
+
+import datetime
+import decimal
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from edw.rest.renderers import FastJSONRenderer
+from edw.rest.serializers.plain import PlainRepresentationSerializerMixin
+
+
+class Attribute(object):
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Entity(Attribute):
+    pass
+
+
+class AttributeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    values = serializers.ListField(child=serializers.CharField())
+
+
+class EntitySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    entity_name = serializers.CharField()
+    entity_model = serializers.CharField()
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateField()
+    active = serializers.BooleanField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+    status = serializers.SerializerMethodField()
+    short_characteristics = AttributeSerializer(many=True)
+    short_marks = AttributeSerializer(many=True)
+    media = serializers.CharField(allow_null=True)
+
+    def get_status(self, entity):
+        return _("Active") if entity.active else _("Inactive")
+
+
+class PlainAttributeSerializer(PlainRepresentationSerializerMixin, AttributeSerializer):
+    plain_representation = True
+
+
+class PlainEntitySerializer(PlainRepresentationSerializerMixin, EntitySerializer):
+    plain_representation = True
+
+    short_characteristics = PlainAttributeSerializer(many=True)
+    short_marks = PlainAttributeSerializer(many=True)
+
+
+class Command(BaseCommand):
+    help = "Benchmark serialization and rendering of synthetic entities summary page"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', dest='count', type=int, default=100,
+                            help="Number of entities in page, default: 100")
+        parser.add_argument('--repeat', dest='repeat', type=int, default=100,
+                            help="Number of renders, default: 100")
+        parser.add_argument('--indent', dest='indent', type=int, default=None,
+                            help="Indent of rendered JSON, default: compact")
+
+    def build_entities(self, count):
+        now = timezone.now().replace(microsecond=123000)
+        return [Entity(
+            id=i,
+            entity_name="Entity   {}".format(i),
+            entity_model="entity",
+            created_at=now - datetime.timedelta(minutes=i),
+            updated_at=now.date(),
+            active=bool(i % 2),
+            price=decimal.Decimal('{}.{:02d}'.format(i, i % 100)),
+            short_characteristics=[Attribute(id=j, name=_("Characteristic"), values=["{}".format(j), "0.5"])
+                                   for j in range(5)],
+            short_marks=[Attribute(id=j, name="mark", values=[]) for j in range(2)],
+            media=None
+        ) for i in range(count)]
+
+    def run(self, serializer_class, renderer, entities, repeat, renderer_context):
+        start = time.time()
+        for _i in range(repeat):
+            data = {
+                'count': len(entities),
+                'next': None,
+                'previous': None,
+                'results': serializer_class(entities, many=True).data
+            }
+            ret = renderer.render(data, renderer_context=renderer_context)
+        return ret, time.time() - start
+
+    def handle(self, **options):
+        entities = self.build_entities(options['count'])
+        repeat = options['repeat']
+        renderer_context = {'indent': options['indent']}
+        expected, legacy_duration = self.run(EntitySerializer, JSONRenderer(), entities, repeat, renderer_context)
+        ret, fast_duration = self.run(PlainEntitySerializer, FastJSONRenderer(), entities, repeat, renderer_context)
+        # порядок ключей обычного словаря сохраняется начиная с Python 3.7
+        if ret != expected if sys.version_info >= (3, 7) else json.loads(ret) != json.loads(expected):
+            raise CommandError("Rendered output differs")
+        self.stdout.write("DRF serializers, JSONRenderer: {:.3f} s".format(legacy_duration))
+        self.stdout.write("Plain serializers, FastJSONRenderer: {:.3f} s ({:.1f}%)".format(
+            fast_duration, 100.0 * fast_duration / legacy_duration if legacy_duration else 0))
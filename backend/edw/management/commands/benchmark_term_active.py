@@ -0,0 +1,98 @@
+# ------------------------------------------------------------------------
+# coding=utf-8
+# ------------------------------------------------------------------------
+"""
+``benchmark_term_active``
+---------------------
+
+``benchmark_term_active`` build synthetic terms tree inside rolled back transaction and compare
+active flag propagation by id list with the range UPDATE (`update_node_family`), print time and number of queries.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+
+from edw.models.mptt_info import update_node_family
+from edw.models.term import TermModel
+
+
+class Command(BaseCommand):
+    help = "Benchmark terms active flag propagation on synthetic tree"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', dest='count', type=int, default=100000,
+                            help="Number of terms in synthetic tree, default: 100000")
+        parser.add_argument('--branching', dest='branching', type=int, default=10,
+                            help="Number of children of each term, default: 10")
+
+    def build_tree(self, count, branching):
+        """
+        Create synthetic tree with one root, tree fields are computed in memory
+        """
+        model_class = TermModel.materialized
+        start_id = (model_class._default_manager.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+        tree_id = (model_class._default_manager.aggregate(max_tree_id=Max('tree_id'))['max_tree_id'] or 0) + 1
+        parents = [None] + [start_id + (i - 1) // branching for i in range(1, count)]
+        children = {}
+        for i in range(1, count):
+            children.setdefault(parents[i], []).append(start_id + i)
+        lft, rght, level = {}, {}, {start_id: 0}
+        counter = 1
+        lft[start_id] = counter
+        stack = [(start_id, iter(children.get(start_id, [])))]
+        while stack:
+            pk, it = stack[-1]
+            child_id = next(it, None)
+            counter += 1
+            if child_id is None:
+                rght[pk] = counter
+                stack.pop()
+            else:
+                lft[child_id], level[child_id] = counter, len(stack)
+                stack.append((child_id, iter(children.get(child_id, []))))
+        terms = []
+        for i in range(count):
+            pk = start_id + i
+            slug = 'benchmark-{}'.format(pk)
+            terms.append(model_class(id=pk, parent_id=parents[i], name=slug, slug=slug, path=slug, active=True,
+                                     tree_id=tree_id, lft=lft[pk], rght=rght[pk], level=level[pk]))
+        model_class._default_manager.bulk_create(terms, batch_size=1000)
+        return model_class._default_manager.get(pk=start_id), model_class._default_manager.get(
+            pk=start_id + count - 1)
+
+    def run(self, title, update):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.time()
+            affected = update()
+            duration = time.time() - start
+        self.stdout.write("{}: {} terms, {:.3f} s, {} queries".format(
+            title, affected, duration, len(ctx.captured_queries)))
+
+    def handle(self, **options):
+        count, branching = options['count'], options['branching']
+        manager = TermModel.materialized._default_manager
+        with transaction.atomic():
+            root, leaf = self.build_tree(count, branching)
+            tree = manager.filter(tree_id=root.tree_id)
+
+            def legacy_deactivate():
+                ids = list(root.get_descendants(include_self=False).values_list('id', flat=True))
+                return manager.filter(id__in=ids).update(active=False)
+
+            def legacy_activate():
+                ids = list(leaf.get_family().values_list('id', flat=True))
+                return manager.filter(id__in=ids).update(active=True)
+
+            self.run("Deactivate by id list", legacy_deactivate)
+            tree.update(active=True)
+            self.run("Deactivate by range", lambda: update_node_family(root, active=False))
+
+            tree.update(active=False)
+            self.run("Activate by id list", legacy_activate)
+            tree.update(active=False)
+            self.run("Activate by range", lambda: update_node_family(leaf, ancestors=True, active=True))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,21 @@
+# ------------------------------------------------------------------------
+# coding=utf-8
+# ------------------------------------------------------------------------
+"""
+``flush_customers_last_access``
+---------------------
+
+``flush_customers_last_access`` write customers last access times buffered in cache
+with bulk UPDATEs, run it periodically in write-behind mode.
+"""
+from django.core.management.base import BaseCommand
+
+from edw.models.customer import BaseCustomer
+
+
+class Command(BaseCommand):
+    help = "Write customers last access times buffered in cache"
+
+    def handle(self, **options):
+        customers_count = BaseCustomer.flush_last_access()
+        self.stdout.write("Updated customers: {}".format(customers_count))
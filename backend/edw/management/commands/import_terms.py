@@ -0,0 +1,78 @@
+# ------------------------------------------------------------------------
+# coding=utf-8
+# ------------------------------------------------------------------------
+"""
+``import_terms``
+---------------------
+
+``import_terms`` bulk import terms forest from JSON or CSV file (`bulk_import_terms`).
+JSON file contains list of terms with nested `children`, CSV file contains columns
+`key`, `parent` and terms fields, `parent` is key of another row or path of existing term.
+"""
+import csv
+import io
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import six
+
+from edw.models.term import TermModel
+from edw.models.term_import import bulk_import_terms, TermImportError
+
+
+class Command(BaseCommand):
+    help = "Bulk import terms from JSON or CSV file"
+
+    INTEGER_FIELDS = ('semantic_rule', 'attributes', 'specification_mode', 'system_flags')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON or CSV file")
+        parser.add_argument('--format', dest='format', choices=('json', 'csv'), default=None,
+                            help="File format, default: by file extension")
+        parser.add_argument('--parent', dest='parent', default=None,
+                            help="Path of existing term to attach top level terms")
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=500,
+                            help="Number of terms in one INSERT, default: 500")
+
+    def read_json(self, path):
+        with io.open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def read_csv(self, path):
+        if six.PY2:
+            with open(path, 'rb') as f:
+                rows = [dict((k.decode('utf-8'), v.decode('utf-8')) for k, v in row.items())
+                        for row in csv.DictReader(f)]
+        else:
+            with io.open(path, encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f))
+        for row in rows:
+            for field in self.INTEGER_FIELDS:
+                if row.get(field):
+                    row[field] = int(row[field])
+            if row.get('active'):
+                row['active'] = row['active'].strip().lower() in ('1', 'true', 'yes')
+        return rows
+
+    def handle(self, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ('json', 'csv'):
+            raise CommandError("Unknown file format `{}`".format(file_format))
+        items = self.read_json(path) if file_format == 'json' else self.read_csv(path)
+
+        parent = None
+        if options['parent']:
+            try:
+                parent = TermModel.objects.get(path=options['parent'])
+            except TermModel.DoesNotExist:
+                raise CommandError("Term `{}` not found".format(options['parent']))
+
+        start = time.time()
+        try:
+            ids = bulk_import_terms(items, parent=parent, batch_size=options['batch_size'])
+        except TermImportError as e:
+            raise CommandError(six.text_type(e))
+        self.stdout.write("Imported {} terms, {:.3f} s".format(len(ids), time.time() - start))
@@ -0,0 +1,54 @@
+# ------------------------------------------------------------------------
+# coding=utf-8
+# ------------------------------------------------------------------------
+"""
+``prefill_geocode_cache``
+---------------------
+
+``prefill_geocode_cache`` geocode positions of all place entities into the persistent geocode cache,
+already cached positions cost no geocoder requests.
+"""
+import itertools
+
+from django.core.management.base import BaseCommand, CommandError
+
+from edw.models.entity import EntityModel
+from edw.models.geocode_cache import BaseGeocodeCache
+from edw.models.mixins.entity.place import PlaceMixin
+from edw.utils.geo import GeocoderException
+
+
+class Command(BaseCommand):
+    help = "Prefill persistent geocode cache from existing place entities"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', dest='language', default=None,
+                            help="Geocoder results language, default: current language")
+        parser.add_argument('--limit', dest='limit', type=int, default=None,
+                            help="Maximum number of geocoder requests")
+
+    def handle(self, **options):
+        if not hasattr(BaseGeocodeCache, '_materialized_model'):
+            raise CommandError("Geocode cache model is not materialized")
+        Model = EntityModel.materialized
+        place_models = [clazz for clazz in itertools.chain([Model], Model.get_all_subclasses())
+                        if issubclass(clazz, PlaceMixin) and not clazz._meta.proxy]
+        limit = options['limit']
+        requests = hits = errors = 0
+        for clazz in place_models:
+            for geoposition in clazz.objects.exclude(geoposition='').values_list('geoposition', flat=True).iterator():
+                if not geoposition:
+                    continue
+                if limit is not None and requests >= limit:
+                    break
+                if BaseGeocodeCache.find_entry(geoposition=geoposition, language=options['language']) is not None:
+                    hits += 1
+                    continue
+                try:
+                    BaseGeocodeCache.get_entry(geoposition=geoposition, language=options['language'])
+                except GeocoderException as e:
+                    errors += 1
+                    self.stderr.write("{}: {}".format(geoposition, e))
+                    continue
+                requests += 1
+        self.stdout.write("Geocoder requests: {}, cache hits: {}, errors: {}".format(requests, hits, errors))
@@ -0,0 +1,29 @@
+# ------------------------------------------------------------------------
+# coding=utf-8
+# ------------------------------------------------------------------------
+"""
+``process_search_index_queue``
+---------------------
+
+``process_search_index_queue`` apply pending search index operations from the queue,
+repeated changes of the same objects are indexed once.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from edw.models.search_queue import BaseSearchIndexQueue
+
+
+class Command(BaseCommand):
+    help = "Apply pending search index operations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=None,
+                            help="Number of queue entries applied at once")
+        parser.add_argument('--delay', dest='delay', type=int, default=None,
+                            help="Skip entries changed less than `delay` seconds ago, use 0 to apply all entries")
+
+    def handle(self, **options):
+        if not hasattr(BaseSearchIndexQueue, '_materialized_model'):
+            raise CommandError("Search index queue model is not materialized")
+        processed = BaseSearchIndexQueue.process(batch_size=options['batch_size'], delay=options['delay'])
+        self.stdout.write("Processed queue entries: {}".format(processed))
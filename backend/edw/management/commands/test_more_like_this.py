@@ -11,7 +11,7 @@ from django.utils.translation import ugettext_lazy as _
 from haystack.utils import get_model_ct
 
 # from edw.models.entity import EntityModel
-from edw.search.classify import get_more_like_this, analyze_suggestions
+from edw.search.classify import MoreLikeThisClassifier
 
 
 class Command(BaseCommand):
@@ -20,6 +20,10 @@ class Command(BaseCommand):
             'entity_model',
             help=_('Run tests against this entity model. Example: nash_region.particularproblem')
         ),
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=50,
+            help=_('Number of entities classified with one search request')
+        )
 
     def show_entity_info(self, entity, suggestions, is_guessed):
         print('Объект {}, категория {}'.format(entity.id, entity.category.id))
@@ -106,7 +110,6 @@ class Command(BaseCommand):
         """
 
         model = apps.get_model(options['entity_model'])
-        entity_model = get_model_ct(model).split('.')[1]
         queryset = model.objects \
             .instance_of(model) \
             .filter(active=True) \
@@ -121,12 +124,17 @@ class Command(BaseCommand):
             'dunno_count': 0,
             'right_indexes': [],
         }
-        for entity in queryset:
+        classifier = MoreLikeThisClassifier()
+        batch_size = options['batch_size']
+        entities = list(queryset)
+        suggestions_list = []
+        for start in range(0, len(entities), batch_size):
+            suggestions_list.extend(classifier.classify_many([
+                {'like': entity.description, 'model': get_model_ct(model)} for entity in entities[start:start + batch_size]]))
+
+        for entity, suggestions in zip(entities, suggestions_list):
             total_info['entity_count'] += 1
 
-            search_result = get_more_like_this(entity.description, entity_model)
-            suggestions = analyze_suggestions(search_result)
-
             if suggestions:
                 if suggestions[0]['category'] == entity.category.entity_name:
                     is_guessed = True
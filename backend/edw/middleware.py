@@ -22,8 +22,7 @@ class CustomerMiddleware(object):
         try:
             if content_type.startswith('text/html'):
                 # only update last_access when rendering the main page
-                request.customer.last_access = timezone.now()
-                request.customer.save(update_fields=['last_access'])
+                request.customer.touch_last_access(timezone.now())
         except AttributeError:
             pass
         return response
\ No newline at end of file
@@ -3,6 +3,11 @@ from __future__ import unicode_literals
 
 import json
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
@@ -14,6 +19,7 @@ from django.utils.translation import ugettext_lazy as _
 from .term import TermModel
 from .. import deferred
 from .. import settings as edw_settings
+from ..utils.generation_counter_in_cache import GenerationCounter
 
 
 # Примеры полигонов
@@ -74,6 +80,36 @@ def in_polygons(x, y, polygons):
     return False
 
 
+def in_polygon_vectorized(x, y, edges):
+    """
+    Векторизованный (NumPy) вариант `in_polygon`.
+    `x`, `y` - координаты точки либо массивы координат точек,
+    `edges` - стороны многоугольника, см. `get_polygon_edges`.
+    Возвращает признак принадлежности точки (массив признаков для массива точек).
+    """
+    e = 1e-14  # эпсилон
+    x = np.asarray(x, dtype=float)[..., np.newaxis] + e
+    y = np.asarray(y, dtype=float)[..., np.newaxis] + e
+
+    xpi, ypi, ypj, dx, dy = edges
+    lhs = dy * (x - xpi)
+    rhs = dx * (y - ypi)
+    crossing = (ypi < ypj) & (ypi <= y) & (y <= ypj) & (lhs > rhs) | \
+               (ypi > ypj) & (ypj <= y) & (y <= ypi) & (lhs < rhs)
+    return np.count_nonzero(crossing, axis=-1) % 2 == 1
+
+
+def get_polygon_edges(polygon):
+    """
+    Подготавливает массивы сторон многоугольника для `in_polygon_vectorized`:
+    начальные точки сторон, ординаты конечных точек и приращения координат.
+    """
+    points = np.array(polygon, dtype=float)
+    xpi, ypi = points[:, 0], points[:, 1]
+    xpj, ypj = np.roll(xpi, 1), np.roll(ypi, 1)
+    return xpi, ypi, ypj, xpj - xpi, ypj - ypi
+
+
 #==============================================================================
 # BaseBoundaryQuerySet
 #==============================================================================
@@ -120,6 +156,8 @@ class BaseBoundary(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
     POLYGONS_CACHE_KEY_PATTERN = 'edge_poly:{}'
     POLYGONS_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['boundary_polygons']
 
+    GENERATION_CACHE_KEY = 'bnd_gen'
+
     term = models.ForeignKey(TermModel, verbose_name=_('Term'), related_name='+', db_index=True)
     raw_polygons = models.TextField(verbose_name=_('Polygons'), null=False, blank=False, default="[]",
                                 help_text=_(
@@ -228,22 +266,166 @@ class BaseBoundary(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
     def in_polygons(self, longitude, latitude):
         return in_polygons(longitude, latitude, self.polygons)
 
+    @staticmethod
+    def incr_generation():
+        """
+        RUS: Увеличивает счетчик поколений границ, пространственный индекс будет перестроен.
+        """
+        return GenerationCounter.factory(BaseBoundary.GENERATION_CACHE_KEY).incr()
+
 
 BoundaryModel = deferred.MaterializedModel(BaseBoundary)
 
 
+#==============================================================================
+# BoundaryIndex
+#==============================================================================
+class BoundaryIndex(object):
+    """
+    ENG: In-process spatial index of active boundaries: parsed polygons with bounding boxes and
+    a uniform grid over the boxes. Boundaries are stored in lookup priority order (deeper terms first).
+    The index is rebuilt lazily when boundaries or terms generation is changed.
+    RUS: Пространственный индекс активных границ в памяти процесса.
+    """
+    GRID_CELL_SIZE = 1.0  # градусы
+
+    _instance = None
+    _version = None
+
+    def __init__(self, boundaries, cell_size=None):
+        self.cell_size = cell_size or self.GRID_CELL_SIZE
+        # (boundary id, term id, bbox, [(polygon bbox, polygon), ...])
+        self.entries = []
+        self.grid = {}
+        for boundary in boundaries:
+            try:
+                raw_polygons = json.loads(boundary.raw_polygons)
+            except ValueError:
+                continue
+            polygons = []
+            for polygon in raw_polygons:
+                if len(polygon) < 3:
+                    continue
+                xs, ys = [float(p[0]) for p in polygon], [float(p[1]) for p in polygon]
+                bbox = (min(xs), min(ys), max(xs), max(ys))
+                polygons.append((bbox, get_polygon_edges(polygon) if np is not None else list(zip(xs, ys))))
+            if not polygons:
+                continue
+            bbox = (min([p[0][0] for p in polygons]), min([p[0][1] for p in polygons]),
+                    max([p[0][2] for p in polygons]), max([p[0][3] for p in polygons]))
+            index = len(self.entries)
+            self.entries.append((boundary.id, boundary.term_id, bbox, polygons))
+            for cell in self.get_cells(bbox):
+                self.grid.setdefault(cell, []).append(index)
+
+    def get_cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def get_cells(self, bbox):
+        x0, y0 = self.get_cell(bbox[0], bbox[1])
+        x1, y1 = self.get_cell(bbox[2], bbox[3])
+        return [(i, j) for i in range(x0, x1 + 1) for j in range(y0, y1 + 1)]
+
+    @staticmethod
+    def _in_bbox(x, y, bbox):
+        return (bbox[0] <= x) & (x <= bbox[2]) & (bbox[1] <= y) & (y <= bbox[3])
+
+    def find(self, longitude, latitude, term_ids=None):
+        """
+        RUS: Возвращает id первой по приоритету границы, содержащей точку, либо None.
+        """
+        x, y = float(longitude), float(latitude)
+        for index in self.grid.get(self.get_cell(x, y), []):
+            boundary_id, term_id, bbox, polygons = self.entries[index]
+            if term_ids is not None and term_id not in term_ids or not self._in_bbox(x, y, bbox):
+                continue
+            for polygon_bbox, polygon in polygons:
+                if self._in_bbox(x, y, polygon_bbox) and (
+                        in_polygon_vectorized(x, y, polygon) if np is not None else in_polygon(x, y, polygon)):
+                    return boundary_id
+        return None
+
+    def find_many(self, points, term_ids=None):
+        """
+        RUS: Возвращает список id границ для списка точек (долгота, широта).
+        Точки одной ячейки сетки проверяются векторно для каждого многоугольника.
+        """
+        if np is None:
+            return [self.find(longitude, latitude, term_ids) for longitude, latitude in points]
+
+        result = [None] * len(points)
+        cells = {}
+        for i, (longitude, latitude) in enumerate(points):
+            cells.setdefault(self.get_cell(float(longitude), float(latitude)), []).append(i)
+        for cell, indexes in cells.items():
+            indexes = np.array(indexes)
+            xs = np.array([float(points[i][0]) for i in indexes])
+            ys = np.array([float(points[i][1]) for i in indexes])
+            unresolved = np.ones(len(indexes), dtype=bool)
+            for index in self.grid.get(cell, []):
+                boundary_id, term_id, bbox, polygons = self.entries[index]
+                if term_ids is not None and term_id not in term_ids:
+                    continue
+                for polygon_bbox, polygon in polygons:
+                    candidates = np.flatnonzero(unresolved & self._in_bbox(xs, ys, polygon_bbox))
+                    if not len(candidates):
+                        continue
+                    inside = candidates[in_polygon_vectorized(xs[candidates], ys[candidates], polygon)]
+                    unresolved[inside] = False
+                    for i in indexes[inside]:
+                        result[i] = boundary_id
+                if not unresolved.any():
+                    break
+        return result
+
+    @staticmethod
+    def get_version():
+        return GenerationCounter.get_values([BoundaryModel.GENERATION_CACHE_KEY, TermModel.GENERATION_CACHE_KEY])
+
+    @classmethod
+    def build(cls):
+        tree_opts = TermModel._mptt_meta
+        boundaries = BoundaryModel.objects.active().order_by(
+            '-' + 'term__{}'.format(tree_opts.level_attr),
+            'term__{}'.format(tree_opts.tree_id_attr), 'term__{}'.format(tree_opts.left_attr)).only(
+            'id', 'term_id', 'raw_polygons')
+        return cls(boundaries)
+
+    @classmethod
+    def get_instance(cls):
+        """
+        RUS: Возвращает индекс процесса, перестраивает его при изменении границ или терминов.
+        """
+        version = cls.get_version()
+        if cls._instance is None or cls._version != version:
+            cls._instance, cls._version = cls.build(), version
+        return cls._instance
+
+    @classmethod
+    def reset(cls):
+        cls._instance = cls._version = None
+
+
 def get_boundary(longitude, latitude, term_ids=None):
-    tree_opts = TermModel._mptt_meta
-    boundaries = BoundaryModel.objects.active().select_related('term').order_by(
-        '-' + 'term__{}'.format(tree_opts.level_attr),
-        'term__{}'.format(tree_opts.tree_id_attr), 'term__{}'.format(tree_opts.left_attr))
     if term_ids is not None:
-        boundaries = boundaries.filter(term_id__in=term_ids)
-    for boundary in boundaries:
-        if boundary.in_polygons(longitude, latitude):
-            break
-    else:
-        boundary = None
-    return boundary
+        term_ids = set(term_ids)
+    boundary_id = BoundaryIndex.get_instance().find(longitude, latitude, term_ids)
+    if boundary_id is None:
+        return None
+    try:
+        return BoundaryModel.objects.select_related('term').get(id=boundary_id)
+    except BoundaryModel.DoesNotExist:
+        return None
 
 
+def get_boundaries(points, term_ids=None):
+    """
+    RUS: Пакетное определение границ для списка точек (долгота, широта), для массового импорта.
+    Возвращает список границ (либо None) в порядке точек.
+    """
+    if term_ids is not None:
+        term_ids = set(term_ids)
+    boundaries_ids = BoundaryIndex.get_instance().find_many(points, term_ids)
+    boundaries = BoundaryModel.objects.select_related('term').in_bulk(
+        set([boundary_id for boundary_id in boundaries_ids if boundary_id is not None]))
+    return [boundaries.get(boundary_id, None) for boundary_id in boundaries_ids]
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
+import datetime
 import string
 from importlib import import_module
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, DEFAULT_DB_ALIAS
+from django.db.models import Case, When, Value
 from django.db.models.fields import FieldDoesNotExist
 from django.dispatch import receiver
 from django.utils import timezone
@@ -17,6 +20,9 @@ from django.utils.translation import ugettext_lazy as _
 from django.utils.six import with_metaclass
 from jsonfield.fields import JSONField
 from .. import deferred
+from .. import settings as edw_settings
+from ..utils.circular_buffer_in_cache import RingBuffer
+from ..utils.set_helpers import uniq
 
 SessionStore = import_module(settings.SESSION_ENGINE).SessionStore()
 
@@ -203,6 +209,12 @@ class BaseCustomer(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
     REGISTERED = 2
     CUSTOMER_STATES = ((UNRECOGNIZED, _("Unrecognized")), (GUEST, _("Guest")), (REGISTERED, _("Registered")))
 
+    LAST_ACCESS_CACHE_KEY_PATTERN = 'cst:{id}:la'
+    LAST_ACCESS_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['customer_last_access']
+    LAST_ACCESS_BUFFER_CACHE_KEY = 'cst_la_buf'
+    LAST_ACCESS_BUFFER_CACHE_SIZE = edw_settings.CACHE_BUFFERS_SIZES['customer_last_access']
+    LAST_ACCESS_FLUSH_CHUNK_SIZE = 500
+
     user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True)
     recognized = models.PositiveSmallIntegerField(_("Recognized as"), choices=CUSTOMER_STATES,
         help_text=_("Designates the state the customer is recognized as."), default=UNRECOGNIZED)
@@ -378,6 +390,71 @@ class BaseCustomer(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
         """
         return str(self.user_id)
 
+    @staticmethod
+    def get_last_access_buffer():
+        """
+        RUS: Возвращает кольцевой буфер ключей кэша отложенного времени последнего доступа.
+        """
+        return RingBuffer.factory(BaseCustomer.LAST_ACCESS_BUFFER_CACHE_KEY,
+                                  max_size=BaseCustomer.LAST_ACCESS_BUFFER_CACHE_SIZE)
+
+    def touch_last_access(self, now=None):
+        """
+        ENG: Record the last access time. The value is written only if the stored one is older than
+        the resolution, in write-behind mode it is kept in cache until `flush_last_access`.
+        RUS: Отмечает время последнего доступа. Значение записывается, только если сохраненное старше
+        заданной точности, в режиме отложенной записи оно хранится в кэше до вызова `flush_last_access`.
+        Возвращает True, если значение было записано.
+        """
+        if now is None:
+            now = timezone.now()
+        resolution = datetime.timedelta(minutes=edw_settings.CUSTOMER_LAST_ACCESS['resolution'])
+        if self.last_access is not None and now - self.last_access < resolution:
+            return False
+        self.last_access = now
+        if not edw_settings.CUSTOMER_LAST_ACCESS['write_behind']:
+            self.save(update_fields=['last_access'])
+            return True
+        key = self.LAST_ACCESS_CACHE_KEY_PATTERN.format(id=self.pk)
+        pending = cache.get(key, None)
+        if pending is not None and now - pending[1] < resolution:
+            return False
+        cache.set(key, (self.pk, now), self.LAST_ACCESS_CACHE_TIMEOUT)
+        # ключ записывается в буфер при каждом новом значении, повторы убираются при сбросе
+        buf = self.get_last_access_buffer()
+        old_key = buf.record(key)
+        if old_key != buf.empty and old_key != key:
+            # буфер заполнен, вытесненное значение записываем сразу
+            BaseCustomer.flush_last_access([old_key])
+        return True
+
+    @staticmethod
+    def flush_last_access(keys=None):
+        """
+        ENG: Write pending last access times with bulk UPDATEs, return number of customers.
+        RUS: Записывает отложенное время последнего доступа пакетными запросами UPDATE,
+        возвращает количество пользователей.
+        """
+        if keys is None:
+            # буфер не очищается: ключ без значения в кэше пропускается, а ключ, записанный во время сброса,
+            # не будет потерян, вытесненные из буфера ключи сбрасываются в `touch_last_access`
+            keys = BaseCustomer.get_last_access_buffer().get_all()
+        values = cache.get_many(uniq(keys))
+        if not values:
+            return 0
+        last_access = dict(values.values())
+        ids = list(last_access.keys())
+        for i in range(0, len(ids), BaseCustomer.LAST_ACCESS_FLUSH_CHUNK_SIZE):
+            chunk = ids[i:i + BaseCustomer.LAST_ACCESS_FLUSH_CHUNK_SIZE]
+            CustomerModel.objects.filter(pk__in=chunk).update(last_access=Case(
+                *[When(pk=pk, then=Value(last_access[pk])) for pk in chunk],
+                output_field=models.DateTimeField()
+            ))
+        # удаляем только не измененные за время сброса значения, новые будут записаны следующим сбросом
+        current = cache.get_many(list(values.keys()))
+        cache.delete_many([key for key, value in values.items() if current.get(key, None) == value])
+        return len(ids)
+
     def save(self, **kwargs):
         """
         RUS: Сохраняет данные пользователя.
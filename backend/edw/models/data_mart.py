@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 
 from bitfield import BitField
+from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
@@ -25,13 +26,15 @@ from six import with_metaclass
 from .cache import add_cache_key, QuerySetCachedResultMixin
 from .fields.tree import TreeForeignKey
 from .mixins.rebuild_tree import RebuildTreeMixin
+from .mptt_info import update_node_family
 from .related import DataMartRelationModel, DataMartPermissionModel
 from .rest import RESTModelBase
 from .term import TermModel, make_path
 from .. import deferred
 from .. import settings as edw_settings
-from ..signals.mptt import MPTTModelSignalSenderMixin
+from ..signals.mptt import MPTTModelSignalSenderMixin, get_tree_batch
 from ..utils.circular_buffer_in_cache import RingBuffer
+from ..utils.generation_counter_in_cache import GenerationCounter
 from ..utils.hash_helpers import get_unique_slug
 
 
@@ -132,6 +135,8 @@ class BaseDataMart(with_metaclass(BaseDataMartMetaclass, MPTTModelSignalSenderMi
     CHILDREN_CACHE_KEY_PATTERN = '{parent_id}:chld'
     CHILDREN_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['data_mart_children']
 
+    GENERATION_CACHE_KEY = 'dm_gen'
+
     # таймаут для кеширования при валидации, необходим при оптимазации старта сервера в несколько потоков
     VALIDATE_TERM_MODEL_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['data_mart_validate_term_model']
 
@@ -255,7 +260,8 @@ class BaseDataMart(with_metaclass(BaseDataMartMetaclass, MPTTModelSignalSenderMi
         ENG: Returns the polymorphic model name of the object's class.
         RUS: Возвращает полиморфную модель имени класса объекта
         """
-        return self.polymorphic_ctype.model
+        # use content types cache, avoid query per instance
+        return ContentType.objects.get_for_id(self.polymorphic_ctype_id).model
 
     def get_absolute_url(self, request=None, format=None):
         """
@@ -335,22 +341,22 @@ class BaseDataMart(with_metaclass(BaseDataMartMetaclass, MPTTModelSignalSenderMi
             if not origin or origin.view_class != self.view_class:
                 self.view_class = ' '.join([x.lower() for x in self.view_class.split()]) if self.view_class else None
             self._make_path(ancestors + [self])
-            try:
-                with transaction.atomic():
-                    result = super(BaseDataMart, self).save(*args, **kwargs)
-            except IntegrityError as e:
-                if model_class._default_manager.exclude(pk=self.pk).filter(path=self.path).exists():
-                    self.slug = get_unique_slug(self.slug, self.id)
-                    self._make_path(ancestors + [self])
-                    result = super(BaseDataMart, self).save(*args, **kwargs)
-                else:
-                    raise e
-            if not origin or origin.active != self.active:
-                if self.active:
-                    update_id_list = list(self.get_family().values_list('id', flat=True))
-                else:
-                    update_id_list = list(self.get_descendants(include_self=False).values_list('id', flat=True))
-                model_class._default_manager.filter(id__in=update_id_list).update(active=self.active)
+            # сохранение и распространение активности выполняются в одной транзакции
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        result = super(BaseDataMart, self).save(*args, **kwargs)
+                except IntegrityError as e:
+                    if model_class._default_manager.exclude(pk=self.pk).filter(path=self.path).exists():
+                        self.slug = get_unique_slug(self.slug, self.id)
+                        self._make_path(ancestors + [self])
+                        result = super(BaseDataMart, self).save(*args, **kwargs)
+                    else:
+                        raise e
+                if (not origin or origin.active != self.active) and get_tree_batch() is None:
+                    # активация распространяется на предков и потомков, деактивация только на потомков,
+                    # в `tree_batch` после перестроения дерева
+                    update_node_family(self, ancestors=self.active, descendants=True, active=self.active)
             force_validate_terms = kwargs.get('force_validate_terms', False)
             validation_context = {}
             if force_validate_terms or self.need_terms_validation(origin, context=validation_context):
@@ -433,6 +439,20 @@ class BaseDataMart(with_metaclass(BaseDataMartMetaclass, MPTTModelSignalSenderMi
         buf.clear()
         cache.delete_many(keys)
 
+    @staticmethod
+    def get_generation_counter():
+        """
+        RUS: Возвращает счетчик поколений витрин данных, увеличивается при любом изменении дерева витрин данных.
+        """
+        return GenerationCounter.factory(BaseDataMart.GENERATION_CACHE_KEY)
+
+    @staticmethod
+    def incr_generation():
+        """
+        RUS: Увеличивает счетчик поколений витрин данных.
+        """
+        return BaseDataMart.get_generation_counter().incr()
+
     @staticmethod
     def get_all_active_terms_ids():
         """
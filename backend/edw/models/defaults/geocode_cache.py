@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+
+from edw.models.geocode_cache import BaseGeocodeCache
+
+
+class GeocodeCache(BaseGeocodeCache):
+    """
+    ENG: Materialize persistent geocoding results cache.
+    RUS: Материализованный постоянный кэш результатов геокодирования.
+    """
+    class Meta(BaseGeocodeCache.Meta):
+        """
+        RUS: Метаданные класса GeocodeCache.
+        """
+        abstract = False
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+
+from edw.models.search_queue import BaseSearchIndexQueue
+
+
+class SearchIndexQueue(BaseSearchIndexQueue):
+    """
+    ENG: Materialize pending search index operations queue.
+    RUS: Материализованная очередь отложенных операций поискового индекса.
+    """
+    class Meta(BaseSearchIndexQueue.Meta):
+        """
+        RUS: Метаданные класса SearchIndexQueue.
+        """
+        abstract = False
@@ -6,6 +6,7 @@ from functools import reduce
 from operator import __or__ as OR
 from math import ceil
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.core.exceptions import (
     FieldDoesNotExist,
@@ -13,7 +14,7 @@ from django.core.exceptions import (
     MultipleObjectsReturned
 )
 from django.db import models, transaction, connections
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Case, When, Value, FloatField, IntegerField
 from django.db.models.sql.datastructures import EmptyResultSet
 from django.utils import six
 from django.utils import timezone
@@ -33,6 +34,7 @@ from rest_framework.reverse import reverse
 
 from .cache import add_cache_key, QuerySetCachedResultMixin
 from .data_mart import DataMartModel
+from .mptt_info import get_queryset_ancestors
 from .mixins.query import (
     CustomGroupByQuerySetMixin,
     CustomCountQuerySetMixin,
@@ -50,6 +52,7 @@ from .. import deferred
 from .. import settings as edw_settings
 from ..signals.entity import post_save as entity_post_save
 from ..utils.circular_buffer_in_cache import RingBuffer, empty
+from ..utils.generation_counter_in_cache import GenerationCounter
 from ..utils.hash_helpers import hash_unsorted_list
 from ..utils.monkey_patching import patch_class_method
 from ..utils.set_helpers import uniq
@@ -400,6 +403,89 @@ class BaseEntityQuerySet(JoinQuerySetMixin, CustomCountQuerySetMixin, CustomGrou
                     q_lst.append(models.Q(forward_relations__term=rel_id))
         return self.filter(reduce(OR, q_lst)).distinct()
 
+    def get_place_models(self):
+        """
+        RUS: Возвращает модели мест (`PlaceMixin`) с кодом Мортона геопозиции среди модели запроса и ее наследников.
+        """
+        model = self.model
+        if getattr(model, 'MORTON_FIELD_NAME', None) is not None:
+            return [model]
+        return [clazz for clazz in model.get_all_subclasses()
+                if getattr(clazz, 'MORTON_FIELD_NAME', None) is not None and not clazz._meta.proxy]
+
+    def _get_bbox_cache_key(self, *bbox):
+        """
+        RUS: Возвращает ключ кэша прямоугольника.
+        """
+        return 'bbox:{}'.format(','.join(['{:.7f}'.format(float(x)) for x in bbox]))
+
+    @add_cache_key(_get_bbox_cache_key)
+    def bbox(self, min_longitude, min_latitude, max_longitude, max_latitude):
+        """
+        RUS: Возвращает места, попадающие в прямоугольник, поиск по диапазонам кодов Мортона.
+        """
+        place_models = self.get_place_models()
+        if place_models == [self.model]:
+            return self.model.filter_bbox(self, min_longitude, min_latitude, max_longitude, max_latitude)
+        q_lst = [models.Q(id__in=clazz.filter_bbox(
+            clazz.objects.all(), min_longitude, min_latitude, max_longitude, max_latitude).values('id'))
+            for clazz in place_models]
+        return self.filter(reduce(OR, q_lst)) if q_lst else self.none()
+
+    def _get_near_cache_key(self, latitude, longitude, k):
+        """
+        RUS: Возвращает ключ кэша поиска ближайших мест.
+        """
+        return 'near:{:.7f},{:.7f},{}'.format(float(latitude), float(longitude), k)
+
+    @add_cache_key(_get_near_cache_key)
+    def near(self, latitude, longitude, k):
+        """
+        RUS: Возвращает `k` ближайших к точке мест, упорядоченных по расстоянию (аннотация `distance`, метры).
+        """
+        places = []
+        for clazz in self.get_place_models():
+            places.extend(clazz.get_nearest(latitude, longitude, k, queryset=clazz.objects.filter(
+                id__in=self.values('id'))))
+        places = sorted(places, key=lambda place: place.distance)[:k]
+        if not places:
+            return self.none()
+        # сохраняем порядок и расстояние, найденные в питоне
+        return self.filter(id__in=[place.id for place in places]).annotate(
+            near_position=Case(*[When(id=place.id, then=Value(i)) for i, place in enumerate(places)],
+                               output_field=IntegerField()),
+            distance=Case(*[When(id=place.id, then=Value(float(place.distance))) for place in places],
+                          output_field=FloatField())
+        ).order_by('near_position')
+
+    def clusters(self, zoom):
+        """
+        RUS: Возвращает кластеры мест для масштаба карты, сгруппированные по префиксу кода Мортона.
+        Кластер: ячейка `cell`, количество `count`, центр `latitude`, `longitude`, примеры `sample_ids`.
+        """
+        place_models = self.get_place_models()
+        clusters = {}
+        for clazz in place_models:
+            queryset = self if place_models == [self.model] else clazz.objects.filter(id__in=self.values('id'))
+            for item in clazz.get_clusters(queryset, zoom):
+                cluster = clusters.get(item['cell'], None)
+                if cluster is None:
+                    clusters[item['cell']] = {
+                        'cell': item['cell'],
+                        'count': item['count'],
+                        'latitude': item['latitude'],
+                        'longitude': item['longitude'],
+                        'sample_ids': sorted(set([item['min_id'], item['max_id']]))
+                    }
+                else:
+                    # взвешенный центр ячейки нескольких моделей
+                    count = cluster['count'] + item['count']
+                    for key in ('latitude', 'longitude'):
+                        cluster[key] = (cluster[key] * cluster['count'] + item[key] * item['count']) / count
+                    cluster['count'] = count
+                    cluster['sample_ids'] = sorted(set(cluster['sample_ids'] + [item['min_id'], item['max_id']]))
+        return sorted(clusters.values(), key=lambda cluster: cluster['cell'])
+
     @cached_property
     def ids(self):
         """
@@ -511,6 +597,47 @@ class BaseEntityQuerySet(JoinQuerySetMixin, CustomCountQuerySetMixin, CustomGrou
         """
         return self.marks_getter[:self.model.SHORT_MARKS_MAX_COUNT]
 
+    def summary_values(self, attrs=(), fields=()):
+        """
+        ENG: Return list of summary rows `EntitySummaryValues` built with `values()` without model instances.
+        RUS: Возвращает список строк `EntitySummaryValues` сводного сериалайзера, построенных с помощью `values()`
+        без создания объектов моделей. Первым запросом выбираются id, тип и колонки базовой модели, затем одним
+        запросом на каждую полиморфную модель - колонки из `SUMMARY_VALUES_FIELDS`. Объекты моделей, которые
+        не поддерживают режим `values()` или не объявляют все атрибуты `attrs`, загружаются как обычно.
+        Порядок запроса сохраняется.
+        :param attrs: атрибуты, значения которых берутся из `SUMMARY_VALUES_FIELDS` полиморфной модели
+        :param fields: колонки и аннотации базовой модели
+        """
+        rows = list(self.values('id', 'polymorphic_ctype_id', *fields))
+        ctypes_ids = {}
+        for row in rows:
+            ctypes_ids.setdefault(row['polymorphic_ctype_id'], []).append(row['id'])
+
+        objs = {}
+        for polymorphic_ctype_id, ids in ctypes_ids.items():
+            values_class = EntitySummaryValues.get_class(polymorphic_ctype_id)
+            if values_class is None or not set(attrs) <= set(values_class.model_class.SUMMARY_VALUES_FIELDS):
+                model_class = ContentType.objects.get_for_id(polymorphic_ctype_id).model_class()
+                objs.update(model_class._default_manager.in_bulk(ids))
+                continue
+            lookups = [(attr, values_class.model_class.SUMMARY_VALUES_FIELDS[attr]) for attr in attrs]
+            for values in values_class.model_class._base_manager.filter(id__in=ids).values(
+                    'id', *uniq([lookup for attr, lookup in lookups])):
+                objs[values['id']] = (values_class, dict((attr, values[lookup]) for attr, lookup in lookups))
+
+        result = []
+        for row in rows:
+            obj = objs.get(row['id'], None)
+            if obj is None:
+                # объект удален между запросами
+                continue
+            if isinstance(obj, tuple):
+                values_class, values = obj
+                row.update(values)
+                obj = values_class(row)
+            result.append(obj)
+        return result
+
     def stored_request(self, request):
         """
         ENG: Extract useful information about the request to be used for emulating a Django request
@@ -734,6 +861,12 @@ class EntityCharacteristicOrMarkGetter(object):
             term = None
         return term
 
+    def _get_additional_attributes(self):
+        """
+        RUS: Возвращает дополнительные характеристики или метки вместе с терминами атрибутов.
+        """
+        return self.additional_characteristics_or_marks.select_related('term')
+
     def _get_attributes(self, limit=None):
         """
         ENG: Return attributes objects of product.
@@ -747,8 +880,8 @@ class EntityCharacteristicOrMarkGetter(object):
         for term in self.terms:
             if limit and cnt > limit:
                 break
-            ancestors = EntityCharacteristicOrMarkGetter._get_attribute_ancestors(term, self.attribute_mode,
-                                                                                  self.attributes_ancestors_local_cache)
+            ancestors = self._get_attribute_ancestors(term, self.attribute_mode,
+                                                      self.attributes_ancestors_local_cache)
             if ancestors:
                 attr0 = ancestors.pop(0)
                 prev_attr = attr0
@@ -781,8 +914,8 @@ class EntityCharacteristicOrMarkGetter(object):
                                                                   getattr(attr, self.tree_opts.left_attr)))
                     cnt += 1
                 if term.attributes & self.attribute_mode:
-                    term = EntityCharacteristicOrMarkGetter._get_no_attribute_ancestor(term, self.attribute_mode,
-                                                                                  self.attributes_ancestors_local_cache)
+                    term = self._get_no_attribute_ancestor(term, self.attribute_mode,
+                                                           self.attributes_ancestors_local_cache)
                 if term is not None:
                     index = seen_attrs.get(attr0.id)
                     if index is None:
@@ -803,7 +936,7 @@ class EntityCharacteristicOrMarkGetter(object):
         attrs1 = []
         prev_id = None
         cnt = 0
-        for additional_attribute in self.additional_characteristics_or_marks.select_related('term'):
+        for additional_attribute in self._get_additional_attributes():
             if limit and cnt > limit:
                 break
             attribute = additional_attribute.term
@@ -853,6 +986,119 @@ class EntityCharacteristicOrMarkGetter(object):
         return attrs if limit is None else attrs[:limit]
 
 
+class EntityCharacteristicOrMarkPrefetchedGetter(EntityCharacteristicOrMarkGetter):
+    """
+    ENG: Attributes getter working on the prefetched terms tree and additional attributes, used to prepare
+    a batch of entities without per entity queries.
+    RUS: Получает атрибуты из заранее загруженного дерева терминов и дополнительных атрибутов,
+    используется для подготовки пакета объектов без запросов на каждый объект.
+    """
+    def __init__(self, terms, additional_characteristics_or_marks, attribute_mode, tree_opts, terms_map):
+        """
+        RUS: Конструктор класса.
+        :param terms_map: словарь терминов вместе со всеми предками, ключ - id термина
+        """
+        super(EntityCharacteristicOrMarkPrefetchedGetter, self).__init__(
+            terms, additional_characteristics_or_marks, attribute_mode, tree_opts)
+        self.terms_map = terms_map
+
+    def _get_ancestors(self, term):
+        """
+        RUS: Возвращает родительские термины в порядке возрастания.
+        """
+        ancestors = []
+        parent_id = term.parent_id
+        while parent_id is not None:
+            term = self.terms_map[parent_id]
+            ancestors.append(term)
+            parent_id = term.parent_id
+        return ancestors
+
+    def _get_attribute_ancestors(self, term, attribute_mode, local_cache):
+        """
+        RUS: Получает родительские термины содержащие заданный режим атрибута.
+        """
+        return [ancestor for ancestor in self._get_ancestors(term) if ancestor.attributes & attribute_mode]
+
+    def _get_no_attribute_ancestor(self, term, attribute_mode, local_cache):
+        """
+        RUS: Получает родительский термин у которого отсудствует заданный режим атрибута.
+        """
+        for ancestor in self._get_ancestors(term):
+            if not ancestor.attributes & attribute_mode:
+                return ancestor
+        return None
+
+    def _get_additional_attributes(self):
+        """
+        RUS: Возвращает заранее загруженные дополнительные характеристики или метки.
+        """
+        return self.additional_characteristics_or_marks
+
+
+def prefetch_entities_attributes(entities):
+    """
+    ENG: Prefetch terms with all their ancestors, characteristics and marks for a batch of entities and inject
+    attributes getters into entities, so characteristics and marks are computed without per entity queries.
+    RUS: Загружает термины вместе со всеми предками, дополнительные характеристики и метки пакета объектов
+    несколькими запросами и внедряет в объекты получатели атрибутов. Объектами могут быть экземпляры моделей
+    или строки `EntitySummaryValues`.
+    :return: словарь отсортированных терминов объектов (ключ - id объекта) и словарь терминов с предками
+    (ключ - id термина)
+    """
+    tree_opts = TermModel._mptt_meta
+    terms_field = EntityModel._meta.get_field('terms')
+    entities_ids = [entity.id for entity in entities]
+    entity_terms_ids = {}
+    for entity_id, term_id in EntityModel.terms.through.objects.filter(**{
+            '{}__in'.format(terms_field.m2m_field_name()): entities_ids
+    }).values_list(terms_field.m2m_field_name(), terms_field.m2m_reverse_field_name()):
+        entity_terms_ids.setdefault(entity_id, []).append(term_id)
+
+    # single ancestors expansion through the terms tree
+    terms = list(TermModel.objects.filter(id__in=set(
+        term_id for ids in entity_terms_ids.values() for term_id in ids)))
+    terms_map = dict((term.id, term) for term in terms)
+    for term in get_queryset_ancestors(terms, include_self=False):
+        terms_map.setdefault(term.id, term)
+    parent_cache_name = TermModel._meta.get_field('parent').get_cache_name()
+    for term in terms_map.values():
+        if term.parent_id is not None:
+            setattr(term, parent_cache_name, terms_map[term.parent_id])
+
+    additional_attributes = {}
+    for obj in AdditionalEntityCharacteristicOrMarkModel.objects.filter(
+            entity_id__in=entities_ids).select_related('term').order_by(
+            'term__{}'.format(tree_opts.tree_id_attr), 'term__{}'.format(tree_opts.left_attr)):
+        additional_attributes.setdefault(obj.entity_id, []).append(obj)
+
+    characteristics_ids = set(TermModel.get_all_active_characteristics_descendants_ids())
+    marks_ids = set(TermModel.get_all_active_marks_descendants_ids())
+    order_key = lambda x: (getattr(x, tree_opts.tree_id_attr), getattr(x, tree_opts.left_attr))
+
+    entities_terms = {}
+    for entity in entities:
+        entity_terms = entities_terms[entity.id] = sorted(
+            [terms_map[term_id] for term_id in entity_terms_ids.get(entity.id, [])], key=order_key)
+        terms_for_characteristics = [x for x in entity_terms if x.id in characteristics_ids]
+        terms_for_marks = [x for x in entity_terms if x.id in marks_ids]
+        additional = additional_attributes.get(entity.id, [])
+        # cached properties are stored in instance dictionary
+        entity.__dict__.update({
+            '_active_terms_for_characteristics': terms_for_characteristics,
+            '_active_terms_for_marks': terms_for_marks,
+            'characteristics_getter': EntityCharacteristicOrMarkPrefetchedGetter(
+                terms_for_characteristics,
+                [x for x in additional if x.term.attributes & TermModel.attributes.is_characteristic],
+                TermModel.attributes.is_characteristic, tree_opts, terms_map),
+            'marks_getter': EntityCharacteristicOrMarkPrefetchedGetter(
+                terms_for_marks,
+                [x for x in additional if x.term.attributes & TermModel.attributes.is_mark],
+                TermModel.attributes.is_mark, tree_opts, terms_map)
+        })
+    return entities_terms, terms_map
+
+
 # ==============================================================================
 # BaseEntity terms ManyRelatedManager patched methods
 # ==============================================================================
@@ -896,6 +1142,11 @@ class BaseEntity(six.with_metaclass(PolymorphicEntityMetaclass, PolymorphicModel
     SHORT_CHARACTERISTICS_MAX_COUNT = 3
     SHORT_MARKS_MAX_COUNT = 5
 
+    # атрибуты сводного сериалайзера в режиме `values()` и соответствующие им колонки модели,
+    # например {'entity_name': 'name'}, None - режим не поддерживается, создаются объекты модели.
+    # Атрибут не наследуется, каждая модель объявляет его явно
+    SUMMARY_VALUES_FIELDS = None
+
     SUBJECT_CACHE_KEY_PATTERN = 'sub:{subj_hash}'
     RELATION_CACHE_KEY_PATTERN = 'rel:{rel_hash}'
 
@@ -913,6 +1164,8 @@ class BaseEntity(six.with_metaclass(PolymorphicEntityMetaclass, PolymorphicModel
     DATA_MART_CACHE_KEY_PATTERN = 'e_dm:{id}'
     DATA_MART_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['entity_data_mart']
 
+    GENERATION_CACHE_KEY = 'e_gen'
+
     # ORDER_BY_CREATED_AT_ASC = 'created_at'
     ORDER_BY_CREATED_AT_DESC = DataMartModel.ENTITIES_ORDER_BY_CREATED_AT_DESC
 
@@ -994,6 +1247,15 @@ class BaseEntity(six.with_metaclass(PolymorphicEntityMetaclass, PolymorphicModel
         msg = "Method get_absolute_url() must be implemented by subclass: `{}`"
         raise NotImplementedError(msg.format(self.__class__.__name__))
 
+    @classmethod
+    def get_absolute_url_from_values(cls, values, request=None, format=None):
+        """
+        ENG: Return the absolute URL of entity summary row `EntitySummaryValues`.
+        RUS: Возвращает абсолютный URL строки `EntitySummaryValues` сводного сериалайзера.
+        По умолчанию загружается объект модели, перекрывайте вместе с `get_absolute_url`.
+        """
+        return values.instance.get_absolute_url(request=request, format=format)
+
     @classmethod
     def get_ordering_modes(cls, **kwargs):
         """
@@ -1366,6 +1628,20 @@ class BaseEntity(six.with_metaclass(PolymorphicEntityMetaclass, PolymorphicModel
         buf.clear()
         cache.delete_many(keys)
 
+    @staticmethod
+    def get_generation_counter():
+        """
+        RUS: Возвращает счетчик поколений сущностей, увеличивается при любом изменении сущностей.
+        """
+        return GenerationCounter.factory(BaseEntity.GENERATION_CACHE_KEY)
+
+    @staticmethod
+    def incr_generation():
+        """
+        RUS: Увеличивает счетчик поколений сущностей.
+        """
+        return BaseEntity.get_generation_counter().incr()
+
     @classmethod
     def get_related_data_marts_ids_from_attributes(cls, *attrs):
         """
@@ -1719,3 +1995,127 @@ class ApiReferenceMixin(object):
         """
         return reverse('edw:{}-detail'.format(EntityModel._meta.model_name.lower()), kwargs={'pk': self.pk}, request=request,
                        format=format)
+
+    @classmethod
+    def get_absolute_url_from_values(cls, values, request=None, format=None):
+        """
+        ENG: Return the absolute URL of entity summary row.
+        RUS: Возвращает абсолютный URL строки сводного сериалайзера без загрузки объекта.
+        """
+        return reverse('edw:{}-detail'.format(EntityModel._meta.model_name.lower()), kwargs={'pk': values.id},
+                       request=request, format=format)
+
+
+# ==============================================================================
+# EntitySummaryValues
+# ==============================================================================
+class EntitySummaryValues(object):
+    """
+    ENG: Lightweight entity summary row built with `values()`, used by summary serializer instead of model instance.
+    RUS: Строка сводного сериалайзера, построенная с помощью `values()`, используется вместо объекта модели.
+    Для каждой полиморфной модели создается подкласс с метаданными типа, подклассы хранятся в реестре
+    по id типа содержимого (`polymorphic_ctype_id`).
+    """
+    model_class = None
+    content_type = None
+    entity_model = None
+    _meta = None
+    _rest_meta = None
+
+    _registry = {}
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+        self.pk = self.id
+
+    @classmethod
+    def get_class(cls, polymorphic_ctype_id):
+        """
+        RUS: Возвращает класс строк полиморфной модели или None, если модель не поддерживает режим `values()`:
+        колонки `SUMMARY_VALUES_FIELDS` не объявлены в самой модели, в `RESTMeta` добавлены поля `include`
+        или перекрыт метод `get_summary_extra`.
+        """
+        try:
+            return cls._registry[polymorphic_ctype_id]
+        except KeyError:
+            pass
+        content_type = ContentType.objects.get_for_id(polymorphic_ctype_id)
+        model_class = content_type.model_class()
+        if (model_class is None or model_class.__dict__.get('SUMMARY_VALUES_FIELDS', None) is None or
+                model_class._rest_meta.include or six.get_unbound_function(
+                model_class.get_summary_extra) is not six.get_unbound_function(BaseEntity.get_summary_extra)):
+            values_class = None
+        else:
+            values_class = type(str('{}SummaryValues'.format(model_class.__name__)), (cls,), {
+                'model_class': model_class,
+                'content_type': content_type,
+                'entity_model': content_type.model,
+                '_meta': model_class._meta,
+                '_rest_meta': model_class._rest_meta
+            })
+        cls._registry[polymorphic_ctype_id] = values_class
+        return values_class
+
+    @staticmethod
+    def load_instances(rows):
+        """
+        RUS: Загружает объекты моделей строк одним запросом на модель.
+        """
+        model_rows = {}
+        for row in rows:
+            if 'instance' not in row.__dict__:
+                model_rows.setdefault(row.model_class, []).append(row)
+        for model_class, items in model_rows.items():
+            instances = model_class._default_manager.in_bulk([row.id for row in items])
+            for row in items:
+                # cached property is stored in instance dictionary
+                row.__dict__['instance'] = instances.get(row.id, None)
+
+    @cached_property
+    def instance(self):
+        """
+        RUS: Объект модели, загружается только при необходимости, например для рендеринга HTML сниппета.
+        """
+        return self.model_class._default_manager.get(pk=self.id)
+
+    def entity_type(self):
+        """
+        RUS: Возвращает полиморфный тип объекта.
+        """
+        return force_text(self.content_type)
+
+    def get_absolute_url(self, request=None, format=None):
+        """
+        RUS: Возвращает абсолютный URL объекта.
+        """
+        return self.model_class.get_absolute_url_from_values(self, request=request, format=format)
+
+    def get_summary_extra(self, context):
+        """
+        RUS: Дополнительные данные сводного сериалайзера, модели строк не перекрывают `get_summary_extra`.
+        """
+        return None
+
+    @cached_property
+    def characteristics_getter(self):
+        prefetch_entities_attributes([self])
+        return self.__dict__['characteristics_getter']
+
+    @cached_property
+    def short_characteristics(self):
+        """
+        RUS: Возвращает короткие характеристики с ограничением максимального размера.
+        """
+        return self.characteristics_getter[:self.model_class.SHORT_CHARACTERISTICS_MAX_COUNT]
+
+    @cached_property
+    def marks_getter(self):
+        prefetch_entities_attributes([self])
+        return self.__dict__['marks_getter']
+
+    @cached_property
+    def short_marks(self):
+        """
+        RUS: Возвращает короткие метки с ограничением максимального размера.
+        """
+        return self.marks_getter[:self.model_class.SHORT_MARKS_MAX_COUNT]
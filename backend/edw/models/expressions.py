@@ -132,6 +132,29 @@ class Cast(Func):
     arg_joiner = ' AS '
 
 
+class BigInteger(Func):
+    """
+    ENG: Big integer data type for `Cast`.
+    RUS: Целочисленный тип данных для преобразования `Cast`.
+    """
+    template = 'BIGINT'
+
+    def as_mysql(self, compiler, connection):
+        """
+        RUS: В MySQL целочисленный тип для преобразования - SIGNED.
+        """
+        self.template = 'SIGNED'
+        return super(BigInteger, self).as_sql(compiler, connection)
+
+
+class Floor(Func):
+    """
+    ENG: Return the largest integer value that is smaller than or equal to a number.
+    RUS: Округляет число вниз до целого.
+    """
+    function = 'FLOOR'
+
+
 class Decimal(Func):
     """
     ENG: Function for working with decimal data types with high accuracy.
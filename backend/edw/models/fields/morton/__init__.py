@@ -157,12 +157,16 @@ class BaseMortonField(models.Field):
         """
         RUS: Преобразует значения из базы данных в объект Python.
         """
+        if value is None:
+            return value
         return self.value_class(mortoncode=value)
 
     def get_prep_value(self, value):
         """
         RUS: Для преобразования типов Python в тип в базе данных.
         """
+        if value is None:
+            return value
         if isinstance(value, self.value_class):
             return value.interleave()
         return str(value)
@@ -234,3 +238,44 @@ class MortonPreciseSearchMatchedLookup(PatternLookup):
         if params and not self.bilateral_transforms:
             params[0] = "%s%%" % connection.ops.prep_for_like_query(params[0])
         return rhs, params
+
+
+def split_range_by_length(start, stop):
+    """
+    RUS: Разбивает диапазон целых чисел [start, stop] на поддиапазоны с одинаковым количеством цифр.
+    Строковое сравнение чисел одной длины совпадает с числовым, поэтому диапазоны кодов Мортона,
+    хранимых в виде строк, можно выбирать по индексу.
+    Возвращает список кортежей (начало, конец, длина).
+    """
+    result = []
+    length = len(str(start))
+    while start <= stop:
+        upper = min(stop, 10 ** length - 1)
+        result.append((start, upper, length))
+        start, length = upper + 1, length + 1
+    return result
+
+
+@BaseMortonField.register_lookup
+class MortonRangesMatchedLookup(Lookup):
+    """
+    RUS: Поиск по списку диапазонов кодов Мортона [(начало, конец), ...].
+    """
+    lookup_name = 'mortonranges'
+
+    def get_prep_lookup(self):
+        return [(int(start), int(stop)) for start, stop in self.rhs]
+
+    def as_sql(self, compiler, connection):
+        """
+        RUS: Для преобразования выражения запроса в SQL-запрос.
+        """
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        conditions, params = [], []
+        for start, stop in self.rhs:
+            for lower, upper, length in split_range_by_length(start, stop):
+                conditions.append('({0} >= %s AND {0} <= %s AND LENGTH({0}) = %s)'.format(lhs))
+                params.extend(lhs_params + [str(lower)] + lhs_params + [str(upper)] + lhs_params + [length])
+        if not conditions:
+            return '1 = 0', []
+        return '({})'.format(' OR '.join(conditions)), params
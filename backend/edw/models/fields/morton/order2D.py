@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+from collections import deque
 
 from django.utils.translation import ugettext_lazy as _
 
@@ -68,3 +69,62 @@ class MortonField2D(BaseMortonField):
 
     description = _("MortonOrder2D field")
     value_class = MortonOrder2D
+
+
+#==============================================================================
+# Geographic coordinates
+#==============================================================================
+GEO_BITS = 24  # бит на координату, около 2.4 м по долготе на экваторе
+
+MAX_RANGES = 32
+
+
+def geo_to_args(longitude, latitude, bits=GEO_BITS):
+    """
+    RUS: Переводит географические координаты в целочисленные аргументы кода Мортона.
+    """
+    scale = (1 << bits) - 1
+    x = int(round((float(longitude) + 180.0) / 360.0 * scale))
+    y = int(round((float(latitude) + 90.0) / 180.0 * scale))
+    return max(0, min(scale, x)), max(0, min(scale, y))
+
+
+def get_ranges(x_min, y_min, x_max, y_max, bits=GEO_BITS, max_ranges=MAX_RANGES):
+    """
+    RUS: Разбивает прямоугольник в целочисленных координатах на диапазоны кодов Мортона [(начало, конец), ...].
+    Квадрант дерева соответствует непрерывному диапазону кодов, частично пересекающиеся квадранты дробятся
+    (от крупных к мелким), пока количество диапазонов не превысит `max_ranges`, оставшиеся берутся целиком.
+    Соседние диапазоны объединяются.
+    """
+    ranges = []
+    queue = deque([(0, 0, bits)])
+    while queue:
+        qx, qy, level = queue.popleft()
+        last = (1 << level) - 1
+        if qx > x_max or qy > y_max or qx + last < x_min or qy + last < y_min:
+            continue
+        inside = x_min <= qx and qx + last <= x_max and y_min <= qy and qy + last <= y_max
+        if inside or level == 0 or len(ranges) + len(queue) + 4 > max_ranges:
+            start = pm.interleave2(qx, qy)
+            ranges.append((start, start + (1 << 2 * level) - 1))
+        else:
+            half, level = 1 << (level - 1), level - 1
+            queue.extend([(qx, qy, level), (qx + half, qy, level), (qx, qy + half, level),
+                          (qx + half, qy + half, level)])
+    ranges.sort()
+    result = []
+    for start, stop in ranges:
+        if result and result[-1][1] + 1 >= start:
+            result[-1] = (result[-1][0], max(result[-1][1], stop))
+        else:
+            result.append((start, stop))
+    return result
+
+
+def get_geo_ranges(min_longitude, min_latitude, max_longitude, max_latitude, bits=GEO_BITS, max_ranges=MAX_RANGES):
+    """
+    RUS: Возвращает диапазоны кодов Мортона для прямоугольника в географических координатах.
+    """
+    x_min, y_min = geo_to_args(min_longitude, min_latitude, bits)
+    x_max, y_max = geo_to_args(max_longitude, max_latitude, bits)
+    return get_ranges(x_min, y_min, x_max, y_max, bits, max_ranges)
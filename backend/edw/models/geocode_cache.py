@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import re
+
+from django.db import models, IntegrityError, transaction
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.six import with_metaclass
+from django.utils.translation import get_language, ugettext_lazy as _
+from geopy.location import Location
+
+from .boundary import BoundaryModel, get_boundary
+from .fields.morton.order2D import MortonField2D, MortonOrder2D, geo_to_args
+from .postal_zone import PostZoneModel, get_postal_zone
+from .term import TermModel
+from .. import deferred
+from ..utils.generation_counter_in_cache import GenerationCounter
+from ..utils.geo import get_geocoder, get_postcode, GeocoderException
+
+
+#==============================================================================
+# BaseGeocodeCache
+#==============================================================================
+@python_2_unicode_compatible
+class BaseGeocodeCache(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
+    """
+    ENG: Persistent geocoding results keyed by normalized query and language.
+    RUS: Постоянный кэш результатов геокодирования по нормализованному запросу и языку.
+    Хранит координаты, код Мортона, определенные границу и почтовую зону.
+    """
+    GEOPOSITION_QUERY_PATTERN = 'geo:{:.6f},{:.6f}'
+    GEOPOSITION_QUERY_RE = re.compile(r'^geo:(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)$')
+
+    query = models.CharField(verbose_name=_('Query'), max_length=255)
+    language = models.CharField(verbose_name=_('Language'), max_length=10, blank=True, default='')
+    address = models.TextField(verbose_name=_('Address'), blank=True, default='')
+    latitude = models.FloatField(verbose_name=_('Latitude'), null=True, blank=True)
+    longitude = models.FloatField(verbose_name=_('Longitude'), null=True, blank=True)
+    morton = MortonField2D(verbose_name=_('Morton code'), null=True, blank=True, db_index=True)
+    raw = models.TextField(verbose_name=_('Raw data'), blank=True, default='{}')
+    boundary = deferred.ForeignKey('BaseBoundary', verbose_name=_('Boundary'), related_name='+',
+                                   null=True, blank=True, on_delete=models.SET_NULL)
+    postal_zone = deferred.ForeignKey('BasePostZone', verbose_name=_('Postal zone'), related_name='+',
+                                      null=True, blank=True, on_delete=models.SET_NULL)
+    zones_version = models.CharField(verbose_name=_('Zones version'), max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created at"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated at"))
+
+    class Meta:
+        """
+        RUS: Переопределяет метаданные модели.
+        """
+        abstract = True
+        verbose_name = _("Geocode cache")
+        verbose_name_plural = _("Geocode cache")
+        unique_together = (('query', 'language'),)
+
+    def __str__(self):
+        """
+        RUS: Переопределяет имя в строковом формате.
+        """
+        return self.address or self.query
+
+    @staticmethod
+    def normalize_query(query):
+        """
+        RUS: Нормализует адрес: нижний регистр, одиночные пробелы, без пробелов перед знаками препинания.
+        """
+        query = re.sub(r'\s+', ' ', query.strip().lower())
+        return re.sub(r' ([,.;])', r'\1', query)[:255]
+
+    @classmethod
+    def get_query(cls, geoposition=None, query=None):
+        """
+        RUS: Возвращает ключ кэша: геопозицию либо нормализованный адрес.
+        """
+        if geoposition is not None:
+            return cls.GEOPOSITION_QUERY_PATTERN.format(float(geoposition.latitude), float(geoposition.longitude))
+        return cls.normalize_query(query)
+
+    @staticmethod
+    def get_zones_version():
+        """
+        RUS: Возвращает версию границ, почтовых зон и терминов, определенные зоны устаревают при ее изменении.
+        """
+        return ','.join([str(x) for x in GenerationCounter.get_values([
+            BoundaryModel.GENERATION_CACHE_KEY, PostZoneModel.GENERATION_CACHE_KEY, TermModel.GENERATION_CACHE_KEY])])
+
+    @property
+    def location(self):
+        """
+        RUS: Возвращает объект местоположения geopy, такой же как возвращает геокодер.
+        """
+        if self.latitude is None or self.longitude is None:
+            return None
+        try:
+            raw = json.loads(self.raw)
+        except ValueError:
+            raw = {}
+        return Location(self.address, (self.latitude, self.longitude, 0), raw)
+
+    def set_location(self, location):
+        """
+        RUS: Сохраняет в записи результат геокодирования.
+        """
+        if location is None:
+            self.address, self.latitude, self.longitude, self.morton, self.raw = '', None, None, None, '{}'
+        else:
+            self.address = location.address or ''
+            self.latitude, self.longitude = location.latitude, location.longitude
+            self.morton = MortonOrder2D(*geo_to_args(location.longitude, location.latitude))
+            self.raw = json.dumps(location.raw)
+        self.zones_version = ''
+
+    def get_point(self):
+        """
+        RUS: Возвращает точку (долгота, широта) определения границы: для запроса по геопозиции - саму геопозицию,
+        иначе координаты найденного места, либо None.
+        """
+        match = self.GEOPOSITION_QUERY_RE.match(self.query)
+        if match is not None:
+            return float(match.group(2)), float(match.group(1))
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.longitude, self.latitude
+
+    def update_zones(self, save=True, version=None):
+        """
+        RUS: Определяет границу и почтовую зону, если они устарели.
+        """
+        if version is None:
+            version = self.get_zones_version()
+        if self.zones_version == version:
+            return False
+        location, point = self.location, self.get_point()
+        self.boundary = get_boundary(*point) if point is not None else None
+        if location is None:
+            self.postal_zone = None
+        else:
+            try:
+                postcode = get_postcode(location)
+            except GeocoderException:
+                self.postal_zone = None
+            else:
+                self.postal_zone = get_postal_zone(postcode)
+        self.zones_version = version
+        if save:
+            self.save(update_fields=('boundary', 'postal_zone', 'zones_version', 'updated_at'))
+        return True
+
+    @classmethod
+    def get_entry(cls, geoposition=None, query=None, language=None):
+        """
+        RUS: Возвращает запись кэша, при отсутствии выполняет запрос к геокодеру и создает ее.
+        """
+        if language is None:
+            language = get_language() or ''
+        key = cls.get_query(geoposition, query)
+        model = GeocodeCacheModel.materialized
+        try:
+            entry = model.objects.select_related('boundary__term', 'postal_zone__term').get(
+                query=key, language=language)
+        except model.DoesNotExist:
+            entry = model(query=key, language=language)
+            entry.set_location(get_geocoder()(geoposition=geoposition, query=query))
+            entry.update_zones(save=False)
+            try:
+                with transaction.atomic():
+                    entry.save()
+            except IntegrityError:
+                # конкурентный процесс уже сохранил результат
+                entry = model.objects.get(query=key, language=language)
+        else:
+            entry.update_zones_if_outdated()
+        return entry
+
+    def update_zones_if_outdated(self):
+        """
+        RUS: Обновляет границу и почтовую зону записи только при изменении версии границ, почтовых зон и терминов,
+        актуальная запись при чтении из кэша не изменяется.
+        """
+        version = self.get_zones_version()
+        if self.zones_version != version:
+            self.update_zones(version=version)
+
+    @classmethod
+    def find_entry(cls, geoposition=None, query=None, language=None):
+        """
+        RUS: Возвращает существующую запись кэша без запроса к геокодеру, либо None.
+        """
+        if language is None:
+            language = get_language() or ''
+        entry = GeocodeCacheModel.materialized.objects.select_related('boundary__term', 'postal_zone__term').filter(
+            query=cls.get_query(geoposition, query), language=language).first()
+        if entry is not None:
+            entry.update_zones_if_outdated()
+        return entry
+
+
+GeocodeCacheModel = deferred.MaterializedModel(BaseGeocodeCache)
+
+
+def get_location_from_cache(geoposition=None, query=None, language=None):
+    """
+    RUS: Возвращает местоположение по геопозиции или адресу через постоянный кэш геокодирования,
+    если модель кэша не материализована - напрямую от геокодера.
+    """
+    if not hasattr(BaseGeocodeCache, '_materialized_model'):
+        return get_geocoder()(geoposition=geoposition, query=query)
+    return BaseGeocodeCache.get_entry(geoposition, query, language).location
+
+
+def get_zones_from_cache(geoposition, geocode=True, language=None):
+    """
+    RUS: Возвращает границу и почтовую зону геопозиции (boundary, postal_zone), сохраненные в записи постоянного
+    кэша геокодирования. Если `geocode` ложно, геокодер не вызывается и при отсутствии записи возвращается None.
+    Если модель кэша не материализована - возвращает None.
+    """
+    if not hasattr(BaseGeocodeCache, '_materialized_model'):
+        return None
+    if geocode:
+        entry = BaseGeocodeCache.get_entry(geoposition=geoposition, language=language)
+    else:
+        entry = BaseGeocodeCache.find_entry(geoposition=geoposition, language=language)
+        if entry is None:
+            return None
+    return entry.boundary, entry.postal_zone
@@ -2,7 +2,7 @@
 from __future__ import unicode_literals
 
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Q, F, Value, Avg, Count, Max, Min, BigIntegerField
 from django.utils.encoding import force_text
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
@@ -11,11 +11,23 @@ from geoposition import str_to_geoposition
 from geoposition.geohash import geo_expand
 
 from edw.models.entity import EntityModel
+from edw.models.expressions import BigInteger, Cast, Floor
 from edw.models.boundary import get_boundary
+from edw.models.geocode_cache import get_location_from_cache, get_zones_from_cache
+from edw.models.fields.morton.order2D import MortonOrder2D, GEO_BITS, MAX_RANGES, geo_to_args, get_geo_ranges
 from edw.models.postal_zone import get_postal_zone
 from edw.models.term import TermModel
 from edw.signals.place import zone_changed
-from edw.utils.geo import get_location_from_geocoder, get_postcode, GeocoderException
+from edw.utils.geo import (
+    get_postcode,
+    GeocoderException,
+    get_closest,
+    geo_to_latitude,
+    geo_to_longitude,
+    get_bboxes,
+    get_bboxes_around,
+    EARTH_RADIUS_METERS
+)
 
 
 class PlaceMixin(object):
@@ -28,6 +40,16 @@ class PlaceMixin(object):
     REGION_ROOT_TERM_SLUG = "region"
     TERRA_INCOGNITA_TERM_SLUG = "terra-incognita"
 
+    # имя поля `MortonField2D` с кодом Мортона геопозиции, включает поиск по прямоугольнику и ближайших объектов
+    MORTON_FIELD_NAME = None
+    MORTON_BITS = GEO_BITS
+    MORTON_MAX_RANGES = MAX_RANGES
+
+    NEAREST_INITIAL_RADIUS = 1000  # метры
+
+    # уровень ячеек кластеров относительно уровня тайлов карты, 2 - по 4x4 ячейки на тайл
+    CLUSTER_ZOOM_SHIFT = 2
+
     @classmethod
     def validate_term_model(cls):
         """
@@ -133,11 +155,83 @@ class PlaceMixin(object):
             do_validate = False
         return super(PlaceMixin, self).need_terms_validation_after_save(origin, **kwargs) or do_validate
 
+    def pre_save_entity(self, origin, *args, **kwargs):
+        """
+        RUS: Обновляет код Мортона геопозиции.
+        """
+        if self.MORTON_FIELD_NAME is not None and self.geoposition:
+            setattr(self, self.MORTON_FIELD_NAME, MortonOrder2D(*geo_to_args(
+                self.geoposition.longitude, self.geoposition.latitude, self.MORTON_BITS)))
+        super(PlaceMixin, self).pre_save_entity(origin, *args, **kwargs)
+
+    @classmethod
+    def filter_bbox(cls, queryset, min_longitude, min_latitude, max_longitude, max_latitude):
+        """
+        RUS: Фильтрует объекты по прямоугольнику. Прямоугольник раскладывается на диапазоны кодов Мортона,
+        выбираемые по индексу, затем координаты проверяются точно.
+        """
+        return cls._filter_bboxes(queryset, get_bboxes(min_longitude, min_latitude, max_longitude, max_latitude))
+
+    @classmethod
+    def _filter_bboxes(cls, queryset, bboxes):
+        lookup = '{}__mortonranges'.format(cls.MORTON_FIELD_NAME)
+        ranges_q, bboxes_q = Q(), Q()
+        for bbox in bboxes:
+            ranges_q |= Q(**{lookup: get_geo_ranges(*bbox, bits=cls.MORTON_BITS, max_ranges=cls.MORTON_MAX_RANGES)})
+            bboxes_q |= Q(longitude__gte=bbox[0], latitude__gte=bbox[1], longitude__lte=bbox[2],
+                          latitude__lte=bbox[3])
+        return queryset.filter(ranges_q).annotate(
+            latitude=geo_to_latitude('geoposition'), longitude=geo_to_longitude('geoposition')).filter(bboxes_q)
+
+    @classmethod
+    def get_nearest(cls, latitude, longitude, k, queryset=None):
+        """
+        RUS: Возвращает список `k` ближайших объектов, упорядоченных по расстоянию (аннотация `distance`, метры).
+        Поиск расширяющимися окрестностями: выбираются объекты в прямоугольнике вокруг круга радиуса r,
+        если среди них найдено `k` объектов не дальше r, то результат точный, иначе радиус удваивается.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        radius = cls.NEAREST_INITIAL_RADIUS
+        while radius < EARTH_RADIUS_METERS:
+            filtered = cls._filter_bboxes(queryset, get_bboxes_around(latitude, longitude, radius))
+            places = list(get_closest(filtered, 'geoposition', latitude, longitude)[:k])
+            if len(places) == k and places[-1].distance <= radius:
+                return places
+            radius *= 2
+        return list(get_closest(queryset, 'geoposition', latitude, longitude)[:k])
+
+    @classmethod
+    def get_cluster_level(cls, zoom):
+        """
+        RUS: Возвращает уровень дерева кодов Мортона (длину префикса в парах бит) для масштаба карты.
+        """
+        return max(0, min(cls.MORTON_BITS, int(zoom) + cls.CLUSTER_ZOOM_SHIFT))
+
+    @classmethod
+    def get_clusters(cls, queryset, zoom):
+        """
+        RUS: Группирует объекты по префиксу кода Мортона, выбранному по масштабу карты, одним агрегирующим запросом.
+        Возвращает список словарей: ячейка `cell`, количество `count`, центр `latitude`, `longitude`
+        и примеры идентификаторов `min_id`, `max_id`.
+        """
+        shift = 2 * (cls.MORTON_BITS - cls.get_cluster_level(zoom))
+        cell = Floor(Cast(F(cls.MORTON_FIELD_NAME), BigInteger(), output_field=BigIntegerField()) / Value(
+            1 << shift, output_field=BigIntegerField()), output_field=BigIntegerField())
+        return list(queryset.filter(**{'{}__isnull'.format(cls.MORTON_FIELD_NAME): False}).order_by().annotate(
+            cell=cell).values('cell').annotate(
+            count=Count('id'),
+            latitude=Avg(geo_to_latitude('geoposition')),
+            longitude=Avg(geo_to_longitude('geoposition')),
+            min_id=Min('id'),
+            max_id=Max('id')
+        ))
+
     def get_location(self):
         """
         RUS: Определяет местоположение объекта.
         """
-        return get_location_from_geocoder(geoposition=self.geoposition)
+        return get_location_from_cache(geoposition=self.geoposition)
 
     @cached_property
     def location(self):
@@ -160,24 +254,35 @@ class PlaceMixin(object):
                 ).values_list('term_id', flat=True)
             else:
                 to_remove = []
-            # определяем термин зоны по границам
-            zone = get_boundary(self.geoposition.longitude, self.geoposition.latitude)
+            bulk = context.get("bulk_force_validate_terms", False)
+            # граница и почтовая зона, сохраненные в постоянном кэше геокодирования,
+            # в массовых операциях геокодер не вызывается из ограничения его API
+            try:
+                zones = get_zones_from_cache(self.geoposition, geocode=not bulk)
+            except GeocoderException:
+                zones = None
+            if zones is not None:
+                zone, post_zone = zones
+            else:
+                # определяем термин зоны по границам
+                zone, post_zone = get_boundary(self.geoposition.longitude, self.geoposition.latitude), None
 
             # Уточняем зону если не удалось определить по границам, либо возможно найти более частную зону,
             # нельзя использовать в массовых операциях из ограничения API геокодера
-            if not context.get("bulk_force_validate_terms", False):
+            if not bulk:
                 if zone is None or not zone.term.is_leaf_node():
-                    try:
-                        # определяем термин зоны по почтовому индексу
-                        postcode = get_postcode(self.location)
-                    except GeocoderException:
-                        pass
-                    else:
-                        post_zone = get_postal_zone(postcode)
-                        level_attr = TermModel._mptt_meta.level_attr
-                        if post_zone is not None and (
-                                zone is None or getattr(zone.term, level_attr) < getattr(post_zone.term, level_attr)):
-                            zone = post_zone
+                    if zones is None:
+                        try:
+                            # определяем термин зоны по почтовому индексу
+                            postcode = get_postcode(self.location)
+                        except GeocoderException:
+                            pass
+                        else:
+                            post_zone = get_postal_zone(postcode)
+                    level_attr = TermModel._mptt_meta.level_attr
+                    if post_zone is not None and (
+                            zone is None or getattr(zone.term, level_attr) < getattr(post_zone.term, level_attr)):
+                        zone = post_zone
                 if zone is None:
                     # если зона не найдена ни по почтовому индексу ни по границе - устанавливаем "Terra Incognita"
                     to_add = [self.get_terra_incognita_term().id]
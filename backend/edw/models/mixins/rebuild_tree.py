@@ -1,43 +1,144 @@
 # -*- coding: utf-8 -*-
-from time import gmtime, mktime
-from datetime import timedelta, datetime
+from django.db import models, transaction
+from django.db.models import Case, When, Value, Max
 from django.utils import timezone
 
+from ...signals.mptt import tree_batch_done
+from ...utils.hash_helpers import get_unique_slug
+
 
 class RebuildTreeMixin(object):
 
-    def rebuild2(self):
+    REBUILD_CHUNK_SIZE = 500
+
+    def rebuild2(self, tree_ids=None, insert_ids=()):
         """
         The same as rebuild but keeps current order.
+        Tree fields are computed in memory from (id, parent_id, tree_id, lft) and only changed rows are written
+        with bulk UPDATE statements.
+        :param tree_ids: rebuild only these trees, roots keep their tree ids, new roots (tree id 0, as saved with
+        disabled mptt updates) and roots sharing a tree id with another root get tree ids after the existing trees
+        :param insert_ids: nodes placed among their existing siblings as mptt inserts a node: before the first
+        sibling with greater `order_insertion_by` values, after all siblings without `order_insertion_by`
         """
-        qs = self._mptt_filter()
-        dates = {}
-        base_date = timezone.make_aware(
-                        datetime.fromtimestamp(
-                            mktime(
-                                gmtime(0)
-                            )
-                        ),
-                        timezone.get_current_timezone()
-                    )
-        for item in qs:
-            dates[item.pk] = item.created_at
-            offset = item.tree_id + item.lft
-            lookups = {
-                "created_at" : base_date + timedelta(seconds=offset)
-            }
-            item_qs = self.model._default_manager.filter(pk=item.pk)
-            item_qs.update(**lookups)
-        e = None
-        try:
-            super(RebuildTreeMixin, self).rebuild()
-        except Exception as e:
-            pass
-        for item in qs:
-            lookups = {
-                "created_at" : dates[item.pk]
-            }
-            item_qs = self.model._default_manager.filter(pk=item.pk)
-            item_qs.update(**lookups)
-        if e is not None:
-            raise e
+        opts = self.model._mptt_meta
+        tree_id_attr, left_attr, right_attr, level_attr = (
+            opts.tree_id_attr, opts.left_attr, opts.right_attr, opts.level_attr)
+        parent_attr = '{}_id'.format(opts.parent_attr)
+        insertion_fields = list(opts.order_insertion_by) if insert_ids else []
+
+        queryset = self._mptt_filter() if tree_ids is None else self._mptt_filter(
+            **{'{}__in'.format(tree_id_attr): list(tree_ids)})
+        nodes = list(queryset.order_by().values_list(
+            'pk', parent_attr, tree_id_attr, left_attr, right_attr, level_attr, *insertion_fields))
+        order = dict((node[0], (node[2], node[3])) for node in nodes)
+        insertion_keys = dict((node[0], node[6:]) for node in nodes)
+        children = {}
+        for node in nodes:
+            parent_id = node[1] if node[1] in order else None
+            children.setdefault(parent_id, []).append(node[0])
+        for parent_id, ids in children.items():
+            # new trees go after the existing ones
+            ids.sort(key=lambda pk: (order[pk][0] == 0, order[pk]))
+            if parent_id is not None and insert_ids:
+                siblings = [pk for pk in ids if pk not in insert_ids]
+                for pk in sorted([pk for pk in ids if pk in insert_ids],
+                                 key=lambda pk: (insertion_keys[pk], order[pk])):
+                    index = len(siblings)
+                    if insertion_fields:
+                        for i, sibling_id in enumerate(siblings):
+                            if insertion_keys[sibling_id] > insertion_keys[pk]:
+                                index = i
+                                break
+                    siblings.insert(index, pk)
+                ids[:] = siblings
+
+        next_tree_id, used_tree_ids = None, set()
+        # depth-first traversal without recursion, `rght` is assigned when node is left
+        result = {}
+        for tree_id, root_id in enumerate(children.get(None, []), 1):
+            if tree_ids is not None:
+                tree_id = order[root_id][0]
+                if not tree_id or tree_id in used_tree_ids:
+                    if next_tree_id is None:
+                        next_tree_id = (self._mptt_filter().aggregate(
+                            max_tree_id=Max(tree_id_attr))['max_tree_id'] or 0) + 1
+                    tree_id, next_tree_id = next_tree_id, next_tree_id + 1
+                used_tree_ids.add(tree_id)
+            counter = 1
+            result[root_id] = [tree_id, counter, None, 0]
+            stack = [(root_id, iter(children.get(root_id, [])))]
+            while stack:
+                pk, it = stack[-1]
+                child_id = next(it, None)
+                counter += 1
+                if child_id is None:
+                    result[pk][2] = counter
+                    stack.pop()
+                else:
+                    result[child_id] = [tree_id, counter, None, len(stack)]
+                    stack.append((child_id, iter(children.get(child_id, []))))
+
+        changed = [node[0] for node in nodes if node[0] in result and result[node[0]] != list(node[2:6])]
+        with transaction.atomic():
+            for i in range(0, len(changed), self.REBUILD_CHUNK_SIZE):
+                chunk = changed[i:i + self.REBUILD_CHUNK_SIZE]
+                values = {}
+                for index, attr in enumerate((tree_id_attr, left_attr, right_attr, level_attr)):
+                    values[attr] = Case(*[When(pk=pk, then=Value(result[pk][index])) for pk in chunk],
+                                        output_field=models.PositiveIntegerField())
+                self.model._default_manager.filter(pk__in=chunk).update(**values)
+
+    def bulk_move_to(self, nodes_ids, target):
+        """
+        Move nodes with their subtrees to the children of `target` with one UPDATE,
+        tree fields are recalculated only for affected trees by `rebuild2`.
+        Moved nodes are placed among children of `target` by `order_insertion_by` (`created_at` for terms and
+        data marts) as saving node with a new parent does, order of other nodes is kept.
+        Instead of `move_to_done` signal per node one `tree_batch_done` signal is sent.
+        Nodes which are already children of `target` or its ancestors are skipped.
+        Returns list of moved nodes ids.
+        """
+        opts = self.model._mptt_meta
+        target = self.get(pk=target.pk)
+        ancestors = list(target.get_ancestors(include_self=True))
+        nodes = [node for node in self.filter(pk__in=nodes_ids) if getattr(node, '{}_id'.format(
+            opts.parent_attr)) != target.pk and not node.is_ancestor_of(target, include_self=True)]
+        if not nodes:
+            return []
+        ids = [node.pk for node in nodes]
+
+        # path of moved nodes are made as on save, collisions are resolved with unique slug
+        paths = set()
+        for node in nodes:
+            node._make_path(ancestors + [node])
+            if node.path in paths:
+                node.slug = get_unique_slug(node.slug, node.pk)
+                node._make_path(ancestors + [node])
+            paths.add(node.path)
+        for path in self.exclude(pk__in=ids).filter(path__in=list(paths)).values_list('path', flat=True):
+            for node in nodes:
+                if node.path == path:
+                    node.slug = get_unique_slug(node.slug, node.pk)
+                    node._make_path(ancestors + [node])
+
+        prev_parent_ids = set([getattr(node, '{}_id'.format(opts.parent_attr)) for node in nodes])
+        tree_ids = set([getattr(node, opts.tree_id_attr) for node in nodes])
+        tree_ids.add(getattr(target, opts.tree_id_attr))
+        with transaction.atomic():
+            for i in range(0, len(nodes), self.REBUILD_CHUNK_SIZE):
+                chunk = nodes[i:i + self.REBUILD_CHUNK_SIZE]
+                values = {
+                    opts.parent_attr: target,
+                    'updated_at': timezone.now()
+                }
+                for attr in ('slug', 'path'):
+                    values[attr] = Case(*[When(pk=node.pk, then=Value(getattr(node, attr))) for node in chunk],
+                                        output_field=models.CharField())
+                self.filter(pk__in=[node.pk for node in chunk]).update(**values)
+            self.rebuild2(tree_ids=tree_ids, insert_ids=set(ids))
+
+        prev_parent_ids.add(target.pk)
+        prev_parent_ids.discard(None)
+        tree_batch_done.send(sender=self.tree_model, ids=set(ids), parent_ids=prev_parent_ids)
+        return ids
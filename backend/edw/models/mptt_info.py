@@ -56,6 +56,61 @@ def get_queryset_descendants(nodes, include_self=False, add_to_result=None):
         return model_class.objects.filter(id__isnull=True)
 
 
+# ==============================================================================
+# get_queryset_ancestors
+# ==============================================================================
+def get_queryset_ancestors(nodes, include_self=False):
+    """
+    RUS: Запрос к базе данных предков всех узлов одним запросом. Если нет узлов,
+    то возвращается пустой запрос.
+    :param nodes: список узлов дерева, по которым необходимо отыскать предков
+    :param include_self: признак включения в результ исходного спичка узлов
+    :return: список узлов (QuerySet), отсортированный в порядке обхода дерева
+    """
+    if not nodes:
+        # HACK: Emulate MPTTModel.objects.none(), because MPTTModel is abstract
+        return EmptyQuerySet(MPTTModel)
+    filters = []
+    model_class = nodes[0].__class__
+
+    if include_self:
+        for n in nodes:
+            filters.append(Q(tree_id=n.tree_id, lft__lte=n.lft, rght__gte=n.rght))
+    else:
+        for n in nodes:
+            if n.parent_id is not None:
+                filters.append(Q(tree_id=n.tree_id, lft__lt=n.lft, rght__gt=n.rght))
+
+    if filters:
+        return model_class.objects.filter(reduce(operator.or_, filters))
+    else:
+        # HACK: Emulate model_class.objects.none()
+        return model_class.objects.filter(id__isnull=True)
+
+
+# ==============================================================================
+# update_node_family
+# ==============================================================================
+def update_node_family(node, ancestors=False, descendants=True, **values):
+    """
+    RUS: Обновляет поля предков и/или потомков узла запросами по диапазону (tree_id, lft, rght)
+    без выборки списка id. Изменяются только записи, значения которых отличаются от `values`.
+    :param node: сохраненный узел дерева с актуальными tree_id, lft, rght
+    :param ancestors: признак обновления предков
+    :param descendants: признак обновления потомков
+    :return: количество измененных записей
+    """
+    filters = []
+    if ancestors and node.parent_id is not None:
+        filters.append(Q(tree_id=node.tree_id, lft__lt=node.lft, rght__gt=node.rght))
+    if descendants and node.rght - node.lft > 1:
+        filters.append(Q(tree_id=node.tree_id, lft__gt=node.lft, rght__lt=node.rght))
+    if not filters:
+        return 0
+    queryset = node.__class__._default_manager.filter(reduce(operator.or_, filters)).exclude(**values)
+    return queryset.update(**values)
+
+
 # ==============================================================================
 # TermTreeInfo
 # ==============================================================================
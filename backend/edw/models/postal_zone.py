@@ -10,6 +10,7 @@ from django.utils.translation import ugettext_lazy as _
 
 from .term import TermModel
 from .. import deferred
+from ..utils.generation_counter_in_cache import GenerationCounter
 
 
 #==============================================================================
@@ -54,6 +55,8 @@ class BasePostZone(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
     RUS: Класс базовая почтовая зона, связанная с термином.
     Определяет поля (Термин, Почтовые индексы, статус Активен).
     '''
+    GENERATION_CACHE_KEY = 'pz_gen'
+
     term = models.ForeignKey(TermModel, verbose_name=_('Term'), related_name='+', db_index=True)
     postal_codes = models.TextField(verbose_name=_('Postal codes'), null=True, blank=True, help_text=_(
         """You enter on one index in line. Use '?' and '*' as universal substitutes. """
@@ -90,32 +93,144 @@ class BasePostZone(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
     name.fget.short_description = _('Name')
 
     @cached_property
-    def code_pattern(self):
+    def codes_pattern(self):
+        """
+        RUS: Регулярное выражение почтовых индексов зоны без якорей.
+        """
         raw_patterns = re.split(r'\s+', self.postal_codes.strip())
         patterns = [re.sub(r'_+', '\\\s+', re.sub(r'\*', '.*?', re.sub(r'\?', '.', x))) for x in raw_patterns]
-        return r'^(?:%s)$' % '|'.join(patterns)
+        return '|'.join(patterns)
+
+    @cached_property
+    def code_pattern(self):
+        return r'^(?:%s)$' % self.codes_pattern
 
     def is_postal_code_match(self, code):
         return re.match(self.code_pattern, code) is not None
 
+    @staticmethod
+    def incr_generation():
+        """
+        RUS: Увеличивает счетчик поколений почтовых зон, скомпилированный сопоставитель будет перестроен.
+        """
+        return GenerationCounter.factory(BasePostZone.GENERATION_CACHE_KEY).incr()
+
 
 PostZoneModel = deferred.MaterializedModel(BasePostZone)
 
 
+#==============================================================================
+# PostalZoneMatcher
+#==============================================================================
+class PostalZoneMatcher(object):
+    """
+    ENG: In-process compiled matcher of active postal zones. Patterns of all zones are combined
+    into alternations with named groups in lookup priority order (deeper terms first), the first
+    matched alternative is the zone with the highest priority.
+    The matcher is rebuilt lazily when postal zones or terms generation is changed.
+    RUS: Скомпилированный сопоставитель почтовых индексов активных почтовых зон.
+    """
+    # ограничение количества именованных групп в одном регулярном выражении (Python 2)
+    GROUPS_CHUNK_SIZE = 90
+
+    _instance = None
+    _version = None
+
+    def __init__(self, zones):
+        # (zone id, term id, compiled pattern)
+        self.entries = []
+        groups = []
+        for zone in zones:
+            if not zone.postal_codes or not zone.postal_codes.strip():
+                continue
+            try:
+                pattern = re.compile(zone.code_pattern)
+            except re.error:
+                continue
+            self.entries.append((zone.id, zone.term_id, pattern))
+            groups.append('(?P<z{}>{})'.format(zone.id, zone.codes_pattern))
+        self.patterns = [re.compile(r'^(?:%s)$' % '|'.join(groups[i:i + self.GROUPS_CHUNK_SIZE]))
+                         for i in range(0, len(groups), self.GROUPS_CHUNK_SIZE)]
+
+    def find(self, postcode, term_ids=None):
+        """
+        RUS: Возвращает id первой по приоритету почтовой зоны, соответствующей почтовому индексу, либо None.
+        """
+        if term_ids is not None:
+            for zone_id, term_id, pattern in self.entries:
+                if term_id in term_ids and pattern.match(postcode) is not None:
+                    return zone_id
+            return None
+        for pattern in self.patterns:
+            match = pattern.match(postcode)
+            if match is not None:
+                return int(match.lastgroup[1:])
+        return None
+
+    def find_many(self, postcodes, term_ids=None):
+        """
+        RUS: Возвращает список id почтовых зон для списка почтовых индексов.
+        """
+        found = {}
+        result = []
+        for postcode in postcodes:
+            zone_id = found.get(postcode, 0)
+            if zone_id == 0:
+                zone_id = found[postcode] = self.find(postcode, term_ids)
+            result.append(zone_id)
+        return result
+
+    @staticmethod
+    def get_version():
+        return GenerationCounter.get_values([PostZoneModel.GENERATION_CACHE_KEY, TermModel.GENERATION_CACHE_KEY])
+
+    @classmethod
+    def build(cls):
+        tree_opts = TermModel._mptt_meta
+        zones = PostZoneModel.objects.active().order_by(
+            '-' + 'term__{}'.format(tree_opts.level_attr),
+            'term__{}'.format(tree_opts.tree_id_attr), 'term__{}'.format(tree_opts.left_attr)).only(
+            'id', 'term_id', 'postal_codes')
+        return cls(zones)
+
+    @classmethod
+    def get_instance(cls):
+        """
+        RUS: Возвращает сопоставитель процесса, перестраивает его при изменении почтовых зон или терминов.
+        """
+        version = cls.get_version()
+        if cls._instance is None or cls._version != version:
+            cls._instance, cls._version = cls.build(), version
+        return cls._instance
+
+    @classmethod
+    def reset(cls):
+        cls._instance = cls._version = None
+
+
 def get_postal_zone(postcode, term_ids=None):
-    tree_opts = TermModel._mptt_meta
-    zones = PostZoneModel.objects.active().select_related('term').order_by(
-        '-' + 'term__{}'.format(tree_opts.level_attr),
-        'term__{}'.format(tree_opts.tree_id_attr), 'term__{}'.format(tree_opts.left_attr))
     if term_ids is not None:
-        zones = zones.filter(term_id__in=term_ids)
-
-    for zone in zones:
-        if zone.is_postal_code_match(postcode):
-            break
-    else:
-        zone = None
-    return zone
+        term_ids = set(term_ids)
+    zone_id = PostalZoneMatcher.get_instance().find(postcode, term_ids)
+    if zone_id is None:
+        return None
+    try:
+        return PostZoneModel.objects.select_related('term').get(id=zone_id)
+    except PostZoneModel.DoesNotExist:
+        return None
+
+
+def get_postal_zones(postcodes, term_ids=None):
+    """
+    RUS: Пакетное определение почтовых зон для списка почтовых индексов.
+    Возвращает список почтовых зон (либо None) в порядке почтовых индексов.
+    """
+    if term_ids is not None:
+        term_ids = set(term_ids)
+    zones_ids = PostalZoneMatcher.get_instance().find_many(postcodes, term_ids)
+    zones = PostZoneModel.objects.select_related('term').in_bulk(
+        set([zone_id for zone_id in zones_ids if zone_id is not None]))
+    return [zones.get(zone_id, None) for zone_id in zones_ids]
 
 
 def get_all_postal_zone_terms_ids():
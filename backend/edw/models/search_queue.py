@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, IntegrityError, transaction
+from django.utils import timezone, translation
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils import six
+from django.utils.six import with_metaclass
+from django.utils.translation import ugettext_lazy as _
+
+from haystack import connections
+from haystack.exceptions import NotHandled
+from haystack.utils import get_model_ct
+
+from .entity import EntityModel
+from .mptt_info import get_queryset_descendants
+from .term import TermModel
+from .. import deferred
+from .. import settings as edw_settings
+
+
+#==============================================================================
+# BaseSearchIndexQueue
+#==============================================================================
+@python_2_unicode_compatible
+class BaseSearchIndexQueue(with_metaclass(deferred.ForeignKeyBuilder, models.Model)):
+    """
+    ENG: Pending search index operations, one row per object, the latest action wins.
+    RUS: Очередь отложенных операций поискового индекса, одна запись на объект, действует последнее действие.
+    Записи терминов при обработке раскрываются в объекты, связанные с термином и его потомками.
+    """
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+
+    ACTIONS = (
+        (ACTION_UPDATE, _('Update')),
+        (ACTION_DELETE, _('Delete')),
+    )
+
+    model = models.CharField(verbose_name=_('Model'), max_length=255)
+    object_id = models.PositiveIntegerField(verbose_name=_('Object id'))
+    action = models.CharField(verbose_name=_('Action'), max_length=10, choices=ACTIONS, default=ACTION_UPDATE)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created at"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated at"), db_index=True)
+
+    class Meta:
+        """
+        RUS: Переопределяет метаданные модели.
+        """
+        abstract = True
+        verbose_name = _("Search index queue")
+        verbose_name_plural = _("Search index queue")
+        unique_together = (('model', 'object_id'),)
+
+    def __str__(self):
+        """
+        RUS: Переопределяет имя в строковом формате.
+        """
+        return '{} {}.{}'.format(self.action, self.model, self.object_id)
+
+    @classmethod
+    def enqueue(cls, model, ids, action=ACTION_UPDATE):
+        """
+        RUS: Добавляет в очередь операции над объектами, существующие записи объектов обновляются, а не дублируются.
+        :param model: модель или ее строковое представление `app_label.model_name`
+        """
+        if not isinstance(model, six.string_types):
+            model = get_model_ct(model)
+        ids = set(ids)
+        if not ids:
+            return
+        queue_model = SearchIndexQueueModel.materialized
+        queryset = queue_model.objects.filter(model=model)
+        with transaction.atomic():
+            existing_ids = set(queryset.filter(object_id__in=ids).values_list('object_id', flat=True))
+            if existing_ids:
+                # `update` also moves `updated_at`, so the operation is debounced
+                queryset.filter(object_id__in=existing_ids).update(action=action, updated_at=timezone.now())
+            new_ids = ids - existing_ids
+            if not new_ids:
+                return
+            try:
+                with transaction.atomic():
+                    queue_model.objects.bulk_create([
+                        queue_model(model=model, object_id=object_id, action=action) for object_id in new_ids])
+            except IntegrityError:
+                # конкурентный процесс уже добавил часть записей
+                for object_id in new_ids:
+                    queue_model.objects.update_or_create(model=model, object_id=object_id, defaults={
+                        'action': action})
+
+    @staticmethod
+    def get_entities_by_terms(terms_ids):
+        """
+        RUS: Возвращает id объектов по моделям, связанных с терминами и их потомками.
+        """
+        terms = list(TermModel.objects.filter(id__in=terms_ids))
+        result = {}
+        if not terms:
+            return result
+        for entity_id, ctype_id in EntityModel.objects.filter(
+                terms__in=get_queryset_descendants(terms, include_self=True)).order_by().values_list(
+                'id', 'polymorphic_ctype_id').distinct():
+            model_class = ContentType.objects.get_for_id(ctype_id).model_class()
+            if model_class is not None:
+                result.setdefault(get_model_ct(model_class), set()).add(entity_id)
+        return result
+
+    @staticmethod
+    def get_index(unified_index, model):
+        """
+        RUS: Возвращает поисковый индекс модели или ее ближайшего родителя, None если модель не индексируется.
+        """
+        try:
+            model_class = apps.get_model(model)
+        except LookupError:
+            return None
+        for clazz in [model_class] + list(model_class._meta.get_parent_list()):
+            try:
+                return unified_index.get_index(clazz)
+            except NotHandled:
+                pass
+        return None
+
+    @staticmethod
+    def apply(operations):
+        """
+        RUS: Применяет операции ко всем поисковым соединениям, обновления одной модели выполняются одним запросом.
+        :param operations: словарь {(модель, действие): множество id}
+        """
+        for using in connections.connections_info.keys():
+            backend = connections[using].get_backend()
+            unified_index = connections[using].get_unified_index()
+            language = using if using in dict(settings.LANGUAGES) else settings.LANGUAGE_CODE
+            with translation.override(language):
+                for (model, action), ids in operations.items():
+                    index = BaseSearchIndexQueue.get_index(unified_index, model)
+                    if index is None:
+                        continue
+                    if action == BaseSearchIndexQueue.ACTION_UPDATE:
+                        objects = list(index.index_queryset(using=using).filter(pk__in=ids))
+                        if objects:
+                            backend.update(index, objects)
+                        # inactive objects are removed from index
+                        removed_ids = ids - set([obj.pk for obj in objects])
+                    else:
+                        removed_ids = ids
+                    for object_id in removed_ids:
+                        backend.remove('{}.{}'.format(model, object_id))
+
+    @staticmethod
+    def process(batch_size=None, delay=None):
+        """
+        RUS: Обрабатывает очередь пакетами. Записи моложе `delay` секунд не обрабатываются,
+        чтобы повторные изменения одних и тех же объектов объединились.
+        Возвращает количество обработанных записей.
+        """
+        if batch_size is None:
+            batch_size = edw_settings.SEARCH_INDEX_QUEUE['batch_size']
+        if delay is None:
+            delay = edw_settings.SEARCH_INDEX_QUEUE['delay']
+        queue_model = SearchIndexQueueModel.materialized
+        term_model = get_model_ct(TermModel.materialized)
+        processed = 0
+        while True:
+            started_at = timezone.now()
+            entries = list(queue_model.objects.filter(
+                updated_at__lte=started_at - datetime.timedelta(seconds=delay)).order_by('updated_at').values_list(
+                'id', 'model', 'object_id', 'action')[:batch_size])
+            if not entries:
+                break
+            operations, terms_ids = {}, set()
+            for _id, model, object_id, action in entries:
+                if model == term_model:
+                    terms_ids.add(object_id)
+                else:
+                    operations.setdefault((model, action), set()).add(object_id)
+            for model, ids in BaseSearchIndexQueue.get_entities_by_terms(terms_ids).items():
+                ids.difference_update(operations.get((model, BaseSearchIndexQueue.ACTION_DELETE), ()))
+                operations.setdefault((model, BaseSearchIndexQueue.ACTION_UPDATE), set()).update(ids)
+            BaseSearchIndexQueue.apply(operations)
+            # entries changed during processing stay in queue
+            queue_model.objects.filter(id__in=[x[0] for x in entries], updated_at__lte=started_at).delete()
+            processed += len(entries)
+            if len(entries) < batch_size:
+                break
+        return processed
+
+
+SearchIndexQueueModel = deferred.MaterializedModel(BaseSearchIndexQueue)
@@ -2,6 +2,8 @@
 from __future__ import unicode_literals
 
 import inspect
+import threading
+from contextlib import contextmanager
 
 from bitfield import BitField
 from django.core.cache import cache
@@ -22,15 +24,19 @@ from .cache import add_cache_key, QuerySetCachedResultMixin
 from .fields.tree import TreeForeignKey
 from .mixins.rebuild_tree import RebuildTreeMixin
 from .mixins.term.semantic_rule import (OrRuleFilterMixin, AndRuleFilterMixin, )
-from .mptt_info import get_queryset_descendants, TermInfo
+from .mptt_info import get_queryset_descendants, update_node_family, TermInfo
 from .. import deferred
 from .. import settings as edw_settings
-from ..signals.mptt import MPTTModelSignalSenderMixin
+from ..signals.mptt import MPTTModelSignalSenderMixin, get_tree_batch
 from ..utils.circular_buffer_in_cache import RingBuffer
+from ..utils.generation_counter_in_cache import GenerationCounter
 from ..utils.hash_helpers import get_unique_slug, hash_unsorted_list
 from ..utils.set_helpers import uniq
 
 
+_decompress_memo = threading.local()
+
+
 # ==============================================================================
 # make_path
 # ==============================================================================
@@ -245,6 +251,8 @@ class BaseTerm(with_metaclass(BaseTermMetaclass, AndRuleFilterMixin, OrRuleFilte
 
     SELECT_RELATED_CACHE_KEY_PATTERN = '{fields}:sr'
 
+    GENERATION_CACHE_KEY = 't_gen'
+
     ATTRIBUTE_ANCESTORS_BUFFER_CACHE_KEY = 't_a_anc_bf'
     ATTRIBUTE_ANCESTORS_BUFFER_CACHE_SIZE = edw_settings.CACHE_BUFFERS_SIZES['term_attribute_ancestors']
     ATTRIBUTE_FILTER_CACHE_KEY_PATTERN = '{mode}:atf'
@@ -420,25 +428,25 @@ class BaseTerm(with_metaclass(BaseTermMetaclass, AndRuleFilterMixin, OrRuleFilte
             if not origin or origin.view_class != self.view_class:
                 self.view_class = ' '.join([x.lower() for x in self.view_class.split()]) if self.view_class else None
             self._make_path(ancestors + [self, ])
-            try:
-                with transaction.atomic():
-                    result = super(BaseTerm, self).save(*args, **kwargs)
-            except IntegrityError as e:
-                if model_class._default_manager.exclude(pk=self.pk).filter(path=self.path).exists():
-                    if do_correct_term_unique_error:
-                        self.slug = get_unique_slug(self.slug, self.id)
-                        self._make_path(ancestors + [self, ])
+            # сохранение и распространение активности выполняются в одной транзакции
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
                         result = super(BaseTerm, self).save(*args, **kwargs)
+                except IntegrityError as e:
+                    if model_class._default_manager.exclude(pk=self.pk).filter(path=self.path).exists():
+                        if do_correct_term_unique_error:
+                            self.slug = get_unique_slug(self.slug, self.id)
+                            self._make_path(ancestors + [self, ])
+                            result = super(BaseTerm, self).save(*args, **kwargs)
+                        else:
+                            raise TermUniqueError(e)
                     else:
-                        raise TermUniqueError(e)
-                else:
-                    raise e
-            if not origin or origin.active != self.active:
-                if self.active:
-                    update_id_list = list(self.get_family().values_list('id', flat=True))
-                else:
-                    update_id_list = list(self.get_descendants(include_self=False).values_list('id', flat=True))
-                model_class._default_manager.filter(id__in=update_id_list).update(active=self.active)
+                        raise e
+                if (not origin or origin.active != self.active) and get_tree_batch() is None:
+                    # активация распространяется на предков и потомков, деактивация только на потомков,
+                    # в `tree_batch` после перестроения дерева
+                    update_node_family(self, ancestors=self.active, descendants=True, active=self.active)
         else:
             result = super(BaseTerm, self).save(*args, **kwargs)
         return result
@@ -560,6 +568,9 @@ class BaseTerm(with_metaclass(BaseTermMetaclass, AndRuleFilterMixin, OrRuleFilte
             "value_hash": hash_unsorted_list(value) if value else '',
             "fix_it": 'Y' if fix_it else 'N'
         })
+        memo = getattr(_decompress_memo, 'value', None)
+        if memo is not None and key in memo:
+            return memo[key]
         tree = cache.get(key, None)
         if tree is None:
             tree = BaseTerm.decompress(value=value, fix_it=fix_it)
@@ -568,8 +579,27 @@ class BaseTerm(with_metaclass(BaseTermMetaclass, AndRuleFilterMixin, OrRuleFilte
             old_key = buf.record(key)
             if old_key != buf.empty:
                 cache.delete(old_key)
+        if memo is not None:
+            memo[key] = tree
         return tree
 
+    @staticmethod
+    @contextmanager
+    def decompress_memo(memo):
+        """
+        RUS: В пределах контекста результаты `cached_decompress` запоминаются в словаре `memo` и повторно
+        не запрашиваются из кэша. Возвращаемые деревья общие, их нельзя изменять.
+        Usage:
+            with TermModel.decompress_memo(request_memo.setdefault('decompress', {})):
+                ...
+        """
+        prev = getattr(_decompress_memo, 'value', None)
+        _decompress_memo.value = memo
+        try:
+            yield memo
+        finally:
+            _decompress_memo.value = prev
+
     @staticmethod
     def get_children_buffer():
         """
@@ -588,6 +618,20 @@ class BaseTerm(with_metaclass(BaseTermMetaclass, AndRuleFilterMixin, OrRuleFilte
         buf.clear()
         cache.delete_many(keys)
 
+    @staticmethod
+    def get_generation_counter():
+        """
+        RUS: Возвращает счетчик поколений терминов, увеличивается при любом изменении дерева терминов.
+        """
+        return GenerationCounter.factory(BaseTerm.GENERATION_CACHE_KEY)
+
+    @staticmethod
+    def incr_generation():
+        """
+        RUS: Увеличивает счетчик поколений терминов.
+        """
+        return BaseTerm.get_generation_counter().incr()
+
     @staticmethod
     def get_attribute_ancestors_buffer():
         """
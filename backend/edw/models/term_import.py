@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import six
+from django.utils.text import slugify
+
+from .mptt_info import update_node_family
+from .term import TermModel, make_path
+from ..signals.mptt import tree_batch_done
+from ..utils.hash_helpers import get_unique_slug
+
+
+#==============================================================================
+# TermImportError
+#==============================================================================
+class TermImportError(ValueError):
+    """
+    RUS: Ошибка импорта терминов, содержит список ошибок всех записей.
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        super(TermImportError, self).__init__('\n'.join(errors))
+
+
+#==============================================================================
+# bulk_import_terms
+#==============================================================================
+TERM_IMPORT_FIELDS = ('name', 'slug', 'semantic_rule', 'attributes', 'specification_mode', 'view_class',
+                      'description', 'active', 'system_flags')
+
+
+# path of existing parent is used as the first slug of `make_path`
+_ParentPath = namedtuple('_ParentPath', ['slug'])
+
+
+def _flatten(items, parent=None, result=None):
+    """
+    RUS: Разворачивает вложенные `children` в плоский список, ссылка на родителя задается ключом записи.
+    """
+    if result is None:
+        result = []
+    for item in items:
+        item = dict(item)
+        children = item.pop('children', None) or ()
+        if parent is not None:
+            item['parent'] = parent
+        if not item.get('key'):
+            item['key'] = '#{}'.format(len(result))
+        result.append(item)
+        _flatten(children, item['key'], result)
+    return result
+
+
+def bulk_import_terms(items, parent=None, batch_size=500):
+    """
+    RUS: Импортирует лес терминов. Все записи проверяются в памяти, ссылки на родителей и слаги разрешаются
+    до записи в базу, термины создаются `bulk_create` по уровням дерева, поля MPTT вычисляются один раз,
+    кэш сбрасывается одним сигналом `tree_batch_done`.
+    Активность обрабатывается как при сохранении термина: активный термин активирует всех предков, как
+    импортируемых, так и существующих, неактивный термин под активным родителем остается неактивным.
+    :param items: список словарей с полями термина, `key` - ключ записи для ссылок, `parent` - ключ родительской
+    записи или путь (path) существующего термина, `children` - список вложенных записей
+    :param parent: существующий термин, к которому присоединяются записи без родителя
+    :param batch_size: размер пакета `bulk_create`
+    :return: список id созданных терминов
+    """
+    model_class = TermModel.materialized
+    manager = model_class._default_manager
+    items = _flatten(items)
+    errors = []
+
+    by_key = {}
+    for item in items:
+        if item['key'] in by_key:
+            errors.append("Duplicate key `{}`".format(item['key']))
+        by_key[item['key']] = item
+
+    # existing parents are resolved by path with one query
+    external_paths = set([item['parent'] for item in items
+                          if item.get('parent') and item['parent'] not in by_key])
+    existing = dict((x.path, x) for x in manager.filter(path__in=external_paths)) if external_paths else {}
+    for path in external_paths - set(existing.keys()):
+        errors.append("Parent `{}` not found".format(path))
+
+    # build children lists and detect cycles
+    children = {}
+    for item in items:
+        parent_key = item.get('parent')
+        if not parent_key:
+            item['parent'] = parent_key = parent.path if parent is not None else None
+            if parent is not None:
+                existing[parent.path] = parent
+        children.setdefault(parent_key, []).append(item)
+    roots = [key for key in children.keys() if key is None or key not in by_key]
+    levels, visited = [], set()
+    level = [item for key in roots for item in children[key]]
+    while level:
+        levels.append(level)
+        visited.update([item['key'] for item in level])
+        level = [child for item in level for child in children.get(item['key'], [])]
+    for item in items:
+        if item['key'] not in visited:
+            errors.append("Term `{}` is part of parent references cycle".format(item['key']))
+    if errors:
+        raise TermImportError(errors)
+
+    for parent_term in existing.values():
+        if parent_term.system_flags.has_child_restriction:
+            errors.append("Term `{}` has child restriction".format(parent_term.path))
+
+    # build instances, resolve slugs and paths in memory
+    used_paths = set()
+    for level in levels:
+        for item in level:
+            parent_key = item['parent']
+            parent_term = item['parent_term'] = (by_key[parent_key]['term'] if parent_key in by_key
+                                                 else existing.get(parent_key))
+            values = dict((field, item[field]) for field in TERM_IMPORT_FIELDS if item.get(field) not in (None, ''))
+            term = item['term'] = model_class(**values)
+            if term.view_class:
+                term.view_class = ' '.join([x.lower() for x in term.view_class.split()])
+            if not term.slug:
+                term.slug = slugify(six.text_type(term.name or ''))
+            term.tree_id = term.lft = term.rght = term.level = 0
+            try:
+                term.clean_fields(exclude=('parent', 'path', 'tree_id', 'lft', 'rght', 'level'))
+            except ValidationError as e:
+                errors.append("Term `{}`: {}".format(item['key'], '; '.join(
+                    ['{}: {}'.format(k, ' '.join(v)) for k, v in e.message_dict.items()])))
+                continue
+            ancestors = [_ParentPath(parent_term.path)] if parent_term is not None else []
+            make_path(term, ancestors + [term])
+            if term.path in used_paths:
+                term.slug = get_unique_slug(term.slug)
+                make_path(term, ancestors + [term])
+            used_paths.add(term.path)
+    if errors:
+        raise TermImportError(errors)
+
+    # как при сохранении термина активный термин активирует предков
+    activated = {}
+    for level in reversed(levels):
+        for item in level:
+            parent_term = item['parent_term']
+            if item['term'].active and parent_term is not None and not parent_term.active:
+                if item['parent'] in by_key:
+                    parent_term.active = True
+                else:
+                    activated[parent_term.id] = parent_term
+
+    collisions = set()
+    paths = list(used_paths)
+    for i in range(0, len(paths), batch_size):
+        collisions.update(manager.filter(path__in=paths[i:i + batch_size]).values_list('path', flat=True))
+    if collisions:
+        raise TermImportError(["Term `{}` already exists".format(path) for path in sorted(collisions)])
+
+    # MPTT fields: new trees are numbered after existing ones, subtrees of existing terms are placed after the
+    # parent's right bound and fixed with a single `rebuild2` of parents trees
+    next_tree_id = (manager.aggregate(max_tree_id=Max('tree_id'))['max_tree_id'] or 0) + 1
+    attached_tree_ids, offsets = set(), {}
+    for key in roots:
+        parent_term = existing.get(key)
+        for item in children[key]:
+            if parent_term is None:
+                tree_id, counter, level_offset = next_tree_id, 1, 0
+                next_tree_id += 1
+            else:
+                tree_id, level_offset = parent_term.tree_id, parent_term.level + 1
+                counter = offsets.get(parent_term.id, parent_term.rght + 1)
+                attached_tree_ids.add(parent_term.tree_id)
+            stack = [(item, iter(children.get(item['key'], [])))]
+            item['term'].tree_id, item['term'].lft, item['term'].level = tree_id, counter, level_offset
+            while stack:
+                node, it = stack[-1]
+                child = next(it, None)
+                counter += 1
+                if child is None:
+                    node['term'].rght = counter
+                    stack.pop()
+                else:
+                    child['term'].tree_id, child['term'].lft = tree_id, counter
+                    child['term'].level = level_offset + len(stack)
+                    stack.append((child, iter(children.get(child['key'], []))))
+            if parent_term is not None:
+                offsets[parent_term.id] = counter + 1
+
+    ids, roots_ids = [], []
+    with transaction.atomic():
+        for level in levels:
+            terms = [item['term'] for item in level]
+            for item in level:
+                item['term'].parent_id = item['parent_term'].id if item['parent_term'] is not None else None
+            manager.bulk_create(terms, batch_size=batch_size)
+            level_paths = [term.path for term in terms]
+            path_ids = {}
+            for i in range(0, len(level_paths), batch_size):
+                path_ids.update(manager.filter(path__in=level_paths[i:i + batch_size]).values_list('path', 'id'))
+            for term in terms:
+                term.id = term.pk = path_ids[term.path]
+                ids.append(term.id)
+            roots_ids.extend([item['term'].id for item in level if item['parent'] not in by_key])
+        if attached_tree_ids:
+            manager.rebuild2(tree_ids=attached_tree_ids)
+        if activated:
+            # поля MPTT существующих родителей изменены перестроением деревьев
+            manager.filter(id__in=list(activated.keys())).update(active=True)
+            for parent_term in manager.filter(id__in=list(activated.keys())):
+                update_node_family(parent_term, ancestors=True, descendants=False, active=True)
+    # descendants of imported subtrees roots are invalidated by handlers, roots are new nodes,
+    # so children of their ancestors are invalidated too
+    tree_batch_done.send(sender=model_class, ids=set(roots_ids),
+                         parent_ids=set([term.id for term in existing.values()]), originals={})
+    return ids
@@ -20,6 +20,7 @@ from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 from rest_framework.filters import OrderingFilter, BaseFilterBackend
 
+from edw import settings as edw_settings
 from edw.rest.filters.common import template_render
 from edw.models.data_mart import DataMartModel
 from edw.models.entity import BaseEntity, EntityModel
@@ -148,6 +149,10 @@ class EntityFilter(BaseEntityFilter):
     active = MethodFilter(label=_("Active"))
     subj = MethodFilter(widget=CSVWidget(), label=_("Subjects"))
     rel = MethodFilter(widget=CSVWidget(), label=_("Relations"))
+    # Пример: bbox=37.3,55.5,37.9,56.0 (min_longitude, min_latitude, max_longitude, max_latitude)
+    bbox = MethodFilter(widget=CSVWidget(), label=_("Bounding box"))
+    # Пример: near=55.75,37.61,10 (latitude, longitude, k)
+    near = MethodFilter(widget=CSVWidget(), label=_("Nearest"))
     # Пример: created_at=2019-10-10T00:00:00Z
     created_at = filters.IsoDateTimeFilter(name='created_at', lookup_expr='exact', label=_format_label(
         _FIELDS_LABELS['created_at'], _COMPARISONS_LABELS['exact']))
@@ -372,6 +377,43 @@ class EntityFilter(BaseEntityFilter):
             return queryset.rel(*self.rel_ids)
 
 
+    @cached_property
+    @get_from_underscore_or_data('bbox', None, parse_query)
+    def bbox_value(self, value):
+        """
+        :return: `bbox` value parse from `self._bbox_value` or `self.data['bbox']`, default: None
+        """
+        bbox = serializers.ListField(child=serializers.FloatField()).to_internal_value(value)
+        if len(bbox) != 4:
+            raise serializers.ValidationError(
+                _("Bounding box must contain `min_longitude, min_latitude, max_longitude, max_latitude`"))
+        return bbox
+
+    def filter_bbox(self, name, queryset, value):
+        self._bbox_value = value
+        if self.bbox_value is None:
+            return queryset
+        return queryset.bbox(*self.bbox_value)
+
+    @cached_property
+    @get_from_underscore_or_data('near', None, parse_query)
+    def near_value(self, value):
+        """
+        :return: `near` value parse from `self._near_value` or `self.data['near']`, default: None
+        """
+        near = serializers.ListField(child=serializers.FloatField()).to_internal_value(value)
+        if len(near) != 3 or near[2] < 1:
+            raise serializers.ValidationError(_("Nearest must contain `latitude, longitude, k`"))
+        # `k` не больше максимального размера страницы
+        return near[0], near[1], min(int(near[2]), edw_settings.REST_PAGINATION['entity_max_limit'])
+
+    def filter_near(self, name, queryset, value):
+        self._near_value = value
+        if self.near_value is None:
+            return queryset
+        return queryset.near(*self.near_value)
+
+
 class EntityMetaFilter(BaseFilterBackend):
 
     alike_param = 'alike'
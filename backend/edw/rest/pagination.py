@@ -22,24 +22,66 @@ def _get_count(queryset):
 
 class SetQueryset2NoneIfEmptyPaginationMixin(object):
     """
-    В случаи когда количесто элементов равно нулю, возвращаем пустой список без запроса к БД
+    В случаи когда количесто элементов равно нулю, возвращаем пустой список без запроса к БД.
+    Представление может предоставить количество и страницу объектов методами `get_queryset_count` и
+    `get_queryset_page`, например из предварительной выборки шаблонных тегов.
+    В режиме без подсчета (`skip_count`) выбирается `limit + 1` объектов для определения наличия следующей
+    страницы (`has_next`), количество объектов не вычисляется (`count` равно None)
     """
+    skip_count = False
+    skip_count_query_param = 'skip_count'
+
+    def get_skip_count(self, request):
+        """
+        Режим без подсчета количества объектов, задается параметром запроса `skip_count`
+        """
+        value = request.query_params.get(self.skip_count_query_param, None)
+        if value is None or value == '':
+            return self.skip_count
+        return str(value).lower() in ('1', 'true', 'yes', 'on')
+
     def paginate_queryset(self, queryset, request, view=None):
         self.limit = self.get_limit(request)
         if self.limit is None:
             return None
 
         self.offset = self.get_offset(request)
-        self.count = _get_count(queryset)
         self.request = request
+        get_page = getattr(view, 'get_queryset_page', None)
+
+        self.is_skip_count = self.get_skip_count(request)
+        if self.is_skip_count:
+            self.count = None
+            page = get_page(queryset, self.offset, self.limit + 1) if get_page is not None else list(
+                queryset[self.offset:self.offset + self.limit + 1])
+            self.has_next = len(page) > self.limit
+            return page[:self.limit]
+
+        get_count = getattr(view, 'get_queryset_count', None)
+        self.count = get_count(queryset) if get_count is not None else _get_count(queryset)
+        self.has_next = self.offset + self.limit < self.count
 
         if not self.count:
             return []
 
         if self.count > self.limit and self.template is not None:
             self.display_page_controls = True
+        if get_page is not None:
+            return get_page(queryset, self.offset, self.limit)
         return list(queryset[self.offset:self.offset + self.limit])
 
+    def get_next_link(self):
+        if self.count is None:
+            # skip count mode, next link is built from `has_next`
+            if not self.has_next:
+                return None
+            self.count = self.offset + self.limit + 1
+            try:
+                return super(SetQueryset2NoneIfEmptyPaginationMixin, self).get_next_link()
+            finally:
+                self.count = None
+        return super(SetQueryset2NoneIfEmptyPaginationMixin, self).get_next_link()
+
 
 class EDWLimitOffsetPagination(SetQueryset2NoneIfEmptyPaginationMixin, LimitOffsetPagination):
     """
@@ -56,6 +98,7 @@ class EDWLimitOffsetPagination(SetQueryset2NoneIfEmptyPaginationMixin, LimitOffs
         """
         return Response(OrderedDict([
             ('count', self.count),
+            ('has_next', self.has_next),
             ('limit', self.limit),
             ('offset', self.offset),
             ('next', self.get_next_link()),
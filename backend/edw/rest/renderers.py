@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import decimal
+import uuid
+
+from django.utils import six
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+from django.utils.module_loading import import_string
+
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from edw import settings as edw_settings
+
+
+def _encode_datetime(obj):
+    # the same as `rest_framework.utils.encoders.JSONEncoder`
+    representation = obj.isoformat()
+    if obj.microsecond:
+        representation = representation[:23] + representation[26:]
+    if representation.endswith('+00:00'):
+        representation = representation[:-6] + 'Z'
+    return representation
+
+
+def _encode_date(obj):
+    return obj.isoformat()
+
+
+#==============================================================================
+# FastJSONEncoder
+#==============================================================================
+class FastJSONEncoder(encoders.JSONEncoder):
+    """
+    ENG: JSON encoder with precompiled dispatch of known types by exact type, the result is the same as of
+    DRF encoder. Unknown types are dispatched by MRO once and fall back to DRF encoder.
+    RUS: Кодировщик JSON с таблицей функций кодирования известных типов. Функция для типа определяется
+    один раз, результат совпадает с кодировщиком DRF.
+    """
+    # (base type, encode function), order matters: `datetime` is a subclass of `date`
+    ENCODERS = [
+        (Promise, force_text),
+        (datetime.datetime, _encode_datetime),
+        (datetime.date, _encode_date),
+        (decimal.Decimal, float),
+        (uuid.UUID, six.text_type),
+    ]
+
+    @classmethod
+    def get_dispatch(cls):
+        """
+        RUS: Возвращает таблицу функций кодирования класса, у каждого потомка своя таблица.
+        """
+        dispatch = cls.__dict__.get('_dispatch', None)
+        if dispatch is None:
+            dispatch = cls._dispatch = {}
+        return dispatch
+
+    @classmethod
+    def register(cls, base, fn):
+        """
+        RUS: Регистрирует функцию кодирования типа `base` и его потомков.
+        """
+        cls.ENCODERS = [(base, fn)] + [x for x in cls.ENCODERS if x[0] is not base]
+        # потомки без собственного списка `ENCODERS` используют список класса
+        classes = [cls]
+        while classes:
+            klass = classes.pop()
+            klass.get_dispatch().clear()
+            classes.extend(klass.__subclasses__())
+
+    @classmethod
+    def get_encode_function(cls, type_):
+        dispatch = cls.get_dispatch()
+        fn = dispatch.get(type_, None)
+        if fn is None:
+            for base, base_fn in cls.ENCODERS:
+                if issubclass(type_, base):
+                    fn = base_fn
+                    break
+            else:
+                fn = False
+            dispatch[type_] = fn
+        return fn
+
+    def default(self, obj):
+        fn = self.get_encode_function(type(obj))
+        if fn:
+            return fn(obj)
+        return super(FastJSONEncoder, self).default(obj)
+
+
+#==============================================================================
+# FastJSONRenderer
+#==============================================================================
+class FastJSONRenderer(JSONRenderer):
+    """
+    ENG: JSON renderer producing the same bytes as DRF `JSONRenderer`. Encoders are built once per set of
+    options and reused, known types are dispatched by `FastJSONEncoder` table.
+    RUS: Рендерер JSON, результат совпадает с `JSONRenderer` DRF. Кодировщики создаются один раз для набора
+    параметров и используются повторно.
+    """
+    encoder_class = FastJSONEncoder
+
+    _encoders = {}
+
+    def get_encoder(self, indent, separators):
+        key = (self.encoder_class, indent, separators, self.ensure_ascii)
+        encoder = self._encoders.get(key, None)
+        if encoder is None:
+            encoder = self._encoders[key] = self.encoder_class(
+                indent=indent, ensure_ascii=self.ensure_ascii, separators=separators)
+        return encoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        if indent is None:
+            separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        else:
+            separators = INDENT_SEPARATORS
+
+        ret = self.get_encoder(indent, separators).encode(data)
+
+        # We always fully escape \u2028 and \u2029 to ensure we output JSON
+        # that is a strict javascript subset, see DRF `JSONRenderer`.
+        if isinstance(ret, six.text_type):
+            if not self.ensure_ascii:
+                ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+            return bytes(ret.encode('utf-8'))
+        return ret
+
+
+def get_json_renderer_class():
+    """
+    RUS: Возвращает класс рендерера JSON из настройки ``EDW_REST_JSON_RENDERER``.
+    """
+    return import_string(edw_settings.REST_JSON_RENDERER)
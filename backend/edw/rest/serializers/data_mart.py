@@ -11,14 +11,10 @@ from django.core.exceptions import (
     ImproperlyConfigured
 )
 from django.db import models
-from django.template import TemplateDoesNotExist
-from django.template.loader import select_template
 from django.utils import six
 from django.utils.functional import cached_property
-from django.utils.html import strip_spaces_between_tags
-from django.utils.safestring import mark_safe, SafeText
+from django.utils.safestring import mark_safe
 from django.utils.text import Truncator
-from django.utils.translation import get_language_from_request
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 from rest_framework.fields import empty
@@ -37,9 +33,14 @@ from edw.models.rest import (
     UpdateOrCreateSerializerMixin
 )
 from edw.rest.serializers.decorators import get_from_context_or_request
+from edw.rest.serializers.html_snippet import HTMLSnippetSerializerMixin, HTMLSnippetListSerializerMixin
+from edw.rest.serializers.plain import PlainRepresentationSerializerMixin
 from rest_framework_bulk.serializers import BulkListSerializer, BulkSerializerMixin
 
 
+DATA_MART_TREE_CHILDREN_CONTEXT_KEY = '_data_mart_tree_children'
+
+
 #==============================================================================
 # DataMartDynamicMetaMixin
 #==============================================================================
@@ -79,6 +80,7 @@ class DataMartDynamicMetaMixin(object):
 # DataMartBulkListSerializer
 #==============================================================================
 class DataMartBulkListSerializer(DataMartDynamicMetaMixin,
+                                 HTMLSnippetListSerializerMixin,
                                  CheckPermissionsBulkListSerializerMixin,
                                  DynamicFieldsListSerializerMixin,
                                  DynamicCreateUpdateValidateListSerializerMixin,
@@ -152,8 +154,10 @@ class DataMartValidator(object):
 
 
 class DataMartCommonSerializer(UpdateOrCreateSerializerMixin,
+                               HTMLSnippetSerializerMixin,
                                CheckPermissionsSerializerMixin,
                                BulkSerializerMixin,
+                               PlainRepresentationSerializerMixin,
                                serializers.ModelSerializer):
     """
     A simple serializer to convert the data mart items for rendering.
@@ -203,42 +207,21 @@ class DataMartCommonSerializer(UpdateOrCreateSerializerMixin,
         return super(DataMartCommonSerializer, self).update(instance, validated_data)
 
     HTML_SNIPPET_CACHE_KEY_PATTERN = 'data_mart:{0}|{1}-{2}-{3}-{4}-{5}'
+    HTML_SNIPPET_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['data_mart_html_snippet']
+    HTML_SNIPPET_TEMPLATE_DIR = 'data_marts'
+    HTML_SNIPPET_DEFAULT_MODEL = 'data_mart'
 
-    def render_html(self, data_mart, postfix):
-        """
-        Return a HTML snippet containing a rendered summary for this data mart.
-        Build a template search path with `postfix` distinction.
-        """
-        if not self.label:
-            msg = "The DataMart Serializer must be configured using a `label` field."
-            raise ImproperlyConfigured(msg)
-        app_label = data_mart._meta.app_label.lower()
-        request = self.context['request']
-        cache_key = self.HTML_SNIPPET_CACHE_KEY_PATTERN.format(data_mart.id, app_label, self.label,
-                                                               data_mart.data_mart_model,
-                                                               postfix, get_language_from_request(request))
-        content = cache.get(cache_key)
-        if content:
-            return mark_safe(content)
-        params = [
-            (app_label, self.label, data_mart.data_mart_model, postfix),
-            (app_label, self.label, 'data_mart', postfix),
-            ('edw', self.label, 'data_mart', postfix),
-        ]
-        try:
-            template = select_template(['{0}/data_marts/{1}-{2}-{3}.html'.format(*p) for p in params])
-        except TemplateDoesNotExist:
-            return SafeText("<!-- no such template: `{0}/data_marts/{1}-{2}-{3}.html` -->".format(*params[0]))
+    def get_html_snippet_model(self, data_mart):
+        return data_mart.data_mart_model
+
+    def get_html_snippet_context(self, data_mart):
         # when rendering emails, we require an absolute URI, so that media can be accessed from
         # the mail client
-        absolute_base_uri = request.build_absolute_uri('/').rstrip('/')
-        context = {
+        absolute_base_uri = self.context['request'].build_absolute_uri('/').rstrip('/')
+        return {
             'data_mart': data_mart,
             'ABSOLUTE_BASE_URI': absolute_base_uri
         }
-        content = strip_spaces_between_tags(template.render(context, request).strip())
-        cache.set(cache_key, content, edw_settings.CACHE_DURATIONS['data_mart_html_snippet'])
-        return mark_safe(content)
 
     def get_data_mart_url(self, instance):
         return instance.get_absolute_url(request=self.context.get('request'), format=self.context.get('format'))
@@ -454,6 +437,12 @@ class _DataMartFilterMixin(object):
         else:
             return list(data)
 
+    def prefetch_descendants(self, data_marts):
+        """
+        Hook for loading descendants of `data_marts` before serialization
+        """
+        pass
+
     def to_representation(self, data):
         max_depth = self.max_depth
         next_depth = self.depth + 1
@@ -461,6 +450,7 @@ class _DataMartFilterMixin(object):
             data_marts = []
         else:
             data_marts = self.prepare_data(self.active_only_filter(data))
+            self.prefetch_descendants(data_marts)
             for data_mart in data_marts:
                 data_mart._depth = next_depth
         return super(_DataMartFilterMixin, self).to_representation(data_marts)
@@ -474,6 +464,13 @@ class DataMartTreeListField(_DataMartFilterMixin, serializers.ListField):
     def depth(self):
         return self.parent._depth
 
+    def prepare_data(self, data):
+        # use children materialized by root serializer, see `_DataMartTreeRootSerializer.prefetch_descendants`
+        children = self.context.get(DATA_MART_TREE_CHILDREN_CONTEXT_KEY, None)
+        if children is not None:
+            return children.get(self.parent._id, [])[:]
+        return super(DataMartTreeListField, self).prepare_data(data)
+
 
 class _DataMartTreeRootSerializer(_DataMartFilterMixin, serializers.ListSerializer):
     """
@@ -483,6 +480,51 @@ class _DataMartTreeRootSerializer(_DataMartFilterMixin, serializers.ListSerializ
     def depth(self):
         return 0
 
+    def prefetch_descendants(self, data_marts):
+        """
+        Load the whole polymorphic data marts forest to serialize in one query ordered by (`tree_id`, `lft`),
+        respecting `max_depth` and `active_only`, group it by parent and fetch HTML snippets of all nodes at once.
+        """
+        self.context[DATA_MART_TREE_CHILDREN_CONTEXT_KEY] = children = {}
+        if not data_marts:
+            return
+
+        level = data_marts[0].level
+        if data_marts[0].parent_id is None:
+            queryset = DataMartModel.objects.filter(tree_id__in=[data_mart.tree_id for data_mart in data_marts])
+        else:
+            queryset = DataMartModel.objects.filter(tree_id=data_marts[0].tree_id,
+                                                    lft__gt=min([data_mart.lft for data_mart in data_marts]),
+                                                    rght__lt=max([data_mart.rght for data_mart in data_marts]))
+        queryset = queryset.filter(level__gt=level)
+        if self.max_depth is not None:
+            # root data marts have depth `self.depth + 1`
+            queryset = queryset.filter(level__lt=level + self.max_depth - self.depth)
+        if self.is_active_only:
+            queryset = queryset.filter(active=True)
+        # polymorphic queryset downcast instances grouped by content type
+        queryset = queryset.order_by('tree_id', 'lft')
+
+        # only nodes connected with root data marts, parents always precede children
+        materialized_ids = set([data_mart.id for data_mart in data_marts])
+        nodes = data_marts[:]
+        for data_mart in queryset:
+            if data_mart.parent_id in materialized_ids:
+                materialized_ids.add(data_mart.id)
+                children.setdefault(data_mart.parent_id, []).append(data_mart)
+                nodes.append(data_mart)
+
+        self._html_snippets_owner = self.child.prefetch_html_snippets(nodes)
+
+    def to_representation(self, data):
+        self._html_snippets_owner = False
+        try:
+            return super(_DataMartTreeRootSerializer, self).to_representation(data)
+        finally:
+            # write back HTML snippets rendered for the whole tree at once
+            if self._html_snippets_owner:
+                self.child.flush_html_snippets()
+
 
 class DataMartTreeSerializer(DataMartTreeSerializerBase):
     """
@@ -503,5 +545,6 @@ class DataMartTreeSerializer(DataMartTreeSerializerBase):
         """
         Prepare some data for children serialization
         """
+        self._id = data.id
         self._depth = data._depth
         return super(DataMartTreeSerializer, self).to_representation(data)
@@ -15,13 +15,8 @@ from django.db.models.expressions import BaseExpression
 from django.db.models.fields import NOT_PROVIDED
 from django.db.models.fields.related import RelatedField
 from django.db.models.fields.reverse_related import ForeignObjectRel
-from django.template import TemplateDoesNotExist
-from django.template.loader import select_template
 from django.utils import six
 from django.utils.functional import cached_property
-from django.utils.html import strip_spaces_between_tags
-from django.utils.safestring import mark_safe, SafeText
-from django.utils.translation import get_language_from_request
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 from rest_framework.reverse import reverse
@@ -29,7 +24,7 @@ from rest_framework.reverse import reverse
 from edw import settings as edw_settings
 from edw.utils.common import unicode_to_repr
 from edw.models.data_mart import DataMartModel
-from edw.models.entity import EntityModel
+from edw.models.entity import EntityModel, EntitySummaryValues, prefetch_entities_attributes
 from edw.models.related import AdditionalEntityCharacteristicOrMarkModel
 from edw.models.rest import (
     DynamicFieldsSerializerMixin,
@@ -44,11 +39,17 @@ from edw.models.term import TermModel
 from edw.rest.filters.entity import EntityFilter
 from edw.rest.serializers.data_mart import DataMartCommonSerializer, DataMartDetailSerializer
 from edw.rest.serializers.decorators import empty
+from edw.rest.serializers.html_snippet import (
+    HTML_SNIPPETS_CONTEXT_KEY,
+    HTMLSnippetSerializerMixin,
+    HTMLSnippetListSerializerMixin
+)
+from edw.rest.serializers.plain import PlainRepresentationSerializerMixin
 from edw.utils.set_helpers import uniq
 from rest_framework_bulk.serializers import BulkListSerializer, BulkSerializerMixin
 
 
-class AttributeSerializer(serializers.Serializer):
+class AttributeSerializer(PlainRepresentationSerializerMixin, serializers.Serializer):
     """
     A serializer to convert the characteristics and marks for rendering.
     """
@@ -58,7 +59,7 @@ class AttributeSerializer(serializers.Serializer):
     view_class = serializers.ListField(child=serializers.CharField(), read_only=True)
 
 
-class RelationSerializer(serializers.Serializer):
+class RelationSerializer(PlainRepresentationSerializerMixin, serializers.Serializer):
     """
     A serializer to convert the entity relations for rendering.
     """
@@ -141,6 +142,7 @@ class EntityDynamicMetaMixin(object):
 # EntityBulkListSerializer
 #==============================================================================
 class EntityBulkListSerializer(EntityDynamicMetaMixin,
+                               HTMLSnippetListSerializerMixin,
                                CheckPermissionsBulkListSerializerMixin,
                                DynamicFieldsListSerializerMixin,
                                DynamicCreateUpdateValidateListSerializerMixin,
@@ -335,8 +337,10 @@ class EntityValidator(object):
 # EntityCommonSerializer
 #==============================================================================
 class EntityCommonSerializer(UpdateOrCreateSerializerMixin,
+                             HTMLSnippetSerializerMixin,
                              CheckPermissionsSerializerMixin,
                              BulkSerializerMixin,
+                             PlainRepresentationSerializerMixin,
                              serializers.ModelSerializer):
     """
     Common serializer for the Entity model, both for the EntitySummarySerializer and the
@@ -353,44 +357,25 @@ class EntityCommonSerializer(UpdateOrCreateSerializerMixin,
         need_add_lookup_fields_request_methods = True
 
     HTML_SNIPPET_CACHE_KEY_PATTERN = 'entity:{0}|{1}-{2}-{3}-{4}-{5}'
+    HTML_SNIPPET_CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['entity_html_snippet']
+    HTML_SNIPPET_TEMPLATE_DIR = 'entities'
+    HTML_SNIPPET_DEFAULT_MODEL = 'entity'
 
-    def render_html(self, entity, postfix):
-        """
-        Return a HTML snippet containing a rendered summary for this entity.
-        Build a template search path with `postfix` distinction.
-        """
-        if not self.label:
-            msg = "The Entity Serializer must be configured using a `label` field."
-            raise ImproperlyConfigured(msg)
-        app_label = entity._meta.app_label.lower()
-        request = self.context['request']
-        cache_key = self.HTML_SNIPPET_CACHE_KEY_PATTERN.format(entity.id, app_label, self.label, entity.entity_model,
-                                                            postfix, get_language_from_request(request))
-        content = cache.get(cache_key)
-        if content:
-            return mark_safe(content)
-        params = [
-            (app_label, self.label, entity.entity_model, postfix),
-            (app_label, self.label, 'entity', postfix),
-            ('edw', self.label, 'entity', postfix),
-        ]
-        try:
-            template = select_template(['{0}/entities/{1}-{2}-{3}.html'.format(*p) for p in params])
-        except TemplateDoesNotExist:
-            return SafeText("<!-- no such template: `{0}/entities/{1}-{2}-{3}.html` -->".format(*params[0]))
+    def get_html_snippet_model(self, entity):
+        return entity.entity_model
+
+    def get_html_snippet_context(self, entity):
         # when rendering emails, we require an absolute URI, so that media can be accessed from
         # the mail client
-        absolute_base_uri = request.build_absolute_uri('/').rstrip('/')
+        absolute_base_uri = self.context['request'].build_absolute_uri('/').rstrip('/')
         context = {
-            'entity': entity,
+            'entity': entity.instance if isinstance(entity, EntitySummaryValues) else entity,
             'ABSOLUTE_BASE_URI': absolute_base_uri
         }
         data_mart = self.data_mart_from_request
         if data_mart is not None:
             context['data_mart'] = data_mart
-        content = strip_spaces_between_tags(template.render(context, request).strip())
-        cache.set(cache_key, content, edw_settings.CACHE_DURATIONS['entity_html_snippet'])
-        return mark_safe(content)
+        return context
 
     @cached_property
     def group_size_alias(self):
@@ -523,6 +508,15 @@ class EntitySummarySerializerBase(six.with_metaclass(SerializerRegistryMetaclass
 
     extra = serializers.SerializerMethodField()
 
+    # режим `values()`: страница списка выбирается без создания объектов моделей, см. `get_values_page`
+    values_mode = edw_settings.REST_SUMMARY_VALUES
+
+    # поля, значения которых вычисляются строками `EntitySummaryValues`
+    VALUES_MODE_FIELDS = ('id', 'entity_url', 'entity_model', 'entity_type', 'short_characteristics',
+                          'short_marks', 'media', 'extra')
+
+    _values_mode_fields_cache = {}
+
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('label', 'summary')
         # init local cache for calculating attributes
@@ -550,6 +544,78 @@ class EntitySummarySerializerBase(six.with_metaclass(SerializerRegistryMetaclass
         self._group_size = group_size
         return super(EntitySummarySerializerBase, self).to_representation(data)
 
+    @classmethod
+    def get_values_mode_fields(cls, context):
+        """
+        Return attributes and base model columns of fields of the serializer bound in `context` for `values()` mode
+        and flag of characteristics or marks usage, or None if some field requires model instance
+        """
+        # поля сериалайзера списка могут быть дополнены `RESTMeta` модели витрины данных, поэтому проверяются
+        # поля дочернего сериалайзера, созданного в текущем контексте
+        serializer = cls(many=True, context=context)
+        key = (cls, getattr(serializer, 'rest_meta', None))
+        try:
+            return cls._values_mode_fields_cache[key]
+        except KeyError:
+            pass
+        columns_names = set([f.name for f in cls.Meta.model._meta.concrete_fields if not f.is_relation])
+        fields = serializer.child.fields
+        attrs, columns = [], []
+        result = (attrs, columns, 'short_characteristics' in fields or 'short_marks' in fields)
+        for field_name, field in fields.items():
+            if field.write_only or field_name in cls.VALUES_MODE_FIELDS:
+                continue
+            source = field.source
+            if isinstance(field, serializers.SerializerMethodField) or source == '*' or '.' in source:
+                result = None
+                break
+            (columns if source in columns_names else attrs).append(source)
+        cls._values_mode_fields_cache[key] = result
+        return result
+
+    @classmethod
+    def get_values_page(cls, queryset, context):
+        """
+        ENG: Return page of summary rows `EntitySummaryValues` built with `values()` or None if `values()` mode
+        is disabled or not applicable: entities are grouped, annotation is not a query annotation, field requires
+        model instance or entities model of data mart has `RESTMeta` include fields.
+        RUS: Возвращает страницу строк `EntitySummaryValues` для сериализации без объектов моделей.
+        Характеристики и метки всей страницы загружаются несколькими запросами.
+        :param queryset: срез запроса страницы
+        :param context: контекст сериалайзера
+        """
+        if not cls.values_mode or context.get('group_by', None) or not hasattr(queryset, 'summary_values'):
+            return None
+        data_mart = context.get('data_mart', None)
+        if (data_mart.entities_model if data_mart is not None else cls.Meta.model)._rest_meta.include:
+            return None
+        fields = cls.get_values_mode_fields(context)
+        if fields is None:
+            return None
+        attrs, columns, has_attributes = fields
+        annotations = list(queryset.query.annotation_select.keys())
+        annotation_meta = context.get('annotation_meta', None) or {}
+        for key, (alias, field, name) in annotation_meta.items():
+            if key not in annotations and not all([x in annotations for x in (
+                    alias if isinstance(alias, (tuple, list)) else [alias])]):
+                return None
+        page = queryset.summary_values(attrs=attrs, fields=uniq(columns + annotations))
+        if page and has_attributes:
+            prefetch_entities_attributes(page)
+        return page
+
+    def prefetch_html_snippets(self, objs):
+        """
+        Load model instances of summary rows which HTML snippets are missed in cache, one query for each model
+        """
+        need_flush = super(EntitySummarySerializerBase, self).prefetch_html_snippets(objs)
+        snippets = self.context.get(HTML_SNIPPETS_CONTEXT_KEY, None)
+        if snippets is not None:
+            postfixes = [postfix for postfix in self.HTML_SNIPPET_POSTFIXES if postfix in self.fields]
+            EntitySummaryValues.load_instances([obj for obj in objs if isinstance(obj, EntitySummaryValues) and not all(
+                [snippets.get(self.get_html_snippet_cache_key(obj, postfix), None) for postfix in postfixes])])
+        return need_flush
+
     @cached_property
     def group_by(self):
         return self.context.get('group_by', [])
@@ -904,7 +970,7 @@ class EntityDetailSerializer(EntityDetailSerializerBase):
         return self.render_html(entity, 'media')
 
 
-class EntitySummaryMetadataSerializer(serializers.Serializer):
+class EntitySummaryMetadataSerializer(PlainRepresentationSerializerMixin, serializers.Serializer):
     data_mart = serializers.SerializerMethodField()
     terms_ids = serializers.SerializerMethodField()
     subj_ids = serializers.SerializerMethodField()
@@ -992,10 +1058,29 @@ class EntitySummaryMetadataSerializer(serializers.Serializer):
             return None
 
 
-class EntityTotalSummarySerializer(serializers.Serializer):
+class EntityTotalSummarySerializer(PlainRepresentationSerializerMixin, serializers.Serializer):
     meta = EntitySummaryMetadataSerializer(source="*")
     objects = EntitySummarySerializer(source="*", many=True)
 
     def __new__(cls, *args, **kwargs):
         kwargs['many'] = False
         return super(EntityTotalSummarySerializer, cls).__new__(cls, *args, **kwargs)
+
+    @classmethod
+    def get_values_page(cls, queryset, context):
+        """
+        Return page of summary rows built with `values()` by entities serializer, see
+        `EntitySummarySerializerBase.get_values_page`
+        """
+        return cls._declared_fields['objects'].child.get_values_page(queryset, context)
+
+
+class EntityClusterSerializer(serializers.Serializer):
+    """
+    Place entities cluster: Morton code cell, count, centroid and sample ids
+    """
+    cell = serializers.IntegerField()
+    count = serializers.IntegerField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    sample_ids = serializers.ListField(child=serializers.IntegerField())
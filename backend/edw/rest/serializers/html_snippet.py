@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.template import TemplateDoesNotExist
+from django.template.loader import select_template
+from django.utils.html import strip_spaces_between_tags
+from django.utils.safestring import mark_safe, SafeText
+from django.utils.translation import get_language_from_request
+from rest_framework.fields import empty
+
+
+HTML_SNIPPETS_CONTEXT_KEY = '_html_snippets'
+
+HTML_SNIPPETS_PENDING_CONTEXT_KEY = '_html_snippets_pending'
+
+
+#==============================================================================
+# HTMLSnippetSerializerMixin
+#==============================================================================
+class HTMLSnippetSerializerMixin(object):
+    """
+    ENG: Render cached HTML snippets of objects. Snippets of the whole page are fetched from cache
+    with one `get_many` request, rendered misses are written back with one `set_many` request,
+    see `HTMLSnippetListSerializerMixin`.
+    RUS: Рендеринг HTML сниппетов объектов с кэшированием.
+    """
+    HTML_SNIPPET_CACHE_KEY_PATTERN = None
+    HTML_SNIPPET_CACHE_TIMEOUT = None
+
+    # templates search path: `<app_label>/<HTML_SNIPPET_TEMPLATE_DIR>/<label>-<model>-<postfix>.html`
+    HTML_SNIPPET_TEMPLATE_DIR = None
+    HTML_SNIPPET_DEFAULT_MODEL = None
+
+    HTML_SNIPPET_POSTFIXES = ('media',)
+
+    # compiled templates by (templates dir, app label, label, model, postfix)
+    _html_snippet_templates_cache = {}
+
+    def get_html_snippet_model(self, obj):
+        """
+        Return object model name used in cache key and templates search path
+        """
+        raise NotImplementedError(
+            '{cls}.get_html_snippet_model() must be implemented.'.format(
+                cls=self.__class__.__name__
+            )
+        )
+
+    def get_html_snippet_context(self, obj):
+        """
+        Return template context for object
+        """
+        raise NotImplementedError(
+            '{cls}.get_html_snippet_context() must be implemented.'.format(
+                cls=self.__class__.__name__
+            )
+        )
+
+    def get_html_snippet_cache_key(self, obj, postfix):
+        """
+        Return a HTML snippet cache key for object
+        """
+        if not self.label:
+            msg = "The `{}` must be configured using a `label` field."
+            raise ImproperlyConfigured(msg.format(self.__class__.__name__))
+        return self.HTML_SNIPPET_CACHE_KEY_PATTERN.format(obj.id, obj._meta.app_label.lower(), self.label,
+                                                          self.get_html_snippet_model(obj), postfix,
+                                                          get_language_from_request(self.context['request']))
+
+    def get_html_snippet_template(self, app_label, model, postfix):
+        """
+        Return memoized compiled template or `None` if template does not exist.
+        With `DEBUG` templates are not memoized, so template changes are applied without restart
+        """
+        key = (self.HTML_SNIPPET_TEMPLATE_DIR, app_label, self.label, model, postfix)
+        if not settings.DEBUG:
+            try:
+                return self._html_snippet_templates_cache[key]
+            except KeyError:
+                pass
+        params = [
+            (app_label, self.label, model, postfix),
+            (app_label, self.label, self.HTML_SNIPPET_DEFAULT_MODEL, postfix),
+            ('edw', self.label, self.HTML_SNIPPET_DEFAULT_MODEL, postfix),
+        ]
+        try:
+            template = select_template(['{0}/{1}/{2}-{3}-{4}.html'.format(
+                p[0], self.HTML_SNIPPET_TEMPLATE_DIR, *p[1:]) for p in params])
+        except TemplateDoesNotExist:
+            template = None
+        if not settings.DEBUG:
+            self._html_snippet_templates_cache[key] = template
+        return template
+
+    def prefetch_html_snippets(self, objs):
+        """
+        Fetch HTML snippets of `objs` from cache with one request, `render_html` use them from context.
+        Return `True` if rendered snippets must be written back by `flush_html_snippets`.
+        """
+        postfixes = [postfix for postfix in self.HTML_SNIPPET_POSTFIXES if postfix in self.fields]
+        if not postfixes or 'request' not in self.context:
+            return False
+        keys = [self.get_html_snippet_cache_key(obj, postfix) for obj in objs for postfix in postfixes]
+        heap = cache.get_many(keys)
+        snippets = self.context.setdefault(HTML_SNIPPETS_CONTEXT_KEY, {})
+        for key in keys:
+            snippets[key] = heap.get(key, None)
+        if HTML_SNIPPETS_PENDING_CONTEXT_KEY in self.context:
+            return False
+        self.context[HTML_SNIPPETS_PENDING_CONTEXT_KEY] = {}
+        return True
+
+    def flush_html_snippets(self):
+        """
+        Write rendered HTML snippets to cache, one request for each cache timeout
+        """
+        pending = self.context.pop(HTML_SNIPPETS_PENDING_CONTEXT_KEY, None)
+        if pending:
+            for timeout, data in pending.items():
+                cache.set_many(data, timeout)
+
+    def render_html(self, obj, postfix):
+        """
+        Return a HTML snippet containing a rendered summary for this object.
+        Build a template search path with `postfix` distinction.
+        """
+        cache_key = self.get_html_snippet_cache_key(obj, postfix)
+        content = self.context.get(HTML_SNIPPETS_CONTEXT_KEY, {}).get(cache_key, empty)
+        if content == empty:
+            content = cache.get(cache_key)
+        if content:
+            return mark_safe(content)
+        app_label = obj._meta.app_label.lower()
+        model = self.get_html_snippet_model(obj)
+        template = self.get_html_snippet_template(app_label, model, postfix)
+        if template is None:
+            return SafeText("<!-- no such template: `{0}/{1}/{2}-{3}-{4}.html` -->".format(
+                app_label, self.HTML_SNIPPET_TEMPLATE_DIR, self.label, model, postfix))
+        request = self.context['request']
+        content = strip_spaces_between_tags(template.render(self.get_html_snippet_context(obj), request).strip())
+        pending = self.context.get(HTML_SNIPPETS_PENDING_CONTEXT_KEY, None)
+        if pending is not None:
+            pending.setdefault(self.HTML_SNIPPET_CACHE_TIMEOUT, {})[cache_key] = content
+        else:
+            cache.set(cache_key, content, self.HTML_SNIPPET_CACHE_TIMEOUT)
+        return mark_safe(content)
+
+
+#==============================================================================
+# HTMLSnippetListSerializerMixin
+#==============================================================================
+class HTMLSnippetListSerializerMixin(object):
+    """
+    ENG: Prefetch HTML snippets of the whole page before serialization and write back rendered ones after.
+    RUS: Загружает HTML сниппеты всей страницы перед сериализацией и сохраняет отрендеренные после.
+    """
+    def to_representation(self, data):
+        child = self.child
+        if not isinstance(child, HTMLSnippetSerializerMixin):
+            return super(HTMLSnippetListSerializerMixin, self).to_representation(data)
+        data = list(data.all() if isinstance(data, models.Manager) else data)
+        need_flush = child.prefetch_html_snippets(data)
+        try:
+            return super(HTMLSnippetListSerializerMixin, self).to_representation(data)
+        finally:
+            if need_flush:
+                child.flush_html_snippets()
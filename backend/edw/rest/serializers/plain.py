@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+from edw import settings as edw_settings
+
+
+#==============================================================================
+# PlainRepresentationSerializerMixin
+#==============================================================================
+class PlainRepresentationSerializerMixin(object):
+    """
+    ENG: Serializer mixin building representation as plain `dict` instead of `OrderedDict`, so nested data is
+    encoded by C JSON encoder without calls of pure python `OrderedDict` methods. Fields order is kept by
+    `dict` on Python 3.7+ only, see ``EDW_REST_PLAIN_REPRESENTATION``.
+    RUS: Миксин сериалайзера, формирующий представление обычным словарем `dict` вместо `OrderedDict`.
+    """
+    plain_representation = edw_settings.REST_PLAIN_REPRESENTATION
+
+    def to_representation(self, instance):
+        """
+        RUS: Повторяет `Serializer.to_representation` DRF, результат - обычный словарь.
+        """
+        if not self.plain_representation:
+            return super(PlainRepresentationSerializerMixin, self).to_representation(instance)
+        ret = {}
+        for field in self._readable_fields:
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            ret[field.field_name] = None if check_for_none is None else field.to_representation(attribute)
+        return ret
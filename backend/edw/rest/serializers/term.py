@@ -7,6 +7,7 @@ from django.core.exceptions import (
     ObjectDoesNotExist,
     MultipleObjectsReturned
 )
+from django.db.models import Q
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from django.utils.text import Truncator
@@ -25,11 +26,15 @@ from edw.models.rest import (
 )
 from edw.models.term import TermModel
 from edw.rest.serializers.decorators import get_from_context_or_request, get_from_context
+from edw.rest.serializers.plain import PlainRepresentationSerializerMixin
 from edw.views.generics import get_object_or_404
 
 from rest_framework_bulk.serializers import BulkListSerializer, BulkSerializerMixin
 
 
+TERM_TREE_CHILDREN_CONTEXT_KEY = '_term_tree_children'
+
+
 #==============================================================================
 # TermBulkListSerializer
 #==============================================================================
@@ -107,6 +112,7 @@ class TermValidator(object):
 class TermSerializer(UpdateOrCreateSerializerMixin,
                      BasePermissionsSerializerMixin,
                      BulkSerializerMixin,
+                     PlainRepresentationSerializerMixin,
                      serializers.ModelSerializer):
     """
     A simple serializer to convert the terms data for rendering.
@@ -270,6 +276,12 @@ class _TermsFilterMixin(object):
         else:
             return list(data)
 
+    def prefetch_descendants(self, terms, selected_terms):
+        """
+        Hook for loading descendants of `terms` before serialization
+        """
+        pass
+
     def to_representation(self, data):
         next_depth = self.depth + 1
         if self.max_depth is not None and next_depth > self.max_depth:
@@ -278,6 +290,7 @@ class _TermsFilterMixin(object):
             selected_terms = self.get_selected_terms()
             if self.is_expanded_specification or selected_terms is not None:
                 terms = self.prepare_data(self.active_only_filter(data))
+                self.prefetch_descendants(terms, selected_terms)
                 for term in terms:
                     term._depth = next_depth
                     try:
@@ -293,6 +306,13 @@ class TermTreeListField(_TermsFilterMixin, serializers.ListField):
     """
     TermTreeListField
     """
+    def prepare_data(self, data):
+        # use children materialized by root serializer, see `_TermTreeRootSerializer.prefetch_descendants`
+        children = self.context.get(TERM_TREE_CHILDREN_CONTEXT_KEY, None)
+        if children is not None:
+            return children.get(self.parent._id, [])[:]
+        return super(TermTreeListField, self).prepare_data(data)
+
     def get_selected_terms(self):
         term_info = self.parent._selected_term_info
         return None if term_info is None else term_info.get_children_dict()
@@ -348,6 +368,48 @@ class _TermTreeRootSerializer(_TermsFilterMixin, serializers.ListSerializer):
     def is_expanded_specification(self):
         return True
 
+    def prefetch_descendants(self, terms, selected_terms):
+        """
+        Load all terms of the tree to serialize in one query ordered by (`tree_id`, `lft`), respecting
+        `max_depth`, `active_only` and selected terms, and group them by parent.
+        Only children of expanded specification terms or selected terms are loaded, the same as for
+        recursive serialization.
+        """
+        self.context[TERM_TREE_CHILDREN_CONTEXT_KEY] = children = {}
+        if not terms:
+            return
+
+        selected_ids = []
+        if selected_terms:
+            for pk, term_info in selected_terms.items():
+                selected_ids.append(pk)
+                selected_ids.extend(term_info.get_descendants_ids())
+
+        level = terms[0].level
+        if terms[0].parent_id is None:
+            queryset = TermModel.objects.filter(tree_id__in=[term.tree_id for term in terms])
+        else:
+            queryset = TermModel.objects.filter(tree_id=terms[0].tree_id,
+                                                lft__gt=min([term.lft for term in terms]),
+                                                rght__lt=max([term.rght for term in terms]))
+        queryset = queryset.filter(level__gt=level)
+        if self.max_depth is not None:
+            # root terms have depth `self.depth + 1`
+            queryset = queryset.filter(level__lt=level + self.max_depth - self.depth)
+        if self.is_active_only:
+            queryset = queryset.filter(active=True)
+        parent_filter = Q(parent__specification_mode=TermModel.EXPANDED_SPECIFICATION)
+        if selected_ids:
+            parent_filter |= Q(parent_id__in=selected_ids)
+        queryset = queryset.filter(parent_filter).order_by('tree_id', 'lft')
+
+        # only nodes connected with root terms, parents always precede children
+        materialized_ids = set([term.id for term in terms])
+        for term in queryset:
+            if term.parent_id in materialized_ids:
+                materialized_ids.add(term.id)
+                children.setdefault(term.parent_id, []).append(term)
+
     @cached_property
     @get_from_context_or_request('fix_it', None)
     def fix_it(self, value):
@@ -413,6 +475,7 @@ class TermTreeSerializer(TermSerializer):
         """
         Prepare some data for children serialization
         """
+        self._id = data.id
         self._depth = data._depth
         self._selected_term_info = data._selected_term_info
         self._is_expanded_specification = data.specification_mode == TermModel.EXPANDED_SPECIFICATION
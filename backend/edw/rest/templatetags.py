@@ -2,9 +2,14 @@
 from __future__ import unicode_literals
 
 from django.utils.functional import cached_property
+from django.db import connections
 from django.db.models.query import QuerySet
 from django.http import QueryDict
 from django.conf import settings
+try:
+    from django.core.exceptions import EmptyResultSet
+except ImportError:
+    from django.db.models.sql.datastructures import EmptyResultSet
 
 from classytags.core import Tag
 
@@ -13,7 +18,11 @@ from rest_framework.request import Empty, ForcedAuthentication
 from rest_framework import exceptions
 from rest_framework.generics import get_object_or_404
 from rest_framework.settings import api_settings
-from rest_framework.renderers import JSONRenderer
+
+from edw.models.data_mart import DataMartModel
+from edw.models.term import TermModel
+from edw.rest.filters.entity import BaseEntityFilter
+from edw.rest.renderers import get_json_renderer_class
 
 
 def _get_count(queryset):
@@ -27,6 +36,76 @@ def _get_count(queryset):
         return len(queryset)
 
 
+def get_render_memo(request):
+    """
+    ENG: Request scoped memo shared by all template tags of the render.
+    RUS: Общий для всех тегов шаблона словарь запроса, хранит результаты проверки разрешений, витрины данных,
+    распакованные деревья терминов, результаты фильтрации, количества и страницы объектов.
+    """
+    memo = getattr(request, '_edw_render_memo', None)
+    if memo is None:
+        memo = request._edw_render_memo = {}
+    return memo
+
+
+def get_queryset_key(queryset):
+    """
+    RUS: Возвращает ключ запроса к базе данных по его SQL или None, если запрос не может быть выполнен.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except (AttributeError, EmptyResultSet):
+        return None
+    return queryset.db, sql, repr(tuple(params))
+
+
+def prefetch_tags(context, nodes):
+    """
+    RUS: Фаза предварительной выборки для тегов списков: выполняет фильтрацию всех тегов, затем подсчитывает
+    количество объектов всех запросов одним SQL запросом на базу данных (кроме тегов в режиме `skip_count`)
+    и выбирает страницы объектов.
+    Результаты сохраняются в памяти запроса и используются тегами при отрисовке.
+    Теги, параметры которых не удалось вычислить в текущем контексте (например, переменные цикла),
+    пропускаются и выполняются обычным образом.
+    """
+    request = context.get('request', None)
+    if request is None:
+        return
+    memo = get_render_memo(request)
+    counts = memo.setdefault('counts', {})
+    pages = memo.setdefault('pages', {})
+
+    items = []
+    with TermModel.decompress_memo(memo.setdefault('decompress', {})):
+        for node in nodes:
+            try:
+                prefetched = node.prefetch(context)
+            except Exception:
+                continue
+            if prefetched is not None:
+                items.append(prefetched + (get_queryset_key(prefetched[0]),))
+
+    querysets = {}
+    for queryset, offset, limit, count_required, key in items:
+        if count_required and key is not None and key not in counts:
+            querysets.setdefault(key[0], {})[key] = queryset
+    for using, keyed in querysets.items():
+        keys = list(keyed.keys())
+        sql, params = [], []
+        for i, key in enumerate(keys):
+            query_sql, query_params = keyed[key].query.sql_with_params()
+            sql.append('(SELECT COUNT(*) FROM ({}) _edw_c{})'.format(query_sql, i))
+            params.extend(query_params)
+        with connections[using].cursor() as cursor:
+            cursor.execute('SELECT {}'.format(', '.join(sql)), params)
+            counts.update(zip(keys, cursor.fetchone()))
+
+    for queryset, offset, limit, count_required, key in items:
+        if key is not None and (key, offset, limit) not in pages:
+            pages[(key, offset, limit)] = list(queryset[offset:offset + limit]) if (
+                not count_required or counts[key]) else []
+
+
 class Request(request.Request):
 
     def __init__(self, request, query_params=None, parsers=None, authenticators=None,
@@ -124,12 +203,39 @@ class BaseRetrieveDataTag(Tag):
         if not permissions:
             permissions = self.get_permissions()
 
+        # результаты проверок запоминаются на время запроса
+        results = self.memo.setdefault('permissions', {})
         for permission in permissions:
-            if not permission.has_object_permission(request, self, obj):
+            key = (permission.__class__, obj.__class__, obj.pk, self.action)
+            if key not in results:
+                results[key] = permission.has_object_permission(request, self, obj)
+            if not results[key]:
                 self.permission_denied(
                     request, message=getattr(permission, 'message', None)
                 )
 
+    @property
+    def memo(self):
+        """
+        RUS: Общий для тегов шаблона словарь текущего запроса.
+        """
+        return get_render_memo(self.request._request)
+
+    def get_data_mart(self, value):
+        """
+        RUS: Возвращает активную витрину данных по id или слагу, витрины запоминаются на время запроса.
+        """
+        data_marts = self.memo.setdefault('data_marts', {})
+        if value not in data_marts:
+            key = 'pk'
+            # it was a string, not an int. Try find object by `slug`
+            try:
+                int(value)
+            except ValueError:
+                key = 'slug'
+            data_marts[value] = get_object_or_404(DataMartModel.objects.active(), **{key: value})
+        return data_marts[value]
+
     def initialize(self, origin_request, tag_kwargs):
         """
         Преобразует параметры  запросов внутренних тегов html шаблонов в запросы к REST интерфейсу
@@ -165,13 +271,26 @@ class BaseRetrieveDataTag(Tag):
 
         self.request = request
 
-    def render(self, context):
+        data_mart_pk = request.query_params.get('data_mart_pk', None)
+        if data_mart_pk not in (None, '') and issubclass(getattr(self, 'filter_class', None) or object,
+                                                        BaseEntityFilter):
+            # витрина данных передается фильтру уже найденной
+            request.query_params['_data_mart'] = self.get_data_mart(data_mart_pk)
+
+    def resolve_kwargs(self, context):
         """
-        Render template tag
+        Resolve tag arguments in context
         """
         items = self.kwargs.items()
         kwargs = dict([(key, value.resolve(context)) for key, value in items])
         kwargs.update(self.blocks)
+        return kwargs
+
+    def render(self, context):
+        """
+        Render template tag
+        """
+        kwargs = self.resolve_kwargs(context)
 
         request = context.get('request', None)
         assert request is not None, (
@@ -180,7 +299,26 @@ class BaseRetrieveDataTag(Tag):
         )
         self.initialize(request, kwargs)
 
-        return self.render_tag(context, **kwargs)
+        with TermModel.decompress_memo(self.memo.setdefault('decompress', {})):
+            return self.render_tag(context, **kwargs)
+
+    def prefetch(self, context):
+        """
+        Prefetch phase of list tag, see `prefetch_tags`.
+        RUS: Выполняет фильтрацию (результат запоминается) и возвращает кортеж
+        (запрос, смещение, лимит, необходимость подсчета количества) или None,
+        если тег не является списком с постраничным выводом.
+        """
+        if self.action != 'list' or self.paginator is None:
+            return None
+        self.initialize(context['request'], self.resolve_kwargs(context))
+        queryset = self.filter_queryset(self.get_queryset())
+        limit = self.paginator.get_limit(self.request)
+        if limit is None or not isinstance(queryset, QuerySet):
+            return None
+        skip_count = getattr(self.paginator, 'get_skip_count', lambda request: False)(self.request)
+        # в режиме без подсчета выбирается на один объект больше
+        return queryset, self.paginator.get_offset(self.request), limit + 1 if skip_count else limit, not skip_count
 
     def get_queryset(self):
         """
@@ -242,9 +380,50 @@ class BaseRetrieveDataTag(Tag):
         ENG: Given a queryset, filter it with whichever filter backend is in use.
         RUS: Возвращает объект запроса с установленным фильтром DjangoFilterBackend.
         """
+        # одинаковые запросы тегов фильтруются один раз за запрос,
+        # вместе с результатом запоминаются параметры и атрибуты, установленные фильтрами
+        query_params = self.request.query_params
+        key = (self.__class__, repr(sorted(query_params.lists())))
+        filtered = self.memo.setdefault('filtered', {})
+        if key in filtered:
+            queryset, params, attrs = filtered[key]
+            for k, v in params.items():
+                query_params.setlist(k, v)
+            for k, v in attrs.items():
+                setattr(self, k, v)
+            return queryset._clone() if isinstance(queryset, QuerySet) else queryset
+
+        origin_params = dict((k, list(v)) for k, v in query_params.lists())
+        origin_attrs = dict(self.__dict__)
         for backend in list(self.filter_backends):
             queryset = backend().filter_queryset(self.request, queryset, self)
-        return queryset
+
+        params = dict((k, list(v)) for k, v in query_params.lists() if k not in origin_params or len(
+            origin_params[k]) != len(v) or any(a is not b for a, b in zip(origin_params[k], v)))
+        attrs = dict((k, v) for k, v in self.__dict__.items() if k != 'request' and origin_attrs.get(k) is not v)
+        filtered[key] = (queryset, params, attrs)
+        return queryset._clone() if isinstance(queryset, QuerySet) else queryset
+
+    def get_queryset_count(self, queryset):
+        """
+        RUS: Количество объектов запроса, одинаковые запросы подсчитываются один раз за запрос.
+        Используется пагинатором.
+        """
+        key = get_queryset_key(queryset)
+        if key is None:
+            return _get_count(queryset)
+        counts = self.memo.setdefault('counts', {})
+        if key not in counts:
+            counts[key] = _get_count(queryset)
+        return counts[key]
+
+    def get_queryset_page(self, queryset, offset, limit):
+        """
+        RUS: Страница объектов запроса, при наличии берется из предварительной выборки.
+        Используется пагинатором.
+        """
+        page = self.memo.setdefault('pages', {}).get((get_queryset_key(queryset), offset, limit), None)
+        return list(page) if page is not None else list(queryset[offset:offset + limit])
 
     def get_object(self):
         """
@@ -287,8 +466,12 @@ class BaseRetrieveDataTag(Tag):
         if self.paginator is None:
             return None
 
-        self._queryset_count = _get_count(queryset)
         page = self.paginator.paginate_queryset(queryset, self.request, view=self)
+        # количество уже подсчитано пагинатором, в режиме без подсчета количество не вычисляется
+        self._skip_count = getattr(self.paginator, 'is_skip_count', False)
+        self._queryset_count = getattr(self.paginator, 'count', None)
+        if self._queryset_count is None and not self._skip_count:
+            self._queryset_count = self.get_queryset_count(queryset)
         self._page_len = len(page)
         return page
 
@@ -299,9 +482,16 @@ class BaseRetrieveDataTag(Tag):
         """
         assert self.paginator is not None
 
+        if self._skip_count:
+            has_next = self.paginator.has_next
+            is_paginated = has_next or bool(self.paginator.offset)
+        else:
+            has_next = getattr(self.paginator, 'has_next', None)
+            is_paginated = self._page_len < self._queryset_count
         return {
             "count": self._queryset_count,
-            "is_paginated": self._page_len < self._queryset_count,
+            "has_next": has_next,
+            "is_paginated": is_paginated,
             "results": data
         }
 
@@ -309,6 +499,6 @@ class BaseRetrieveDataTag(Tag):
         """
         ENG: Renders the request data into JSON, using utf-8 encoding.
         RUS: Возвращает отрендеренные данные запроса JSON, используя кодировку utf-8,
-        с помощью класса JSONRenderer.
+        с помощью класса из настройки ``EDW_REST_JSON_RENDERER``.
         """
-        return JSONRenderer().render(data, renderer_context={'indent': self.indent})
+        return get_json_renderer_class()().render(data, renderer_context={'indent': self.indent})
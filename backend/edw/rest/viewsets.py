@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from functools import wraps
+import hashlib
+from functools import wraps, partial
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.encoding import force_text
+from django.utils.translation import get_language_from_request
+
+from edw import settings as edw_settings
+from edw.utils.generation_counter_in_cache import GenerationCounter
+from edw.utils.hash_helpers import create_hash, get_data_mart_cookie_setting
 
 
 def remove_empty_params_from_request(exclude=None):
@@ -30,6 +40,152 @@ def remove_empty_params_from_request(exclude=None):
     return remove_empty_params_from_request_decorator
 
 
+RESPONSE_CACHE_KEY_PATTERN = 'rsp:{view}:{hash}'
+
+RESPONSE_CACHE_DATA_MART_COOKIE_SETTINGS = ('limit', 'ordering', 'view_component')
+
+
+def get_user_permission_class(user):
+    """
+    ENG: Return user permission class name, the users of one class get the same responses
+    RUS: Возвращает класс полномочий пользователя, пользователи одного класса получают одинаковые ответы
+    """
+    if not user.is_authenticated():
+        return 'anonymous'
+    if not user.is_active:
+        return 'inactive'
+    if user.is_superuser:
+        return 'superuser'
+    if user.is_staff:
+        return 'staff'
+    return 'user'
+
+
+def get_request_fingerprint(view, request):
+    """
+    ENG: Return list of request properties that determines the response: path, action, media type,
+    language, user permission class and normalized query params
+    RUS: Возвращает список свойств запроса, определяющих ответ
+    """
+    query_params = request.GET
+    # ignore private params, like `_data_mart`
+    params = sorted([(k, [force_text(v) for v in query_params.getlist(k)])
+                     for k in query_params.keys() if not k.startswith('_')])
+    return [
+        request.path,
+        view.action,
+        request.accepted_media_type,
+        get_language_from_request(request),
+        get_user_permission_class(request.user),
+        params
+    ]
+
+
+def get_response_cache_key(view, request, models):
+    """
+    ENG: Return response cache key from normalized query params, data mart, user permission class, language,
+    data mart cookie settings and `models` generations
+    RUS: Возвращает ключ кэша ответа
+    """
+    data_mart = request.GET.get('_data_mart', None)
+    if data_mart is not None:
+        data_mart_pk = data_mart.pk
+        cookie_settings = [get_data_mart_cookie_setting(request, setting)
+                           for setting in RESPONSE_CACHE_DATA_MART_COOKIE_SETTINGS]
+    else:
+        data_mart_pk, cookie_settings = None, []
+    generations = GenerationCounter.get_values([model.GENERATION_CACHE_KEY for model in models])
+    raw_key = repr(get_request_fingerprint(view, request) + [data_mart_pk, cookie_settings, generations])
+    return RESPONSE_CACHE_KEY_PATTERN.format(view=view.__class__.__name__.lower(), hash=create_hash(raw_key))
+
+
+def _is_etag_match(etag, if_none_match):
+    for value in if_none_match.split(','):
+        value = value.strip()
+        if value == '*' or value == etag or value[2:] == etag and value.startswith('W/'):
+            return True
+    return False
+
+
+def _set_cached_response(key, response):
+    """
+    RUS: Сохраняет отрендеренный ответ в кэше, вызывается после рендеринга
+    """
+    if response.status_code == 200:
+        content = response.content
+        # keep ETag set by `conditional_response`
+        if not response.has_header('ETag'):
+            response['ETag'] = '"{}"'.format(hashlib.md5(content).hexdigest())
+        etag = response['ETag']
+        cache.set(key, (content, response['Content-Type'], etag), edw_settings.CACHE_DURATIONS['rest_response'])
+
+
+def cache_response(*models):
+    """
+    ENG: Cache rendered response bytes, cache invalidated by `models` generations counters.
+    Support ETag / If-None-Match conditional requests.
+    Enabled by `EDW_REST_RESPONSE_CACHE` setting.
+    RUS: Кэширует отрендеренный ответ, кэш инвалидируется счетчиками поколений моделей `models`.
+    """
+    def cache_response_decorator(func):
+        @wraps(func)
+        def func_wrapper(self, request, *args, **kwargs):
+            options = edw_settings.REST_RESPONSE_CACHE
+            renderer = getattr(request, 'accepted_renderer', None)
+            if (not options['enabled'] or request.method not in ('GET', 'HEAD') or
+                    renderer is None or renderer.format not in options['formats'] or
+                    options['anonymous_only'] and request.user.is_authenticated()):
+                return func(self, request, *args, **kwargs)
+
+            key = get_response_cache_key(self, request, models)
+            cached = cache.get(key, None)
+            if cached is not None:
+                content, content_type, etag = cached
+                if _is_etag_match(etag, request.META.get('HTTP_IF_NONE_MATCH', '')):
+                    response = HttpResponseNotModified()
+                else:
+                    response = HttpResponse(content, content_type=content_type)
+                response['ETag'] = etag
+                return response
+
+            response = func(self, request, *args, **kwargs)
+            if hasattr(response, 'add_post_render_callback'):
+                response.add_post_render_callback(partial(_set_cached_response, key))
+            return response
+        return func_wrapper
+    return cache_response_decorator
+
+
+def conditional_response(*models):
+    """
+    ENG: Support ETag / If-None-Match conditional requests.
+    ETag is calculated from request fingerprint and `models` generations (trees versions) only,
+    so unchanged data return `304 Not Modified` without touching the database.
+    Responses are validated only by ETag: a timestamp doesn't depend on the request fingerprint.
+    RUS: Поддержка условных запросов, ETag вычисляется по запросу и версиям деревьев моделей `models`,
+    неизмененные данные возвращают ответ 304 без обращения к базе данных.
+    """
+    def conditional_response_decorator(func):
+        @wraps(func)
+        def func_wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return func(self, request, *args, **kwargs)
+
+            versions = GenerationCounter.get_values([model.GENERATION_CACHE_KEY for model in models])
+            etag = '"{}"'.format(create_hash(repr(get_request_fingerprint(self, request) + [versions])))
+
+            if _is_etag_match(etag, request.META.get('HTTP_IF_NONE_MATCH', '')):
+                response = HttpResponseNotModified()
+            else:
+                response = func(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            return response
+        return func_wrapper
+    return conditional_response_decorator
+
+
 class CustomSerializerViewSetMixin(object):
     """
     Сериалайзер для запросов
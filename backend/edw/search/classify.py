@@ -2,21 +2,29 @@
 
 import re
 import json
+import math
+from collections import Counter, OrderedDict
 
+from django.core.cache import cache
 from haystack import connections
 from haystack.constants import DOCUMENT_FIELD, DJANGO_CT
 
+from edw import settings as edw_settings
+from edw.utils.hash_helpers import create_hash
 
-def get_more_like_this(like, unlike=None, ignore_like=None, ignore_unlike=None, model=None):
+
+WORD_PATTERN = re.compile(r'\w{3,}', re.UNICODE)
+
+
+def get_more_like_this_payload(like, unlike=None, ignore_like=None, ignore_unlike=None, model=None):
     """
-    Perform `more_like_this` query to find similar model instances.
+    Build `more_like_this` query body.
 
     `model` is like 'particularproblem', 'typicalestablishment', etc.
 
     Common Russian stopwords are already filtered in search backend,
     this list must only contain words specific to the entity model.
     """
-    backend = connections['default'].get_backend()
     fields = [DOCUMENT_FIELD]
     payload = {
         'query': {
@@ -65,8 +73,22 @@ def get_more_like_this(like, unlike=None, ignore_like=None, ignore_unlike=None,
                 }
             }
         ]
+    return payload
+
+
+def get_more_like_this(like, unlike=None, ignore_like=None, ignore_unlike=None, model=None):
+    """
+    Perform `more_like_this` query to find similar model instances.
+    Use `MoreLikeThisClassifier` to classify many texts at once.
+    """
+    backend = connections['default'].get_backend()
+    if hasattr(backend, 'search_many'):
+        # local search backend, result is shaped like Elasticsearch one but without explanation
+        query = dict((k, v) for k, v in (('like', like), ('unlike', unlike), ('ignore_like', ignore_like),
+                                         ('ignore_unlike', ignore_unlike), ('model', model)) if v is not None)
+        return backend.search_many([query], size=10)[0]
     search_result = backend.conn.search(
-        body=payload,
+        body=get_more_like_this_payload(like, unlike, ignore_like, ignore_unlike, model),
         index=backend.index_name,
         doc_type='modelresult',
         explain=True,
@@ -76,10 +98,20 @@ def get_more_like_this(like, unlike=None, ignore_like=None, ignore_unlike=None,
     return search_result
 
 
-def analyze_suggestions(search_result):
+def get_words(text):
+    """
+    Split text to lowercase words
+    """
+    return WORD_PATTERN.findall(text.lower()) if text else []
+
+
+def analyze_suggestions(search_result, like=None):
     """
     Sort and filter `get_more_like_this` suggestions to classify category.
+    Words are taken from explain output if it is present, otherwise they are words of `like`
+    found in the hit document text.
     """
+    like_words = set(get_words(like))
     # Parse search result to get score and words per suggestion
     suggestions = {}
     for hit in search_result['hits']['hits']:
@@ -96,9 +128,12 @@ def analyze_suggestions(search_result):
 
         words = set()
         # формируем список ключевых слов
-        for obj in hit['_explanation']['details']:
-            raw_details = json.dumps(obj, ensure_ascii=False)
-            words.update(set(re.findall(r'"weight\(\w+:(.+?)\s+in', raw_details)))
+        if '_explanation' in hit:
+            for obj in hit['_explanation']['details']:
+                raw_details = json.dumps(obj, ensure_ascii=False)
+                words.update(set(re.findall(r'"weight\(\w+:(.+?)\s+in', raw_details)))
+        else:
+            words.update(like_words.intersection(get_words(hit['_source'].get(DOCUMENT_FIELD, ''))))
 
         # накапливаем результат
         for x in raw_categories:
@@ -112,7 +147,7 @@ def analyze_suggestions(search_result):
                 if foo is None:
                     suggestions[x] = {
                         'category': category,
-                        'words': words,
+                        'words': set(words),
                         'score': score
                     }
                 else:
@@ -138,4 +173,156 @@ def analyze_suggestions(search_result):
     #     print('* words:', x['words'])
     # print('>>>>>>>>>>>>>>>>>>>>')
 
-    return suggestions
\ No newline at end of file
+    return suggestions
+
+
+class ElasticsearchMoreLikeThisBackend(object):
+    """
+    Perform many `more_like_this` queries with one multi-search request.
+    """
+    def __init__(self, using='default'):
+        self.using = using
+
+    def search_many(self, queries, size=10):
+        """
+        Return search results for each query, query is a dictionary of `get_more_like_this_payload` arguments
+        """
+        backend = connections[self.using].get_backend()
+        body = []
+        for query in queries:
+            body.append({'index': backend.index_name, 'type': 'modelresult'})
+            payload = get_more_like_this_payload(**query)
+            payload['size'] = size
+            body.append(payload)
+        results = []
+        for response in backend.conn.msearch(body=body)['responses']:
+            if 'error' in response:
+                # failed query has no hits, the error is kept to skip caching
+                response = {'hits': {'total': 0, 'hits': []}, 'error': response['error']}
+            results.append(response)
+        return results
+
+
+class LocalMoreLikeThisBackend(object):
+    """
+    In-memory `more_like_this` backend with TF-IDF scoring, returns results shaped like Elasticsearch ones.
+    Use in tests and environments without Elasticsearch.
+    """
+    def __init__(self):
+        self.documents = {}
+
+    def add(self, pk, text, categories, model=None):
+        """
+        Add or replace document, `categories` are JSON strings like `EntityIndex.prepare_categories` returns
+        """
+        self.documents[pk] = {
+            'words': Counter(get_words(text)),
+            'source': {
+                DOCUMENT_FIELD: text,
+                'categories': categories,
+                DJANGO_CT: model
+            }
+        }
+
+    def remove(self, pk):
+        self.documents.pop(pk, None)
+
+    def get_scores(self, text, ignore_text=None, model=None):
+        words = set(get_words(text)) - set(get_words(ignore_text))
+        total = len(self.documents)
+        scores = {}
+        for word in words:
+            pks = [pk for pk, doc in self.documents.items() if word in doc['words']]
+            if not pks:
+                continue
+            idf = 1.0 + math.log(float(total) / len(pks))
+            for pk in pks:
+                scores[pk] = scores.get(pk, 0) + math.sqrt(self.documents[pk]['words'][word]) * idf
+        if model:
+            scores = dict((pk, score) for pk, score in scores.items()
+                          if self.documents[pk]['source'][DJANGO_CT] == str(model))
+        return scores
+
+    def search_many(self, queries, size=10):
+        results = []
+        for query in queries:
+            model = query.get('model', None)
+            scores = self.get_scores(query['like'], query.get('ignore_like', None), model)
+            if query.get('unlike', None):
+                excluded = self.get_scores(query['unlike'], query.get('ignore_unlike', None), model)
+                scores = dict((pk, score) for pk, score in scores.items() if pk not in excluded)
+            hits = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:size]
+            results.append({
+                'hits': {
+                    'total': len(scores),
+                    'hits': [{
+                        '_id': pk,
+                        '_score': score,
+                        '_source': self.documents[pk]['source']
+                    } for pk, score in hits]
+                }
+            })
+        return results
+
+
+class MoreLikeThisClassifier(object):
+    """
+    Classify texts by categories of similar documents. Many texts are sent to the backend at once,
+    suggestions are cached by query content hash.
+    Usage: `MoreLikeThisClassifier().classify_many([{'like': text, 'model': model}, ...])`
+    """
+    CACHE_KEY_PATTERN = 'mlt:{hash}:{size}'
+    CACHE_TIMEOUT = edw_settings.CACHE_DURATIONS['search_more_like_this']
+
+    def __init__(self, backend=None, size=10, cache_timeout=None):
+        if backend is None:
+            # local search backend implements `search_many` itself
+            backend = connections['default'].get_backend()
+            if not hasattr(backend, 'search_many'):
+                backend = ElasticsearchMoreLikeThisBackend()
+        self.backend = backend
+        self.size = size
+        if cache_timeout is not None:
+            self.CACHE_TIMEOUT = cache_timeout
+
+    def get_cache_key(self, query):
+        return self.CACHE_KEY_PATTERN.format(
+            hash=create_hash(json.dumps(query, sort_keys=True, ensure_ascii=False)),
+            size=self.size
+        )
+
+    def classify_many(self, queries):
+        """
+        Return list of `analyze_suggestions` results for each query,
+        query is a dictionary of `get_more_like_this_payload` arguments
+        """
+        queries = [dict((k, v) for k, v in query.items() if v is not None) for query in queries]
+        keys = [self.get_cache_key(query) for query in queries]
+        heap = cache.get_many(keys) if self.CACHE_TIMEOUT else {}
+        # запросы отправляются в порядке следования
+        missed = OrderedDict()
+        for key, query in zip(keys, queries):
+            if key not in heap:
+                missed[key] = query
+        if missed:
+            missed_keys = list(missed.keys())
+            search_results = self.backend.search_many([missed[key] for key in missed_keys], size=self.size)
+            data, failed = {}, {}
+            for key, search_result in zip(missed_keys, search_results):
+                suggestions = analyze_suggestions(search_result, missed[key]['like'])
+                if 'error' in search_result:
+                    failed[key] = suggestions
+                else:
+                    data[key] = suggestions
+            if self.CACHE_TIMEOUT and data:
+                cache.set_many(data, self.CACHE_TIMEOUT)
+            heap.update(data)
+            heap.update(failed)
+        return [heap[key] for key in keys]
+
+    def classify(self, like, **kwargs):
+        """
+        Return `analyze_suggestions` result for one text
+        """
+        kwargs['like'] = like
+        return self.classify_many([kwargs])[0]
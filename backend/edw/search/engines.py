@@ -9,8 +9,10 @@ from haystack.backends.elasticsearch5_backend import (
 )
 from haystack.constants import DEFAULT_OPERATOR, FUZZINESS, DOCUMENT_FIELD, DJANGO_CT
 
+from edw.search.mixins import BatchPrepareBackendMixin
 
-class RussianElasticsearchBackend(Elasticsearch5SearchBackend):
+
+class RussianElasticsearchBackend(BatchPrepareBackendMixin, Elasticsearch5SearchBackend):
     # Copy-pasted from https://github.com/django-haystack/django-haystack/blob/193b418f0006df6037a2a4a9029ac3060ccd8d89/haystack/backends/elasticsearch_backend.py
     # and added custom Russian analyzer as default
 
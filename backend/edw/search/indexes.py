@@ -7,12 +7,15 @@ from haystack import indexes
 from haystack.constants import DJANGO_CT
 from haystack.utils import get_model_ct
 
-from edw.models.entity import EntityModel
+from edw.models.data_mart import DataMartModel
+from edw.models.entity import EntityModel, prefetch_entities_attributes
 
 
 class EntityIndex(indexes.SearchIndex):
     """
-    Abstract base class used to index all entities for this edw
+    Abstract base class used to index all entities for this edw.
+    Search backends with `BatchPrepareBackendMixin` call `prepare_batch` for each chunk of entities,
+    so terms, characteristics, marks and data marts of the whole chunk are fetched with a few queries.
     """
     text = indexes.CharField(
         stored=True,
@@ -76,3 +79,59 @@ class EntityIndex(indexes.SearchIndex):
         else:
             self.language = settings.LANGUAGE_CODE
         return self.get_model().objects.active()
+
+    def prepare_batch(self, entities):
+        """
+        Prefetch terms with all their ancestors, characteristics, marks and data marts for a chunk of entities
+        and inject them into entities, so `prepare` and index templates work without per entity queries.
+        Return list of entities.
+        """
+        entities = list(entities)
+        if not entities:
+            return entities
+        entities_terms, terms_map = prefetch_entities_attributes(entities)
+        data_mart_finder = self.get_data_mart_finder()
+
+        for entity in entities:
+            active_terms_ids = [term.id for term in entities_terms[entity.id] if term.active]
+            # cached properties are stored in instance dictionary
+            entity.__dict__.update({
+                'active_terms_ids': active_terms_ids,
+                'data_mart': data_mart_finder(active_terms_ids, terms_map)
+            })
+        return entities
+
+    @staticmethod
+    def get_data_mart_finder():
+        """
+        Return function finding entity data mart by active terms ids in memory, same as `BaseEntity.get_data_mart`
+        """
+        tree_opts = DataMartModel._mptt_meta
+        terms_field = DataMartModel._meta.get_field('terms')
+        data_marts_terms_ids = {}
+        for data_mart_id, term_id in DataMartModel.terms.through.objects.values_list(
+                terms_field.m2m_field_name(), terms_field.m2m_reverse_field_name()):
+            data_marts_terms_ids.setdefault(data_mart_id, set()).add(term_id)
+        data_marts = DataMartModel.objects.in_bulk(list(data_marts_terms_ids.keys()))
+        all_data_mart_terms_ids = set(DataMartModel.get_all_active_terms_ids())
+        all_data_marts_active_terms_count = DataMartModel.get_all_active_terms_count()
+
+        def find(active_terms_ids, terms_map):
+            all_entity_terms_ids = set()
+            for term_id in active_terms_ids:
+                while term_id is not None and term_id not in all_entity_terms_ids:
+                    all_entity_terms_ids.add(term_id)
+                    term_id = terms_map[term_id].parent_id
+            crossing_terms_ids = all_entity_terms_ids & all_data_mart_terms_ids
+            result, result_key = None, None
+            for data_mart_id, terms_ids in data_marts_terms_ids.items():
+                num = len(terms_ids & crossing_terms_ids)
+                if num and all_data_marts_active_terms_count.get(data_mart_id, None) == num:
+                    data_mart = data_marts[data_mart_id]
+                    key = (-num, -getattr(data_mart, tree_opts.level_attr),
+                           getattr(data_mart, tree_opts.tree_id_attr), getattr(data_mart, tree_opts.left_attr))
+                    if result_key is None or key < result_key:
+                        result, result_key = data_mart, key
+            return result
+
+        return find
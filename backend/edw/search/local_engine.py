@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import bisect
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.utils import six
+from django.utils.encoding import force_text
+from django.utils.six.moves import cPickle as pickle
+
+from haystack import connections
+from haystack.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery, SearchNode, log_query
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.inputs import BaseInput
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+
+from edw.search.mixins import BatchPrepareBackendMixin
+
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+NGRAM_FIELD_TYPES = ('edge_ngram', 'ngram')
+
+
+def tokenize(value):
+    """
+    Split value (string or list of strings) to lowercase tokens
+    """
+    if isinstance(value, (list, tuple, set)):
+        value = ' '.join([force_text(x) for x in value])
+    return TOKEN_PATTERN.findall(force_text(value).lower())
+
+
+def normalize(value):
+    """
+    Return list of lowercase values used by `exact`, `in` and `startswith` filters
+    """
+    if not isinstance(value, (list, tuple, set)):
+        value = [value]
+    return [force_text(x).lower() for x in value if x is not None]
+
+
+#==============================================================================
+# LocalIndex
+#==============================================================================
+class LocalIndex(object):
+    """
+    In-process inverted index with BM25 scoring, can be persisted to a local file with pickle.
+    """
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.RLock()
+        self.documents = {}
+        # (field, token) -> {identifier: term frequency}
+        self.postings = {}
+        # (field, identifier) -> number of tokens
+        self.lengths = {}
+        # field -> total number of tokens
+        self.total_lengths = Counter()
+        # field -> sorted tokens, used by prefix expansion
+        self._vocabulary = {}
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with self.lock, open(self.path, 'rb') as f:
+            self.documents, self.postings, self.lengths, self.total_lengths = pickle.load(f)
+            self._vocabulary = {}
+
+    def save(self):
+        """
+        Write the whole index to `path`. Backend saves on every committed operation, including single object
+        updates of the realtime signal processor, so the cost grows with the index size: use the local file
+        only for small indexes, or update them in batches (`update_index`, search index queue).
+        """
+        if self.path is None:
+            return
+        with self.lock:
+            data = (self.documents, self.postings, self.lengths, self.total_lengths)
+            dirname = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=dirname)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            # atomic replace, readers never see partially written file
+            os.rename(tmp_path, self.path)
+
+    def add(self, identifier, data, text_fields):
+        """
+        Add or replace document, `text_fields` are tokenized for full text search
+        """
+        with self.lock:
+            self.remove(identifier)
+            self.documents[identifier] = data
+            for field in text_fields:
+                value = data.get(field, None)
+                if value is None:
+                    continue
+                tokens = tokenize(value)
+                self.lengths[(field, identifier)] = len(tokens)
+                self.total_lengths[field] += len(tokens)
+                for token, tf in Counter(tokens).items():
+                    self.postings.setdefault((field, token), {})[identifier] = tf
+            self._vocabulary = {}
+
+    def remove(self, identifier):
+        with self.lock:
+            data = self.documents.pop(identifier, None)
+            if data is None:
+                return
+            for field in list(data.keys()):
+                length = self.lengths.pop((field, identifier), None)
+                if length is None:
+                    continue
+                self.total_lengths[field] -= length
+                for token in set(tokenize(data[field])):
+                    postings = self.postings.get((field, token))
+                    if postings is not None:
+                        postings.pop(identifier, None)
+                        if not postings:
+                            del self.postings[(field, token)]
+            self._vocabulary = {}
+
+    def clear(self, models_ct=None):
+        with self.lock:
+            if models_ct is None:
+                self.documents, self.postings, self.lengths = {}, {}, {}
+                self.total_lengths = Counter()
+                self._vocabulary = {}
+            else:
+                for identifier in [identifier for identifier, data in self.documents.items()
+                                   if data.get(DJANGO_CT) in models_ct]:
+                    self.remove(identifier)
+
+    def get_vocabulary(self, field):
+        vocabulary = self._vocabulary.get(field, None)
+        if vocabulary is None:
+            vocabulary = self._vocabulary[field] = sorted([token for f, token in self.postings.keys() if f == field])
+        return vocabulary
+
+    def expand_prefix(self, field, prefix):
+        """
+        Return tokens of field starting with `prefix`
+        """
+        vocabulary = self.get_vocabulary(field)
+        result = []
+        for i in range(bisect.bisect_left(vocabulary, prefix), len(vocabulary)):
+            if not vocabulary[i].startswith(prefix):
+                break
+            result.append(vocabulary[i])
+        return result
+
+    def get_document_frequency(self, field, token):
+        return len(self.postings.get((field, token), ()))
+
+    def bm25(self, field, tokens):
+        """
+        Return BM25 scores of documents containing any of tokens
+        """
+        scores = {}
+        total = len(self.documents)
+        if not total:
+            return scores
+        average_length = float(self.total_lengths[field]) / total or 1.0
+        for token in tokens:
+            postings = self.postings.get((field, token), None)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (total - df + 0.5) / (df + 0.5))
+            for identifier, tf in postings.items():
+                length = self.lengths.get((field, identifier), 0)
+                scores[identifier] = scores.get(identifier, 0.0) + idf * tf * (self.BM25_K1 + 1) / (
+                    tf + self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * length / average_length))
+        return scores
+
+    def match_tokens(self, field, tokens, prefix=False):
+        """
+        Return BM25 scores of documents containing all tokens (or tokens prefixes)
+        """
+        if not tokens:
+            return {}
+        result = None
+        for token in tokens:
+            scores = self.bm25(field, self.expand_prefix(field, token) if prefix else [token])
+            if result is None:
+                result = scores
+            else:
+                result = dict((identifier, score + scores[identifier]) for identifier, score in result.items()
+                              if identifier in scores)
+            if not result:
+                break
+        return result
+
+    def suggest(self, field, prefix, limit=10):
+        """
+        Return most frequent tokens starting with `prefix`
+        """
+        with self.lock:
+            tokens = self.expand_prefix(field, prefix.lower())
+            tokens.sort(key=lambda token: self.get_document_frequency(field, token), reverse=True)
+            return tokens[:limit]
+
+
+# shared by all backends of the process, key is a connection alias
+_local_indexes = {}
+_local_indexes_lock = threading.Lock()
+
+
+#==============================================================================
+# LocalSearchBackend
+#==============================================================================
+class LocalSearchBackend(BatchPrepareBackendMixin, BaseSearchBackend):
+    """
+    Pure-Python search backend with BM25 scoring, prefix suggestions and more-like-this,
+    for small deployments and tests without external search service.
+    Settings: `{'ENGINE': 'edw.search.local_engine.LocalSearchEngine', 'PATH': '/path/to/index.pickle'}`,
+    without `PATH` the index lives in memory only, with `PATH` the whole index is rewritten on each commit.
+    """
+    MLT_MAX_QUERY_TERMS = 25
+
+    def __init__(self, connection_alias, **connection_options):
+        super(LocalSearchBackend, self).__init__(connection_alias, **connection_options)
+        with _local_indexes_lock:
+            index = _local_indexes.get(connection_alias, None)
+            if index is None:
+                index = _local_indexes[connection_alias] = LocalIndex(connection_options.get('PATH', None))
+        self.index = index
+
+    def get_fields_types(self):
+        unified_index = connections[self.connection_alias].get_unified_index()
+        return dict((field.index_fieldname, field.field_type) for field in unified_index.all_searchfields().values())
+
+    @property
+    def document_field(self):
+        return connections[self.connection_alias].get_unified_index().document_field
+
+    def update(self, index, iterable, commit=True):
+        text_fields = [field.index_fieldname for field in index.fields.values()
+                       if field.field_type in ('string',) + NGRAM_FIELD_TYPES]
+        for obj in iterable:
+            self.index.add(get_identifier(obj), index.full_prepare(obj), text_fields)
+        if commit:
+            self.index.save()
+
+    def remove(self, obj_or_string, commit=True):
+        self.index.remove(get_identifier(obj_or_string))
+        if commit:
+            self.index.save()
+
+    def clear(self, models=None, commit=True):
+        self.index.clear(set([get_model_ct(model) for model in models]) if models else None)
+        if commit:
+            self.index.save()
+
+    def match_leaf(self, field, filter_type, value, fields_types):
+        """
+        Return scores of documents matched by one filter
+        """
+        index = self.index
+        if field == 'content':
+            field = self.document_field
+        if filter_type in ('content', 'contains', 'fuzzy'):
+            value, excluded = force_text(value), []
+            words = []
+            for word in value.split():
+                if word.startswith('-') and len(word) > 1:
+                    excluded.extend(tokenize(word[1:]))
+                else:
+                    words.extend(tokenize(word))
+            scores = index.match_tokens(field, words, prefix=fields_types.get(field) in NGRAM_FIELD_TYPES)
+            for token in excluded:
+                for identifier in index.postings.get((field, token), ()):
+                    scores.pop(identifier, None)
+            return scores
+        if filter_type in ('exact', 'in', 'startswith'):
+            if filter_type == 'in':
+                values = set(normalize(list(value)))
+            else:
+                values = set(normalize(force_text(value).strip('"')))
+            result = {}
+            for identifier, data in index.documents.items():
+                stored = normalize(data.get(field, None))
+                if filter_type == 'startswith':
+                    matched = any(x.startswith(v) for x in stored for v in values)
+                else:
+                    matched = bool(values.intersection(stored))
+                if matched:
+                    result[identifier] = 0.0
+            return result
+        if filter_type in ('gt', 'gte', 'lt', 'lte', 'range'):
+            compare = {
+                'gt': lambda x: x > value,
+                'gte': lambda x: x >= value,
+                'lt': lambda x: x < value,
+                'lte': lambda x: x <= value,
+                'range': lambda x: value[0] <= x <= value[1],
+            }[filter_type]
+            result = {}
+            for identifier, data in index.documents.items():
+                stored = data.get(field, None)
+                try:
+                    if stored is not None and compare(stored):
+                        result[identifier] = 0.0
+                except TypeError:
+                    pass
+            return result
+        raise NotImplementedError("Filter type `{}` is not supported by local search backend.".format(filter_type))
+
+    def match(self, node, fields_types):
+        """
+        Return scores of documents matched by query tree built by `LocalSearchQuery.build_query`
+        """
+        connector, negated, children = node
+        result = None
+        for child in children:
+            if isinstance(child[1], bool):
+                scores = self.match(child, fields_types)
+            else:
+                scores = self.match_leaf(child[0], child[1], child[2], fields_types)
+            if result is None:
+                result = scores
+            elif connector == SearchNode.OR:
+                for identifier, score in scores.items():
+                    result[identifier] = result.get(identifier, 0.0) + score
+            else:
+                result = dict((identifier, score + scores[identifier]) for identifier, score in result.items()
+                              if identifier in scores)
+        if result is None:
+            # match all
+            result = dict((identifier, 0.0) for identifier in self.index.documents.keys())
+        if negated:
+            result = dict((identifier, 0.0) for identifier in self.index.documents.keys() if identifier not in result)
+        return result
+
+    def get_results(self, scores, start_offset=0, end_offset=None, sort_by=None, models=None,
+                    limit_to_registered_models=None, result_class=None, **kwargs):
+        documents = self.index.documents
+        if models:
+            models_ct = set([get_model_ct(model) for model in models])
+        elif limit_to_registered_models if limit_to_registered_models is not None else getattr(
+                settings, 'HAYSTACK_LIMIT_TO_REGISTERED_MODELS', True):
+            models_ct = set(self.build_models_list())
+        else:
+            models_ct = None
+        if models_ct:
+            scores = dict((identifier, score) for identifier, score in scores.items()
+                          if documents[identifier].get(DJANGO_CT) in models_ct)
+        hits = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        for field in reversed(sort_by or []):
+            reverse = field.startswith('-')
+            field = field.lstrip('-')
+            # documents without value go last in both directions
+            with_value = [x for x in hits if documents[x[0]].get(field, None) is not None]
+            with_value.sort(key=lambda x: documents[x[0]][field], reverse=reverse)
+            hits = with_value + [x for x in hits if documents[x[0]].get(field, None) is None]
+        if result_class is None:
+            result_class = SearchResult
+        results = []
+        for identifier, score in hits[start_offset:end_offset]:
+            data = documents[identifier]
+            app_label, model_name = data[DJANGO_CT].split('.')
+            stored = dict((force_text(key), value) for key, value in data.items() if key not in (
+                ID, DJANGO_CT, DJANGO_ID))
+            results.append(result_class(app_label, model_name, data[DJANGO_ID], score, **stored))
+        return {
+            'results': results,
+            'hits': len(hits),
+            'facets': {},
+            'spelling_suggestion': None,
+        }
+
+    @log_query
+    def search(self, query_string, **kwargs):
+        with self.index.lock:
+            fields_types = self.get_fields_types()
+            if isinstance(query_string, six.string_types):
+                # plain query string, e.g. from `SearchQuerySet().raw_search()`
+                query_string = (SearchNode.AND, False, [('content', 'content', query_string)]
+                                if query_string.strip() not in ('', '*', '*:*') else [])
+            scores = self.match(query_string, fields_types)
+            for narrow_query in kwargs.pop('narrow_queries', None) or ():
+                field, _, value = force_text(narrow_query).partition(':')
+                narrowed = self.match_leaf(field, 'exact', value.strip('()'), fields_types)
+                scores = dict((identifier, score) for identifier, score in scores.items() if identifier in narrowed)
+            return self.get_results(scores, **kwargs)
+
+    def get_like_tokens(self, like, ignore_like=None):
+        """
+        Return the most significant tokens of text by TF-IDF
+        """
+        field, total = self.document_field, len(self.index.documents) or 1
+        counter = Counter(tokenize(like))
+        for token in tokenize(ignore_like or ''):
+            counter.pop(token, None)
+        weights = dict((token, tf * math.log(1.0 + float(total) / (1 + self.index.get_document_frequency(
+            field, token)))) for token, tf in counter.items())
+        return sorted(weights.keys(), key=lambda token: weights[token], reverse=True)[:self.MLT_MAX_QUERY_TERMS]
+
+    def more_like_this_scores(self, like, unlike=None, ignore_like=None, ignore_unlike=None):
+        scores = self.index.bm25(self.document_field, self.get_like_tokens(like, ignore_like))
+        if unlike:
+            excluded = self.index.bm25(self.document_field, self.get_like_tokens(unlike, ignore_unlike))
+            scores = dict((identifier, score) for identifier, score in scores.items() if identifier not in excluded)
+        return scores
+
+    def more_like_this(self, model_instance, additional_query_string=None, **kwargs):
+        identifier = get_identifier(model_instance)
+        with self.index.lock:
+            data = self.index.documents.get(identifier, None)
+            if data is None:
+                return {'results': [], 'hits': 0}
+            scores = self.more_like_this_scores(data.get(self.document_field, ''))
+            scores.pop(identifier, None)
+            if additional_query_string and additional_query_string.strip() not in ('*', '*:*'):
+                additional = self.match_leaf('content', 'content', additional_query_string, self.get_fields_types())
+                scores = dict((identifier, score) for identifier, score in scores.items() if identifier in additional)
+            return self.get_results(scores, **kwargs)
+
+    def search_many(self, queries, size=10):
+        """
+        More-like-this primitive compatible with `edw.search.classify.MoreLikeThisClassifier`,
+        return results shaped like Elasticsearch ones
+        """
+        results = []
+        with self.index.lock:
+            documents = self.index.documents
+            for query in queries:
+                scores = self.more_like_this_scores(query['like'], query.get('unlike', None),
+                                                    query.get('ignore_like', None), query.get('ignore_unlike', None))
+                model = query.get('model', None)
+                if model:
+                    scores = dict((identifier, score) for identifier, score in scores.items()
+                                  if documents[identifier].get(DJANGO_CT) == str(model))
+                hits = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:size]
+                results.append({
+                    'hits': {
+                        'total': len(scores),
+                        'hits': [{
+                            '_id': identifier,
+                            '_score': score,
+                            '_source': documents[identifier]
+                        } for identifier, score in hits]
+                    }
+                })
+        return results
+
+    def suggest(self, prefix, limit=10, field=None):
+        """
+        Return most frequent words of field (document field by default) starting with `prefix`
+        """
+        return self.index.suggest(field or self.document_field, prefix, limit)
+
+
+#==============================================================================
+# LocalSearchQuery
+#==============================================================================
+class LocalSearchQuery(BaseSearchQuery):
+    """
+    Query is passed to backend as a tree `(connector, negated, children)`,
+    leafs are `(field, filter_type, value)`.
+    """
+    def build_query(self):
+        return self.build_node(self.query_filter)
+
+    def build_node(self, node):
+        children = []
+        for child in node.children:
+            if isinstance(child, SearchNode):
+                children.append(self.build_node(child))
+            else:
+                expression, value = child
+                field, filter_type = node.split_expression(expression)
+                if isinstance(value, BaseInput):
+                    value = value.prepare(self)
+                children.append((field, filter_type, value))
+        return node.connector, node.negated, children
+
+    def build_query_fragment(self, field, filter_type, value):
+        # queries are not rendered to string, see `build_query`
+        return ''
+
+    def clean(self, query_fragment):
+        return query_fragment
+
+
+class LocalSearchEngine(BaseEngine):
+    """
+    Use in settings: `'ENGINE': 'edw.search.local_engine.LocalSearchEngine',`
+    """
+    backend = LocalSearchBackend
+    query = LocalSearchQuery
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+
+class BatchPrepareBackendMixin(object):
+    """
+    Let the index prefetch data for the whole chunk of objects before `full_prepare`,
+    see `EntityIndex.prepare_batch`.
+    """
+    def update(self, index, iterable, commit=True):
+        if hasattr(index, 'prepare_batch'):
+            iterable = index.prepare_batch(iterable)
+        return super(BatchPrepareBackendMixin, self).update(index, iterable, commit=commit)
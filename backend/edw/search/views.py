@@ -13,7 +13,7 @@ from drf_haystack.viewsets import ViewSetMixin
 from edw.models.entity import EntityModel
 from edw.search.serializers import EntitySearchSerializer
 from edw.search.filters import HaystackTermFilter
-from edw.search.classify import get_more_like_this, analyze_suggestions
+from edw.search.classify import MoreLikeThisClassifier
 
 
 class EntitySearchViewSet(ListModelMixin, ViewSetMixin, HaystackGenericAPIView):
@@ -56,8 +56,7 @@ def more_like_this(request):
 
     results = []
     if search_query:
-        search_result = get_more_like_this(search_query.pop('like'), model=model, **search_query)
-        suggestions = analyze_suggestions(search_result)
+        suggestions = MoreLikeThisClassifier().classify(search_query.pop('like'), model=model, **search_query)
 
         for suggestion in suggestions:
             category = suggestion['category']
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import sys
+
 from django.conf import settings
 from rest_framework.settings import api_settings
 
@@ -33,7 +35,15 @@ CACHE_DURATIONS = {
     'entity_validate_term_model': 60,
     'entity_validate_data_mart_model': 60,
 
-    'boundary_polygons': 86400
+    'boundary_polygons': 86400,
+
+    'search_more_like_this': 3600,
+
+    'rest_response': 600,
+
+    'mptt_admin_node': 86400,
+
+    'customer_last_access': 86400
 }
 CACHE_DURATIONS.update(getattr(settings, 'EDW_CACHE_DURATIONS', {}))
 
@@ -47,6 +57,8 @@ CACHE_BUFFERS_SIZES = {
 
     'entity_terms_ids': 500,
     'entity_data_mart': 500,
+
+    'customer_last_access': 10000,
 }
 CACHE_BUFFERS_SIZES.update(getattr(settings, 'EDW_CACHE_BUFFERS_SIZES', {}))
 
@@ -76,3 +88,70 @@ SEMANTIC_FILTER = {
     'filters_chunk_limit': 5
 }
 SEMANTIC_FILTER.update(getattr(settings, 'EDW_SEMANTIC_FILTER', {}))
+
+
+GEOCODER = getattr(settings, 'EDW_GEOCODER', 'edw.utils.geo.get_location_from_geocoder')
+"""
+Dotted path to the geocoder function ``geocoder(geoposition=None, query=None)`` returning geopy ``Location``.
+Set ``EDW_GEOCODER`` to a local stub to serve tests offline.
+"""
+
+
+REST_RESPONSE_CACHE = {
+    'enabled': False,
+    'anonymous_only': True,
+    'formats': ('json',)
+}
+"""
+If ``EDW_REST_RESPONSE_CACHE['enabled']`` is True, read-only responses of entities, terms and data marts
+endpoints are stored in cache as rendered bytes and invalidated by terms, data marts and entities generations.
+"""
+REST_RESPONSE_CACHE.update(getattr(settings, 'EDW_REST_RESPONSE_CACHE', {}))
+
+
+SEARCH_INDEX_QUEUE = {
+    'batch_size': 500,
+    'delay': 60
+}
+"""
+Processing of the search index queue (``SearchIndexQueueModel``): ``batch_size`` entries are applied at once,
+entries changed less than ``delay`` seconds ago wait, so repeated changes of the same objects are indexed once.
+"""
+SEARCH_INDEX_QUEUE.update(getattr(settings, 'EDW_SEARCH_INDEX_QUEUE', {}))
+
+
+CUSTOMER_LAST_ACCESS = {
+    'resolution': 5,
+    'write_behind': False
+}
+"""
+Customer ``last_access`` is written only if the stored value is older than ``resolution`` minutes.
+With ``write_behind`` enabled the value is kept in cache and written with bulk UPDATEs by the
+``flush_customers_last_access`` Celery task or management command, which must then be scheduled
+(e.g. in ``CELERYBEAT_SCHEDULE``) to run more often than once a day, otherwise ``last_access`` gets stale.
+"""
+CUSTOMER_LAST_ACCESS.update(getattr(settings, 'EDW_CUSTOMER_LAST_ACCESS', {}))
+
+
+REST_JSON_RENDERER = getattr(settings, 'EDW_REST_JSON_RENDERER', 'rest_framework.renderers.JSONRenderer')
+"""
+Dotted path to the JSON renderer class of edw REST views and data template tags.
+Set ``EDW_REST_JSON_RENDERER`` to ``'edw.rest.renderers.FastJSONRenderer'`` to use the renderer with reused
+encoders, its output is the same as of the stock DRF renderer.
+"""
+
+
+REST_PLAIN_REPRESENTATION = getattr(settings, 'EDW_REST_PLAIN_REPRESENTATION', sys.version_info >= (3, 7))
+"""
+If ``EDW_REST_PLAIN_REPRESENTATION`` is True, edw serializers build representation as plain ``dict`` instead of
+``OrderedDict``. The rendered JSON is the same on Python 3.7+, where it is enabled by default. On older Python
+keys order of JSON objects is not kept.
+"""
+
+
+REST_SUMMARY_VALUES = getattr(settings, 'EDW_REST_SUMMARY_VALUES', False)
+"""
+If ``EDW_REST_SUMMARY_VALUES`` is True, pages of entities lists are fetched with ``values()`` and serialized
+without model instances. Entity models opt in by declaring ``SUMMARY_VALUES_FIELDS`` in the model class itself,
+the attribute is not inherited. Other models and models with ``RESTMeta`` include fields are loaded as usual.
+"""
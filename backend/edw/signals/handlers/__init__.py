@@ -23,6 +23,12 @@ try:
     except ImproperlyConfigured:
         pass
 
+    # try import `search_queue`
+    try:
+        from . import search_queue
+    except ImproperlyConfigured:
+        pass
+
     # try import `email_category`
     try:
         from . import email_category
@@ -4,11 +4,11 @@ from __future__ import unicode_literals
 import itertools
 
 from django.core.cache import cache
-from django.db.models.signals import pre_delete, pre_save
+from django.db.models.signals import pre_delete, pre_save, post_delete, post_save
 
 from edw.models.entity import EntityModel
 from edw.models.mixins.entity.place import PlaceMixin
-from edw.models.boundary import BoundaryModel
+from edw.models.boundary import BoundaryModel, BoundaryIndex
 from edw.signals import make_dispatch_uid
 
 # ==============================================================================
@@ -53,6 +53,12 @@ def on_pre_save_boundary(sender, instance, **kwargs):
         clear_boundary_polygons_cache(instance)
 
 
+def invalidate_boundary_index(sender, instance, **kwargs):
+    # rebuild index of current process at once, other processes follow the generation
+    BoundaryIndex.reset()
+    BoundaryModel.incr_generation()
+
+
 #==============================================================================
 # Connect
 #==============================================================================
@@ -62,3 +68,7 @@ pre_delete.connect(on_pre_delete_boundary, clazz,
                        dispatch_uid=make_dispatch_uid(pre_delete, on_pre_delete_boundary, clazz))
 pre_save.connect(on_pre_save_boundary, clazz,
                   dispatch_uid=make_dispatch_uid(pre_save, on_pre_save_boundary, clazz))
+post_save.connect(invalidate_boundary_index, clazz,
+                  dispatch_uid=make_dispatch_uid(post_save, invalidate_boundary_index, clazz))
+post_delete.connect(invalidate_boundary_index, clazz,
+                    dispatch_uid=make_dispatch_uid(post_delete, invalidate_boundary_index, clazz))
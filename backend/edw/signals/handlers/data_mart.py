@@ -12,13 +12,15 @@ from django.dispatch import receiver
 
 from edw.models.data_mart import DataMartModel
 from edw.models.entity import EntityModel
+from edw.models.mptt_info import get_queryset_ancestors, get_queryset_descendants
 from edw.models.term import TermModel
 from edw.rest.serializers.data_mart import DataMartCommonSerializer
 from edw.signals import make_dispatch_uid
 from edw.signals.mptt import (
     move_to_done,
     pre_save,
-    post_save
+    post_save,
+    tree_batch_done
 )
 
 
@@ -41,7 +43,7 @@ def get_HTML_snippets_keys(sender):
     languages = getattr(settings, 'LANGUAGES', ())
     return [DataMartCommonSerializer.HTML_SNIPPET_CACHE_KEY_PATTERN.format(
         sender.id, app_label, label, sender.data_mart_model, 'media', language[0])
-        for label in ('summary', 'detail') for language in languages]
+        for label in ('summary', 'detail', 'tree') for language in languages]
 
 
 #==============================================================================
@@ -95,6 +97,8 @@ def invalidate_after_terms_set_changed(sender, instance, **kwargs):
         # clear cache
         keys = get_data_mart_all_active_terms_keys()
         cache.delete_many(keys)
+        # Invalidate cached responses
+        DataMartModel.incr_generation()
 
 
 def invalidate_data_mart_before_save(sender, instance, **kwargs):
@@ -136,6 +140,9 @@ def invalidate_data_mart_after_save(sender, instance, **kwargs):
         # Clear Entity Data Mart
         EntityModel.clear_data_mart_cache_buffer()
 
+        # Invalidate cached responses
+        DataMartModel.incr_generation()
+
         if not getattr(instance, '_parent_id_validate', False):
             keys = get_children_keys(sender, instance.parent_id)
             cache.delete_many(keys)
@@ -155,8 +162,39 @@ def invalidate_data_mart_after_move(sender, instance, target, position, prev_par
     invalidate_data_mart_after_save(sender, instance, **kwargs)
 
 
+def invalidate_data_marts_after_batch(sender, ids, parent_ids, **kwargs):
+    # affected subtrees of mutated data marts
+    mutated = list(sender._default_manager.filter(id__in=ids)) if ids else []
+    nodes = list(get_queryset_descendants(mutated, include_self=True)) if ids else []
+    keys = get_data_mart_all_active_terms_keys()
+    # активность изменяется у предков созданных в `tree_batch` витрин и витрин с измененной активностью
+    originals = kwargs.get('originals')
+    changed = [node for node in mutated if node.id not in originals or originals[node.id][1] != node.active
+               ] if originals is not None else []
+    ancestors_ids = set(get_queryset_ancestors(changed).values_list('id', flat=True)) if changed else set()
+    for parent_id in set(parent_ids) | ancestors_ids | set([node.id for node in nodes if not node.is_leaf_node()]):
+        keys.extend(get_children_keys(sender, parent_id))
+    keys.extend(get_children_keys(sender, None))
+    for node in nodes:
+        keys.extend(get_HTML_snippets_keys(node))
+    cache.delete_many(keys)
+
+    # Clear Entity Data Mart
+    EntityModel.clear_data_mart_cache_buffer()
+
+    # Invalidate cached responses
+    DataMartModel.incr_generation()
+
+
 Model = DataMartModel.materialized
 
+tree_batch_done.connect(invalidate_data_marts_after_batch, sender=Model,
+                        dispatch_uid=make_dispatch_uid(
+                            tree_batch_done,
+                            invalidate_data_marts_after_batch,
+                            Model
+                        ))
+
 subclasses = list(Model.get_all_subclasses())
 subclasses.append(Model)
 subclasses.reverse()
@@ -82,6 +82,10 @@ def invalidate_after_terms_set_changed(sender, instance, **kwargs):
             if pk_set:
                 external_remove_terms.send(sender=instance.__class__, instance=instance, pk_set=pk_set)
 
+    elif action in ["post_add", "post_remove", "post_clear"]:
+        # Invalidate cached responses
+        EntityModel.incr_generation()
+
 
 # invalidate after entity changed
 def invalidate_entity_after_save(sender, instance, **kwargs):
@@ -96,6 +100,9 @@ def invalidate_entity_after_save(sender, instance, **kwargs):
 
     cache.delete_many(keys)
 
+    # Invalidate cached responses
+    EntityModel.incr_generation()
+
 
 def invalidate_entity_before_delete(sender, instance, **kwargs):
     invalidate_entity_after_save(sender, instance, **kwargs)
@@ -112,6 +119,9 @@ def invalidate_entity_after_file_save(sender, instance, **kwargs):
     keys = get_HTML_snippets_keys(instance.entity)
     cache.delete_many(keys)
 
+    # Invalidate cached responses
+    EntityModel.incr_generation()
+
 
 def invalidate_entity_before_file_delete(sender, instance, **kwargs):
     invalidate_entity_after_file_save(sender, instance, **kwargs)
@@ -2,11 +2,11 @@
 from __future__ import unicode_literals
 
 import itertools
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 
 from edw.models.entity import EntityModel
 from edw.models.mixins.entity.place import PlaceMixin
-from edw.models.postal_zone import PostZoneModel
+from edw.models.postal_zone import PostZoneModel, PostalZoneMatcher
 from edw.signals import make_dispatch_uid
 
 # ==============================================================================
@@ -40,10 +40,20 @@ def on_pre_save_postzone(sender, instance, **kwargs):
                     entity_id__in=list(entities_ids), term_id=origin_zone_term_id).update(term_id=zone_term_id)
 
 
+def invalidate_postal_zone_matcher(sender, instance, **kwargs):
+    # rebuild matcher of current process at once, other processes follow the generation
+    PostalZoneMatcher.reset()
+    PostZoneModel.incr_generation()
+
+
 #==============================================================================
 # Connect
 #==============================================================================
 clazz = PostZoneModel.materialized
 
 pre_save.connect(on_pre_save_postzone, clazz,
-                  dispatch_uid=make_dispatch_uid(pre_save, on_pre_save_postzone, clazz))
\ No newline at end of file
+                  dispatch_uid=make_dispatch_uid(pre_save, on_pre_save_postzone, clazz))
+post_save.connect(invalidate_postal_zone_matcher, clazz,
+                  dispatch_uid=make_dispatch_uid(post_save, invalidate_postal_zone_matcher, clazz))
+post_delete.connect(invalidate_postal_zone_matcher, clazz,
+                    dispatch_uid=make_dispatch_uid(post_delete, invalidate_postal_zone_matcher, clazz))
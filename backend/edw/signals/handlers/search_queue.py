@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import m2m_changed, pre_delete, post_save
+
+from edw.models.entity import EntityModel
+from edw.models.search_queue import SearchIndexQueueModel, BaseSearchIndexQueue
+from edw.models.term import TermModel
+from edw.signals import make_dispatch_uid
+from edw.signals.mptt import (
+    move_to_done,
+    post_save as term_post_save,
+    tree_batch_done
+)
+
+
+def enqueue_entities(entities_ids, action=BaseSearchIndexQueue.ACTION_UPDATE):
+    models = {}
+    for entity_id, ctype_id in EntityModel.objects.filter(id__in=entities_ids).values_list(
+            'id', 'polymorphic_ctype_id'):
+        model_class = ContentType.objects.get_for_id(ctype_id).model_class()
+        if model_class is not None:
+            models.setdefault(model_class, []).append(entity_id)
+    for model_class, ids in models.items():
+        SearchIndexQueueModel.enqueue(model_class, ids, action)
+
+
+# ==============================================================================
+# Entity model event handlers
+# ==============================================================================
+def enqueue_entity_after_save(sender, instance, **kwargs):
+    SearchIndexQueueModel.enqueue(instance.__class__, [instance.id])
+
+
+def enqueue_entity_before_delete(sender, instance, **kwargs):
+    SearchIndexQueueModel.enqueue(instance.__class__, [instance.id], BaseSearchIndexQueue.ACTION_DELETE)
+
+
+def enqueue_entity_after_terms_set_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        SearchIndexQueueModel.enqueue(instance.__class__, [instance.id])
+    elif pk_set:
+        enqueue_entities(pk_set)
+
+
+# ==============================================================================
+# Term model event handlers
+# ==============================================================================
+def enqueue_term_after_save(sender, instance, **kwargs):
+    # entities of term and its descendants are found on queue processing
+    SearchIndexQueueModel.enqueue(sender, [instance.id])
+
+
+def enqueue_term_after_move(sender, instance, **kwargs):
+    enqueue_term_after_save(sender, instance, **kwargs)
+
+
+def enqueue_terms_after_batch(sender, ids, **kwargs):
+    SearchIndexQueueModel.enqueue(sender, ids)
+
+
+def enqueue_term_before_delete(sender, instance, **kwargs):
+    # relations are lost after delete, so entities are enqueued at once
+    for model, ids in BaseSearchIndexQueue.get_entities_by_terms([instance.id]).items():
+        SearchIndexQueueModel.enqueue(model, ids)
+
+
+#==============================================================================
+# Connect
+#==============================================================================
+SearchIndexQueueModel()  # Test pass if model materialized
+
+Model = EntityModel.terms.through
+m2m_changed.connect(enqueue_entity_after_terms_set_changed, sender=Model,
+                    dispatch_uid=make_dispatch_uid(m2m_changed, enqueue_entity_after_terms_set_changed, Model))
+
+Model = EntityModel.materialized
+subclasses = list(Model.get_all_subclasses())
+subclasses.append(Model)
+for clazz in subclasses:
+    post_save.connect(enqueue_entity_after_save, clazz,
+                      dispatch_uid=make_dispatch_uid(post_save, enqueue_entity_after_save, clazz))
+    pre_delete.connect(enqueue_entity_before_delete, clazz,
+                       dispatch_uid=make_dispatch_uid(pre_delete, enqueue_entity_before_delete, clazz))
+
+Model = TermModel.materialized
+term_post_save.connect(enqueue_term_after_save, sender=Model,
+                       dispatch_uid=make_dispatch_uid(term_post_save, enqueue_term_after_save, Model))
+move_to_done.connect(enqueue_term_after_move, sender=Model,
+                     dispatch_uid=make_dispatch_uid(move_to_done, enqueue_term_after_move, Model))
+pre_delete.connect(enqueue_term_before_delete, sender=Model,
+                   dispatch_uid=make_dispatch_uid(pre_delete, enqueue_term_before_delete, Model))
+tree_batch_done.connect(enqueue_terms_after_batch, sender=Model,
+                        dispatch_uid=make_dispatch_uid(tree_batch_done, enqueue_terms_after_batch, Model))
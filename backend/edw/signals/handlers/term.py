@@ -9,12 +9,14 @@ from edw.signals import make_dispatch_uid
 from edw.signals.mptt import (
     move_to_done,
     pre_save,
-    post_save
+    post_save,
+    tree_batch_done
 )
 
 from edw.models.term import TermModel
 from edw.models.data_mart import DataMartModel
 from edw.models.entity import EntityModel
+from edw.models.mptt_info import get_queryset_ancestors, get_queryset_descendants
 
 
 def get_children_keys(sender, parent_id):
@@ -114,6 +116,7 @@ def invalidate_term_after_save(sender, instance, **kwargs):
     TermModel.clear_decompress_buffer()  # Clear decompress buffer
     cache.delete(TermModel.ALL_ACTIVE_ROOT_IDS_CACHE_KEY) # Clear all active root ids cache
     EntityModel.clear_terms_cache_buffer() # Clear terms ids buffer
+    TermModel.incr_generation()  # Invalidate cached responses
 
 
 def invalidate_term_before_delete(sender, instance, **kwargs):
@@ -135,6 +138,31 @@ def invalidate_term_after_move(sender, instance, target, position, prev_parent,
     invalidate_term_after_save(sender, instance, **kwargs)
 
 
+def invalidate_terms_after_batch(sender, ids, parent_ids, **kwargs):
+    # affected subtrees of mutated terms
+    mutated = list(sender._default_manager.filter(id__in=ids)) if ids else []
+    nodes = list(get_queryset_descendants(mutated, include_self=True).values_list('id', 'lft', 'rght')) if ids else []
+    keys = []
+    # активность изменяется у предков созданных в `tree_batch` терминов и терминов с измененной активностью
+    originals = kwargs.get('originals')
+    changed = [node for node in mutated if node.id not in originals or originals[node.id][1] != node.active
+               ] if originals is not None else []
+    ancestors_ids = set(get_queryset_ancestors(changed).values_list('id', flat=True)) if changed else set()
+    for parent_id in set(parent_ids) | ancestors_ids | set([id for id, lft, rght in nodes if rght - lft > 1]):
+        keys.extend(get_children_keys(sender, parent_id))
+    # top level children may change too
+    keys.extend(get_children_keys(sender, None))
+    keys.extend([_get_attribute_ancestors_key(sender, id, attribute_mode) for id, lft, rght in nodes
+                 for attribute_mode in (sender.attributes.is_characteristic, sender.attributes.is_mark)])
+    keys.extend(get_all_active_attributes_descendants_keys(sender))
+    keys.extend(get_data_mart_all_active_terms_keys())
+    keys.append(TermModel.ALL_ACTIVE_ROOT_IDS_CACHE_KEY)
+    cache.delete_many(keys)
+    TermModel.clear_decompress_buffer()  # Clear decompress buffer
+    EntityModel.clear_terms_cache_buffer()  # Clear terms ids buffer
+    TermModel.incr_generation()  # Invalidate cached responses
+
+
 Model = TermModel.materialized
 pre_save.connect(invalidate_term_before_save, sender=Model,
                  dispatch_uid=make_dispatch_uid(
@@ -160,3 +188,9 @@ move_to_done.connect(invalidate_term_after_move, sender=Model,
                          invalidate_term_after_move,
                          Model
                      ))
+tree_batch_done.connect(invalidate_terms_after_batch, sender=Model,
+                        dispatch_uid=make_dispatch_uid(
+                            tree_batch_done,
+                            invalidate_terms_after_batch,
+                            Model
+                        ))
@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.db import transaction
 from django.dispatch import Signal
 
+from ..models.mptt_info import update_node_family
+
 
 move_to_done = Signal(providing_args=["instance", "target", "position"])
 
@@ -9,18 +16,169 @@ pre_save = Signal(providing_args=["instance"])
 
 post_save = Signal(providing_args=["instance"])
 
+tree_batch_done = Signal(providing_args=["ids", "parent_ids", "originals"])
+
+
+_tree_batch = threading.local()
+
+
+def get_tree_batch():
+    """
+    Return state of the current thread `tree_batch` or None
+    """
+    return getattr(_tree_batch, 'state', None)
+
+
+def _get_tree_batch_info(instance):
+    """
+    Return batch info of the instance tree model, record original parent id and active flag of existing node
+    on first touch
+    """
+    model = instance._tree_manager.tree_model
+    info = _tree_batch.state.get(model)
+    if info is None:
+        info = _tree_batch.state[model] = {
+            'ids': set(),
+            'parent_ids': set(),
+            'originals': {},
+            'inserted': set(),
+            'active': OrderedDict()
+        }
+    # узлы созданные в пакете не имеют исходных значений
+    if not instance._state.adding and instance.pk not in info['originals'] and instance.pk not in info['ids']:
+        parent_attr = '{}_id'.format(instance._mptt_meta.parent_attr)
+        if _has_active_field(model):
+            original = model._default_manager.filter(pk=instance.pk).values_list(parent_attr, 'active').first()
+        else:
+            original = (instance._mptt_cached_fields.get(instance._mptt_meta.parent_attr), None)
+        if original is not None:
+            info['originals'][instance.pk] = tuple(original)
+    return info
+
+
+def _has_active_field(model):
+    return any(field.name == 'active' for field in model._meta.get_fields())
+
+
+def _record_tree_batch(instance, info, *parent_ids):
+    """
+    Record mutated node into the current `tree_batch`
+    """
+    info['ids'].add(instance.pk)
+    info['parent_ids'].update(parent_ids)
+
+
+@contextmanager
+def _disable_mptt_updates(models):
+    if not models:
+        yield
+    else:
+        with models[0]._tree_manager.disable_mptt_updates():
+            with _disable_mptt_updates(models[1:]):
+                yield
+
+
+def _finish_tree_batch(sender, info):
+    """
+    Rebuild touched trees of the batch keeping order of untouched nodes, inserted and reparented by `save` nodes are
+    placed among siblings by `order_insertion_by` as mptt does, then propagate changed active flags
+    """
+    manager = sender._tree_manager
+    tree_id_attr = sender._mptt_meta.tree_id_attr
+    tree_ids = set(manager.filter(pk__in=list(info['ids'] | info['parent_ids'])).values_list(
+        tree_id_attr, flat=True))
+    if not tree_ids:
+        return
+    with transaction.atomic():
+        if hasattr(manager, 'rebuild2'):
+            manager.rebuild2(tree_ids=tree_ids, insert_ids=info['inserted'])
+        else:
+            for tree_id in tree_ids:
+                manager.partial_rebuild(tree_id)
+        if info['active']:
+            # активация распространяется на предков и потомков, деактивация только на потомков,
+            # изменения применяются в порядке сохранения узлов
+            nodes = manager.in_bulk(list(info['active'].keys()))
+            for pk, active in info['active'].items():
+                node = nodes.get(pk)
+                if node is None:
+                    continue
+                manager.filter(pk=pk).exclude(active=active).update(active=active)
+                node.active = active
+                update_node_family(node, ancestors=active, descendants=True, active=active)
+
+
+@contextmanager
+def tree_batch(*models):
+    """
+    Buffer `pre_save`, `post_save` and `move_to_done` signals of tree nodes, disable MPTT updates of `models`
+    with `disable_mptt_updates` and on exit rebuild only touched trees with `rebuild2`, so manual order
+    of siblings is kept. Active flag propagation of saved nodes is deferred until trees are rebuilt.
+    One `tree_batch_done` signal per tree model is sent on successful exit with mutated nodes ids, their
+    parents ids and `originals` - original (parent id, active) of mutated existing nodes, so handlers
+    invalidate only affected subtrees once. If the body raises, no signal is sent.
+    Usage:
+        with tree_batch(TermModel):
+            for term in terms:
+                term.save()
+    Nested batches join the outer one.
+    """
+    state = get_tree_batch()
+    if state is not None:
+        with _disable_mptt_updates(list(models)):
+            yield state
+        return
+    state = _tree_batch.state = {}
+    try:
+        with _disable_mptt_updates(list(models)):
+            yield state
+    except Exception:
+        del _tree_batch.state
+        raise
+    else:
+        del _tree_batch.state
+        for sender, info in state.items():
+            _finish_tree_batch(sender, info)
+        # при ошибке транзакция может быть прервана или откачена, обработчики сигнала не вызываются
+        for sender, info in state.items():
+            info['parent_ids'].discard(None)
+            tree_batch_done.send(sender=sender, ids=info['ids'], parent_ids=info['parent_ids'],
+                                 originals=info['originals'])
+
 
 class MPTTModelSignalSenderMixin(object):
 
     def move_to(self, target, position='first-child'):
         prev_parent = self.parent
+        info = _get_tree_batch_info(self) if get_tree_batch() is not None else None
         super(MPTTModelSignalSenderMixin, self).move_to(target, position)
-        move_to_done.send(sender=self.__class__, instance=self, target=target, position=position,
-                          prev_parent=prev_parent)
+        if info is not None:
+            # позиция узла задана явно
+            info['inserted'].discard(self.pk)
+            _record_tree_batch(self, info, prev_parent.id if prev_parent is not None else None, self.parent_id)
+        else:
+            move_to_done.send(sender=self.__class__, instance=self, target=target, position=position,
+                              prev_parent=prev_parent)
 
     def save(self, *args, **kwargs):
-        pre_save.send(sender=self.__class__, instance=self)
+        if get_tree_batch() is None:
+            pre_save.send(sender=self.__class__, instance=self)
+            result = super(MPTTModelSignalSenderMixin, self).save(*args, **kwargs)
+            post_save.send(sender=self.__class__, instance=self)
+            return result
+        info = _get_tree_batch_info(self)
+        original = info['originals'].get(self.pk)
+        prev_parent_id, prev_active = original if original is not None else (None, None)
+        prev_active = info['active'].get(self.pk, prev_active)
         result = super(MPTTModelSignalSenderMixin, self).save(*args, **kwargs)
-        post_save.send(sender=self.__class__, instance=self)
+        if original is None or (prev_parent_id != self.parent_id and self.parent_id is not None):
+            # новые и перенесенные узлы размещаются среди соседей по `order_insertion_by`
+            info['inserted'].add(self.pk)
+        else:
+            info['inserted'].discard(self.pk)
+        if _has_active_field(self._tree_manager.tree_model) and (
+                original is None and self.pk not in info['active'] or prev_active != self.active):
+            info['active'].pop(self.pk, None)
+            info['active'][self.pk] = self.active
+        _record_tree_batch(self, info, prev_parent_id, self.parent_id)
         return result
-
@@ -12,6 +12,14 @@ except (ImproperlyConfigured, ImportError):
 else:
     from .update_images import update_entities_images
 
+try:
+    from edw.models.search_queue import SearchIndexQueueModel
+    SearchIndexQueueModel() # Test pass if model materialized
+except (ImproperlyConfigured, ImportError):
+    pass
+else:
+    from .process_search_index_queue import process_search_index_queue
+
 from .update_terms import update_entities_terms
 from .update_relations import update_entities_relations
 from .update_related_data_marts import update_entities_related_data_marts
@@ -24,3 +32,4 @@ from .make_terms_by_additional_attrs import entities_make_terms_by_additional_at
 from .normalize_entities_additional_attrs import normalize_entities_additional_attrs
 from .send_notification import send_notification
 from .bulk_delete import entities_bulk_delete
+from .flush_customers_last_access import flush_customers_last_access
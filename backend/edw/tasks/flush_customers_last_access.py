@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from celery import shared_task
+
+from edw.models.customer import BaseCustomer
+
+
+@shared_task(name='flush_customers_last_access')
+def flush_customers_last_access():
+    customers_count = BaseCustomer.flush_last_access()
+
+    return {
+        'customers_count': customers_count,
+    }
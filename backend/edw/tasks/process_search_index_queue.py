@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from celery import shared_task
+
+from edw.models.search_queue import BaseSearchIndexQueue
+
+
+@shared_task(name='process_search_index_queue')
+def process_search_index_queue(batch_size=None, delay=None):
+    processed = BaseSearchIndexQueue.process(batch_size=batch_size, delay=delay)
+
+    return {
+        'processed': processed,
+    }
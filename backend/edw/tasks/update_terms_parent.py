@@ -17,15 +17,10 @@ def update_terms_parent(terms_ids, to_set_parent_term_id):
         except TermModel.DoesNotExist:
             pass
         else:
-
-            for term_id in terms_ids:
-                try:
-                    term = TermModel.objects.get(id=term_id)
-                except TermModel.DoesNotExist:
-                    does_not_exist.append(term_id)
-                else:
-                    term.parent = to_set_parent_term
-                    term.save()
+            # all terms are moved with one UPDATE and one tree recalculation
+            existing_ids = set(TermModel.objects.filter(id__in=terms_ids).values_list('id', flat=True))
+            does_not_exist = [term_id for term_id in terms_ids if term_id not in existing_ids]
+            TermModel.objects.bulk_move_to(list(existing_ids), to_set_parent_term)
 
     return {
         'terms_ids': terms_ids,
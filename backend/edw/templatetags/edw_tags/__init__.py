@@ -12,6 +12,7 @@ from edw.templatetags.edw_tags.entities import GetEntity, GetEntities
 from edw.templatetags.edw_tags.data_marts import GetDataMart, GetDataMarts
 from edw.templatetags.edw_tags.frontend import CompactJson, AddToSingletonJs, jsondumps
 from edw.templatetags.edw_tags.term import GetTermTree, attributes_has_view_class
+from edw.templatetags.edw_tags.prefetch import PrefetchData
 
 register = template.Library()
 
@@ -43,6 +44,8 @@ register.tag(GetEntities)
 register.tag(GetDataMart)
 register.tag(GetDataMarts)
 
+register.tag(PrefetchData)
+
 register.tag(CompactJson)
 register.filter(jsondumps)
 register.tag(AddToSingletonJs)
@@ -5,7 +5,7 @@ from classytags.core import Options
 from classytags.arguments import MultiKeywordArgument, Argument
 
 from edw.models.entity import EntityModel
-from edw.rest.templatetags import BaseRetrieveDataTag
+from edw.rest.templatetags import BaseRetrieveDataTag, get_queryset_key
 from edw.rest.serializers.entity import (
     EntityTotalSummarySerializer,
     EntityDetailSerializer,
@@ -89,6 +89,18 @@ class GetEntities(BaseRetrieveDataTag):
         else:
             return self.to_json(data)
 
+    def get_queryset_page(self, queryset, offset, limit):
+        """
+        RUS: Страница объектов, если страница не выбрана предварительно, строится с помощью `values()`
+        при поддержке сериалайзером.
+        """
+        if (get_queryset_key(queryset), offset, limit) not in self.memo.get('pages', {}):
+            page = self.serializer_class.get_values_page(queryset[offset:offset + limit],
+                                                          self.get_serializer_context())
+            if page is not None:
+                return page
+        return super(GetEntities, self).get_queryset_page(queryset, offset, limit)
+
     def get_serializer_context(self):
         context = super(GetEntities, self).get_serializer_context()
         context.update(self.queryset_context)
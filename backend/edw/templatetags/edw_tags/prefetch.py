@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from classytags.core import Tag, Options
+
+from edw.rest.templatetags import BaseRetrieveDataTag, prefetch_tags
+
+
+class PrefetchData(Tag):
+    """
+    Предварительная выборка данных тегов списков внутри блока:
+        {% prefetch_data %}
+            {% get_entities data_mart_pk=1 as entities %}
+            {% get_data_marts limit=10 as data_marts %}
+            ...
+        {% endprefetch_data %}
+    Количество объектов всех тегов подсчитывается одним запросом, страницы объектов выбираются заранее.
+    """
+    name = 'prefetch_data'
+
+    options = Options(
+        blocks=[('endprefetch_data', 'nodelist')]
+    )
+
+    def render_tag(self, context, nodelist):
+        prefetch_tags(context, nodelist.get_nodes_by_type(BaseRetrieveDataTag))
+        return nodelist.render(context)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+from collections import namedtuple
+
+from django.test import SimpleTestCase
+
+from edw.models.boundary import BoundaryIndex, in_polygons
+
+
+_Boundary = namedtuple('_Boundary', ['id', 'term_id', 'raw_polygons'])
+
+
+class BoundaryIndexTestCase(SimpleTestCase):
+    # boundaries in lookup priority order: inner square overlaps outer square, triangle crosses grid cells
+    BOUNDARIES = [
+        _Boundary(1, 10, json.dumps([[[1.0, 1.0], [2.0, 1.0], [2.0, 2.0], [1.0, 2.0]]])),
+        _Boundary(2, 20, json.dumps([[[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0]],
+                                     [[10.0, 10.0], [12.0, 10.0], [12.0, 12.0], [10.0, 12.0]]])),
+        _Boundary(3, 30, json.dumps([[[3.5, 3.5], [7.25, 3.5], [5.0, 6.75]]])),
+        _Boundary(4, 40, 'not a json'),
+        _Boundary(5, 50, json.dumps([[[20.0, 20.0], [21.0, 21.0]]])),
+    ]
+
+    def setUp(self):
+        self.index = BoundaryIndex(self.BOUNDARIES, cell_size=0.5)
+        self.points = []
+        # regular grid including polygon vertices and points on the edges
+        for i in range(-2, 57):
+            for j in range(-2, 57):
+                self.points.append((i * 0.25, j * 0.25))
+        self.points.extend([(11.0, 11.0), (12.0, 11.0), (10.0, 10.0), (5.0, 3.5), (5.375, 5.125), (20.5, 20.5)])
+
+    def find_by_polygons(self, x, y, term_ids=None):
+        """
+        Lookup of the old `get_boundary`: test boundaries one by one in priority order
+        """
+        for boundary in self.BOUNDARIES:
+            if term_ids is not None and boundary.term_id not in term_ids:
+                continue
+            try:
+                polygons = json.loads(boundary.raw_polygons)
+            except ValueError:
+                continue
+            if in_polygons(x, y, [polygon for polygon in polygons if len(polygon) >= 3]):
+                return boundary.id
+        return None
+
+    def test_find(self):
+        for x, y in self.points:
+            self.assertEqual(self.index.find(x, y), self.find_by_polygons(x, y), (x, y))
+
+    def test_find_term_ids(self):
+        term_ids = {20, 30}
+        for x, y in self.points:
+            self.assertEqual(self.index.find(x, y, term_ids), self.find_by_polygons(x, y, term_ids), (x, y))
+
+    def test_find_many(self):
+        expected = [self.find_by_polygons(x, y) for x, y in self.points]
+        self.assertEqual(self.index.find_many(self.points), expected)
+        term_ids = {10, 30}
+        expected = [self.find_by_polygons(x, y, term_ids) for x, y in self.points]
+        self.assertEqual(self.index.find_many(self.points, term_ids), expected)
+
+    def test_priority(self):
+        self.assertEqual(self.index.find(1.5, 1.5), 1)
+        self.assertEqual(self.index.find(3.0, 3.0), 2)
+        self.assertEqual(self.index.find(11.0, 11.5), 2)
+        self.assertEqual(self.index.find(5.0, 5.0), 3)
+        self.assertIsNone(self.index.find(8.0, 8.0))
+
+    def test_invalid_boundaries_skipped(self):
+        self.assertEqual([entry[0] for entry in self.index.entries], [1, 2, 3])
+        self.assertIsNone(self.index.find(20.5, 20.5))
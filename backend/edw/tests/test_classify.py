@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from edw.search.classify import (
+    ElasticsearchMoreLikeThisBackend,
+    LocalMoreLikeThisBackend,
+    MoreLikeThisClassifier,
+    analyze_suggestions
+)
+
+
+def category(id, name, similar=True):
+    return json.dumps({'id': id, 'name': name, 'similar': similar}, ensure_ascii=False)
+
+
+class MoreLikeThisClassifierTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.backend = LocalMoreLikeThisBackend()
+        self.backend.add(1, "broken street light near the school", [category(10, "Lighting")], 'sample.problem')
+        self.backend.add(2, "street light is not working at night", [category(10, "Lighting")], 'sample.problem')
+        self.backend.add(3, "pothole on the road near the school", [category(20, "Roads")], 'sample.problem')
+        self.backend.add(4, "deep pothole damaged my car wheel", [category(20, "Roads")], 'sample.problem')
+        self.backend.add(5, "garbage is not collected", [category(30, "Garbage")], 'sample.other')
+        self.backend.add(6, "school light spam", [category(11, "Spam", similar=False)], 'sample.problem')
+        self.backend.add(7, "street light without category", [], 'sample.problem')
+        self.classifier = MoreLikeThisClassifier(backend=self.backend, cache_timeout=60)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_ids(self, suggestions):
+        return [x['category']['id'] for x in suggestions]
+
+    def test_classify(self):
+        suggestions = self.classifier.classify("The street light is broken")
+        # отрицательная категория последней
+        self.assertEqual(self.get_ids(suggestions), [10, 20, 11])
+        self.assertIn('light', suggestions[0]['words'])
+        self.assertIn('street', suggestions[0]['words'])
+        suggestions = self.classifier.classify("A pothole on the road")
+        self.assertEqual(self.get_ids(suggestions)[0], 20)
+        self.assertEqual(self.classifier.classify("Completely unrelated words"), [])
+
+    def test_negative_category(self):
+        suggestions = self.classifier.classify("spam")
+        self.assertEqual(self.get_ids(suggestions), [11])
+        self.assertLess(suggestions[0]['score'], 0)
+
+    def test_model_and_unlike(self):
+        self.assertEqual(self.classifier.classify("garbage collected", model='sample.problem'), [])
+        self.assertEqual(self.get_ids(self.classifier.classify("garbage", model='sample.other')), [30])
+        suggestions = self.classifier.classify("street light near the school", unlike="night")
+        hits = self.backend.search_many([{'like': "street light", 'unlike': "night"}])[0]['hits']['hits']
+        self.assertNotIn(2, [x['_id'] for x in hits])
+        self.assertEqual(self.get_ids(suggestions)[0], 10)
+
+    def test_classify_many(self):
+        queries = [{'like': "street light"}, {'like': "pothole"}, {'like': "street light"}, {'like': "nothing"}]
+        expected = [self.classifier.classify(**query) for query in queries]
+        cache.clear()
+        self.assertEqual(self.classifier.classify_many(queries), expected)
+
+    def test_cache(self):
+        queries = [{'like': "street light"}, {'like': "pothole", 'model': None}]
+        with mock.patch.object(self.backend, 'search_many', wraps=self.backend.search_many) as search_many:
+            first = self.classifier.classify_many(queries)
+            self.assertEqual(search_many.call_count, 1)
+            # все запросы из кэша
+            self.assertEqual(self.classifier.classify_many(queries), first)
+            self.assertEqual(search_many.call_count, 1)
+            # в бэкенд отправляются только отсутствующие в кэше запросы
+            self.classifier.classify_many(queries + [{'like': "garbage"}])
+            self.assertEqual(search_many.call_count, 2)
+            self.assertEqual(search_many.call_args[0][0], [{'like': "garbage"}])
+
+    def test_no_cache(self):
+        classifier = MoreLikeThisClassifier(backend=self.backend, cache_timeout=0)
+        with mock.patch.object(self.backend, 'search_many', wraps=self.backend.search_many) as search_many:
+            classifier.classify("street light")
+            classifier.classify("street light")
+            self.assertEqual(search_many.call_count, 2)
+
+    def test_elasticsearch_error(self):
+        hit = {'_id': '1', '_score': 2.0, '_source': {'categories': [category(10, "Lighting")], 'text': 'light'}}
+        responses = [
+            {'hits': {'total': 1, 'hits': [hit]}},
+            {'error': {'type': 'search_phase_execution_exception'}, 'status': 400},
+        ]
+        backend = mock.Mock()
+        backend.index_name = 'test'
+        backend.conn.msearch.return_value = {'responses': responses}
+        with mock.patch('edw.search.classify.connections', {'default': mock.Mock(**{
+                'get_backend.return_value': backend})}):
+            classifier = MoreLikeThisClassifier(backend=ElasticsearchMoreLikeThisBackend(), cache_timeout=60)
+            suggestions = classifier.classify_many([{'like': "light"}, {'like': "bad query"}])
+            self.assertEqual(self.get_ids(suggestions[0]), [10])
+            self.assertEqual(suggestions[1], [])
+            # ошибочный результат не кэшируется
+            backend.conn.msearch.return_value = {'responses': [{'hits': {'total': 1, 'hits': [hit]}}]}
+            self.assertEqual(self.get_ids(classifier.classify("bad query")), [10])
+
+    def test_analyze_suggestions_empty(self):
+        self.assertEqual(analyze_suggestions({'hits': {'total': 0, 'hits': []}}, "text"), [])
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+from django.test.client import RequestFactory
+from django.utils.http import http_date
+
+from edw.rest.viewsets import conditional_response
+from edw.utils.generation_counter_in_cache import GenerationCounter
+
+
+class Model(object):
+    GENERATION_CACHE_KEY = 'test_conditional_response'
+
+
+class View(object):
+    action = 'list'
+
+    def __init__(self):
+        self.calls = 0
+
+    @conditional_response(Model)
+    def list(self, request):
+        self.calls += 1
+        return HttpResponse('[]')
+
+
+class ConditionalResponseTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.view = View()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, **headers):
+        request = RequestFactory().get('/terms/', **headers)
+        request.user = AnonymousUser()
+        request.accepted_media_type = 'application/json'
+        return self.view.list(request)
+
+    def test_etag(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.view.calls, 1)
+        GenerationCounter.factory(Model.GENERATION_CACHE_KEY).incr()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        # без ETag ответ не проверяется по времени, оно не зависит от параметров запроса
+        response = self.get(HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
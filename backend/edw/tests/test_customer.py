@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from edw import settings as edw_settings
+from edw.models.customer import BaseCustomer, CustomerModel
+
+
+class CustomerLastAccessTestCase(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(edw_settings.CUSTOMER_LAST_ACCESS, {'resolution': 5, 'write_behind': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        BaseCustomer.get_last_access_buffer().clear()
+        self.start = timezone.now() - datetime.timedelta(days=1)
+        self.customers = []
+        for i in range(3):
+            user = get_user_model().objects.create(username='customer{}'.format(i))
+            customer = CustomerModel.objects.create(user=user)
+            CustomerModel.objects.filter(pk=customer.pk).update(last_access=self.start)
+            self.customers.append(CustomerModel.objects.get(pk=customer.pk))
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_last_access(self, customer):
+        return CustomerModel.objects.get(pk=customer.pk).last_access
+
+    def test_write_behind(self):
+        now = self.start + datetime.timedelta(hours=1)
+        self.assertTrue(self.customers[0].touch_last_access(now))
+        self.assertTrue(self.customers[1].touch_last_access(now))
+        # в пределах точности не записывается
+        self.assertFalse(self.customers[0].touch_last_access(now + datetime.timedelta(minutes=1)))
+        self.assertEqual(self.get_last_access(self.customers[0]), self.start)
+        self.assertEqual(BaseCustomer.flush_last_access(), 2)
+        self.assertEqual(self.get_last_access(self.customers[0]), now)
+        self.assertEqual(self.get_last_access(self.customers[1]), now)
+        self.assertEqual(self.get_last_access(self.customers[2]), self.start)
+        # все значения записаны
+        self.assertEqual(BaseCustomer.flush_last_access(), 0)
+
+    def test_dedup(self):
+        customer = self.customers[0]
+        for i in range(1, 5):
+            customer.touch_last_access(self.start + datetime.timedelta(hours=i))
+        keys = BaseCustomer.get_last_access_buffer().get_all()
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(len(set(keys)), 1)
+        self.assertEqual(BaseCustomer.flush_last_access(), 1)
+        self.assertEqual(self.get_last_access(customer), self.start + datetime.timedelta(hours=4))
+
+    def test_touch_during_flush(self):
+        first = self.start + datetime.timedelta(hours=1)
+        second = self.start + datetime.timedelta(hours=2)
+        self.customers[0].touch_last_access(first)
+        get_many = cache.get_many
+        key = BaseCustomer.LAST_ACCESS_CACHE_KEY_PATTERN.format(id=self.customers[0].pk)
+        calls = []
+
+        def concurrent_get_many(keys):
+            result = get_many(keys)
+            # кольцевой буфер также читает ключи из кэша, ждем чтения значений времени доступа
+            if key not in keys:
+                return result
+            if not calls:
+                # параллельный процесс обновляет значение и добавляет нового пользователя во время сброса
+                self.customers[0].touch_last_access(second)
+                self.customers[1].touch_last_access(second)
+            calls.append(keys)
+            return result
+
+        with mock.patch.object(cache, 'get_many', side_effect=concurrent_get_many):
+            self.assertEqual(BaseCustomer.flush_last_access(), 1)
+        self.assertEqual(self.get_last_access(self.customers[0]), first)
+        self.assertEqual(self.get_last_access(self.customers[1]), self.start)
+        # новые значения не потеряны
+        self.assertEqual(BaseCustomer.flush_last_access(), 2)
+        self.assertEqual(self.get_last_access(self.customers[0]), second)
+        self.assertEqual(self.get_last_access(self.customers[1]), second)
+        self.assertEqual(BaseCustomer.flush_last_access(), 0)
+
+    def test_buffer_overflow(self):
+        now = self.start + datetime.timedelta(hours=1)
+        buf = mock.Mock(empty=object())
+        buf.record.side_effect = [buf.empty, BaseCustomer.LAST_ACCESS_CACHE_KEY_PATTERN.format(
+            id=self.customers[0].pk)]
+        with mock.patch.object(BaseCustomer, 'get_last_access_buffer', return_value=buf):
+            self.customers[0].touch_last_access(now)
+            self.assertEqual(self.get_last_access(self.customers[0]), self.start)
+            self.customers[1].touch_last_access(now)
+        # вытесненное из буфера значение записано сразу
+        self.assertEqual(self.get_last_access(self.customers[0]), now)
+        self.assertEqual(self.get_last_access(self.customers[1]), self.start)
+
+    def test_write_through(self):
+        now = self.start + datetime.timedelta(hours=1)
+        with mock.patch.dict(edw_settings.CUSTOMER_LAST_ACCESS, {'write_behind': False}):
+            self.assertTrue(self.customers[0].touch_last_access(now))
+        self.assertEqual(self.get_last_access(self.customers[0]), now)
+        self.assertEqual(BaseCustomer.flush_last_access(), 0)
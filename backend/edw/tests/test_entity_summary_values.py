@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import skipUnless
+
+import mock
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from edw.models.entity import EntityModel, EntitySummaryValues
+from edw.rest.serializers.entity import EntitySummarySerializer
+
+
+def get_sandbox_models():
+    """
+    Return sandbox `Book` and `ChildBook` models or None if the project doesn't define them
+    """
+    book_model = EntityModel.materialized
+    try:
+        return book_model, apps.get_model(book_model._meta.app_label, 'childbook')
+    except LookupError:
+        return None
+
+
+@skipUnless(get_sandbox_models(), "Sandbox `Book` and `ChildBook` entity models are required")
+class EntitySummaryValuesTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # модель песочницы `ChildBook` с полем `my_age` в `RESTMeta.include`, наследник `Book`
+        self.book_model, self.child_book_model = get_sandbox_models()
+        # термины моделей создаются при запуске приложения в основной базе данных, создаем их в тестовой
+        patcher = mock.patch.multiple(self.book_model, create=True, _validate_term_model_cache={},
+                                      _added_days_cache=None, _added_months_cache=None, _added_years_cache={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.child_book_model.validate_term_model()
+
+        self.book_model.objects.create(name="Book 1")
+        self.child_book_model.objects.create(name="Child book", age=1)
+        self.book_model.objects.create(name="Book 2")
+        self.queryset = self.book_model.objects.order_by('id')
+        request = APIRequestFactory().get('/')
+        # покупатель устанавливается `CustomerMiddleware`, используется при рендеринге HTML сниппетов
+        request.customer = None
+        self.context = {'request': Request(request), 'data_mart': None}
+        patcher = mock.patch.object(EntitySummarySerializer, 'values_mode', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+
+    def render(self, page):
+        return JSONRenderer().render(EntitySummarySerializer(page, many=True, context=self.context).data)
+
+    def test_values_page(self):
+        page = EntitySummarySerializer.get_values_page(self.queryset, self.context)
+        # объект модели с полями `include` загружается как обычно
+        self.assertIs(type(page[1]), self.child_book_model)
+        self.assertTrue(all([isinstance(x, EntitySummaryValues) for x in page[::2]]))
+        # результат не зависит от режима выборки страницы
+        self.assertEqual(self.render(page), self.render(list(self.queryset)))
+
+    def test_data_mart_include(self):
+        self.context['data_mart'] = mock.Mock(entities_model=self.child_book_model)
+        self.assertIsNone(EntitySummarySerializer.get_values_page(self.queryset, self.context))
+        self.context['data_mart'] = mock.Mock(entities_model=self.book_model)
+        self.assertIsNotNone(EntitySummarySerializer.get_values_page(self.queryset, self.context))
+
+    def test_get_class(self):
+        get_for_model = ContentType.objects.get_for_model
+        self.assertIsNotNone(EntitySummaryValues.get_class(get_for_model(self.book_model).id))
+        self.assertIsNone(EntitySummaryValues.get_class(get_for_model(self.child_book_model).id))
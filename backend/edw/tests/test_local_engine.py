@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import mock
+
+from django.test import SimpleTestCase
+
+from haystack.backends import SQ
+
+from edw.search import local_engine
+from edw.search.classify import get_more_like_this
+from edw.search.local_engine import LocalIndex, LocalSearchBackend, LocalSearchQuery
+
+
+FIELDS_TYPES = {
+    'text': 'string',
+    'title': 'edge_ngram',
+    'category': 'string',
+    'tags': 'string',
+    'rating': 'integer',
+}
+
+TEXT_FIELDS = ['text', 'title']
+
+DOCUMENTS = [
+    ('sample.book', 1, {'text': "Red apple pie recipe", 'title': "Apple pie", 'category': "fiction", 'rating': 5,
+                        'tags': ["sweet", "baked"]}),
+    ('sample.book', 2, {'text': "Green apple salad", 'title': "Salad", 'category': "cooking", 'rating': 3}),
+    ('sample.book', 3, {'text': "Chocolate cake recipe, chocolate glaze", 'title': "Chocolate cake",
+                        'category': "cooking", 'rating': 4, 'tags': ["sweet"]}),
+    ('sample.book', 4, {'text': "Apple orchard history", 'title': "Orchards", 'category': "history"}),
+    ('sample.other', 5, {'text': "Apple", 'title': "Apple", 'category': "fiction", 'rating': 1}),
+]
+
+
+class LocalSearchBackendTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for patcher in [
+            mock.patch.object(LocalSearchBackend, 'get_fields_types', return_value=FIELDS_TYPES),
+            mock.patch.object(LocalSearchBackend, 'document_field', new_callable=mock.PropertyMock,
+                              return_value='text'),
+            mock.patch.object(local_engine, '_local_indexes', {}),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.backend = self.create_backend()
+        for model, pk, data in DOCUMENTS:
+            self.add(self.backend, model, pk, data)
+        self.query = LocalSearchQuery.__new__(LocalSearchQuery)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_backend(self, alias='default', path=None):
+        return LocalSearchBackend(alias, PATH=path)
+
+    def add(self, backend, model, pk, data):
+        identifier = '{}.{}'.format(model, pk)
+        data = dict(data, id=identifier, django_ct=model, django_id=str(pk))
+        backend.index.add(identifier, data, TEXT_FIELDS)
+
+    def search(self, query, **kwargs):
+        if isinstance(query, SQ):
+            query = self.query.build_node(query)
+        kwargs.setdefault('limit_to_registered_models', False)
+        return self.backend.search(query, **kwargs)
+
+    def get_ids(self, query, **kwargs):
+        return [int(x.pk) for x in self.search(query, **kwargs)['results']]
+
+    def assertFound(self, query, expected, **kwargs):
+        self.assertEqual(sorted(self.get_ids(query, **kwargs)), sorted(expected))
+
+    def test_content(self):
+        self.assertFound(SQ(content="apple"), [1, 2, 4, 5])
+        self.assertFound(SQ(content="apple recipe"), [1])
+        self.assertFound(SQ(content="apple -salad"), [1, 4, 5])
+        self.assertFound(SQ(content="banana"), [])
+        self.assertFound("apple pie", [1])
+        self.assertFound("*", [1, 2, 3, 4, 5])
+        # больший вес у документа с повторами слова
+        self.assertEqual(self.get_ids(SQ(content="recipe chocolate") | SQ(content="recipe")), [3, 1])
+
+    def test_ngram(self):
+        self.assertFound(SQ(title="choc"), [3])
+        self.assertFound(SQ(title="app p"), [1])
+        # prefixes work only for ngram fields
+        self.assertFound(SQ(content="choc"), [])
+
+    def test_and_or_not(self):
+        self.assertFound(SQ(content="apple") & SQ(category__exact="cooking"), [2])
+        self.assertFound(SQ(content="chocolate") | SQ(content="salad"), [2, 3])
+        self.assertFound(SQ(content="apple") & ~SQ(category__exact="fiction"), [2, 4])
+        self.assertFound(~SQ(content="apple"), [3])
+        self.assertFound((SQ(category__exact="cooking") | SQ(category__exact="history")) & ~SQ(rating__gte=4),
+                         [2, 4])
+
+    def test_exact_in_startswith(self):
+        self.assertFound(SQ(category__exact="Cooking"), [2, 3])
+        self.assertFound(SQ(category__exact='"fiction"'), [1, 5])
+        self.assertFound(SQ(tags__exact="baked"), [1])
+        self.assertFound(SQ(tags__exact="sweet"), [1, 3])
+        self.assertFound(SQ(category__in=["history", "fiction"]), [1, 4, 5])
+        self.assertFound(SQ(category__startswith="hist"), [4])
+
+    def test_range(self):
+        self.assertFound(SQ(rating__range=[3, 4]), [2, 3])
+        self.assertFound(SQ(rating__gte=4), [1, 3])
+        self.assertFound(SQ(rating__gt=4), [1])
+        self.assertFound(SQ(rating__lt=3), [5])
+        self.assertFound(SQ(rating__lte=3), [2, 5])
+
+    def test_narrow_queries(self):
+        self.assertFound(SQ(content="apple"), [2], narrow_queries=['category:(cooking)'])
+        self.assertFound("*", [1, 3], narrow_queries=['tags:(sweet)'])
+        self.assertFound("*", [3], narrow_queries=['tags:(sweet)', 'category:(cooking)'])
+
+    def test_sort(self):
+        self.assertEqual(self.get_ids("*", sort_by=['rating']), [5, 2, 3, 1, 4])
+        # документы без значения последние при любом направлении
+        self.assertEqual(self.get_ids("*", sort_by=['-rating']), [1, 3, 2, 5, 4])
+        self.assertEqual(self.get_ids("*", sort_by=['category', '-rating']), [3, 2, 1, 5, 4])
+
+    def test_offsets(self):
+        result = self.search("*", sort_by=['rating'], start_offset=1, end_offset=3)
+        self.assertEqual(result['hits'], 5)
+        self.assertEqual([int(x.pk) for x in result['results']], [2, 3])
+        self.assertEqual(result['results'][0].category, "cooking")
+        self.assertEqual(result['results'][0].model_name, "book")
+
+    def test_remove_and_clear(self):
+        self.backend.remove('sample.book.2')
+        self.assertFound(SQ(content="apple"), [1, 4, 5])
+        self.assertFound(SQ(title="sal"), [])
+        self.backend.index.clear({'sample.other'})
+        self.assertFound("*", [1, 3, 4])
+        self.backend.index.clear()
+        self.assertFound("*", [])
+
+    def test_suggest(self):
+        self.assertEqual(self.backend.suggest("app"), ["apple"])
+        self.assertEqual(self.backend.suggest("c"), ["cake", "chocolate"])
+        self.assertEqual(self.backend.suggest("ch", field='title'), ["chocolate"])
+
+    def test_more_like_this(self):
+        results = self.backend.search_many([{'like': "apple pie"}, {'like': "apple", 'model': 'sample.other'}])
+        self.assertEqual(results[0]['hits']['hits'][0]['_id'], 'sample.book.1')
+        self.assertEqual([x['_id'] for x in results[1]['hits']['hits']], ['sample.other.5'])
+        with mock.patch('edw.search.classify.connections', {'default': mock.Mock(**{
+                'get_backend.return_value': self.backend})}):
+            result = get_more_like_this("chocolate", unlike="salad")
+        self.assertEqual([x['_id'] for x in result['hits']['hits']], ['sample.book.3'])
+
+    def test_persistence(self):
+        path = os.path.join(self.tmp_dir, 'index.pickle')
+        backend = self.create_backend('persistent', path)
+        for model, pk, data in DOCUMENTS:
+            self.add(backend, model, pk, data)
+        backend.index.save()
+        backend.remove('sample.book.2')
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.listdir(self.tmp_dir), ['index.pickle'])
+
+        index = LocalIndex(path)
+        self.assertEqual(index.documents, backend.index.documents)
+        self.assertEqual(index.postings, backend.index.postings)
+        self.assertEqual(index.lengths, backend.index.lengths)
+        self.assertEqual(index.total_lengths, backend.index.total_lengths)
+        self.assertNotIn('sample.book.2', index.documents)
+        self.assertEqual(index.suggest('text', 'ch'), ["chocolate"])
+        self.assertEqual(LocalIndex(os.path.join(self.tmp_dir, 'missing.pickle')).documents, {})
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import random
+import sqlite3
+
+import pymorton as pm
+from django.test import SimpleTestCase
+
+from edw.models.fields.morton import MortonRangesMatchedLookup, split_range_by_length
+from edw.models.fields.morton.order2D import get_ranges, geo_to_args, get_geo_ranges
+
+
+class _Column(object):
+    pass
+
+
+class _Compiler(object):
+
+    def compile(self, node):
+        return '"t"."code"', []
+
+
+def in_ranges(code, ranges):
+    return any(start <= code <= stop for start, stop in ranges)
+
+
+class SplitRangeByLengthTestCase(SimpleTestCase):
+
+    def test_split(self):
+        self.assertEqual(split_range_by_length(5, 7), [(5, 7, 1)])
+        self.assertEqual(split_range_by_length(5, 12), [(5, 9, 1), (10, 12, 2)])
+        self.assertEqual(split_range_by_length(0, 1000), [(0, 9, 1), (10, 99, 2), (100, 999, 3), (1000, 1000, 4)])
+        self.assertEqual(split_range_by_length(7, 6), [])
+
+    def test_cover(self):
+        for start, stop in [(0, 0), (9, 10), (95, 1234), (99999, 100001)]:
+            values = []
+            for lower, upper, length in split_range_by_length(start, stop):
+                self.assertEqual(len(str(lower)), length)
+                self.assertEqual(len(str(upper)), length)
+                values.extend(range(lower, upper + 1))
+            self.assertEqual(values, list(range(start, stop + 1)))
+
+
+class GetRangesTestCase(SimpleTestCase):
+    BITS = 4
+
+    def setUp(self):
+        self.random = random.Random(32)
+        size = 1 << self.BITS
+        self.points = [(x, y) for x in range(size) for y in range(size)]
+
+    def random_rect(self):
+        size = 1 << self.BITS
+        x = sorted([self.random.randrange(size), self.random.randrange(size)])
+        y = sorted([self.random.randrange(size), self.random.randrange(size)])
+        return x[0], y[0], x[1], y[1]
+
+    def assertNormalized(self, ranges):
+        for (start, stop), (next_start, next_stop) in zip(ranges, ranges[1:]):
+            self.assertLessEqual(start, stop)
+            # отсортированы, не пересекаются и не соседствуют
+            self.assertLess(stop + 1, next_start)
+
+    def test_exact(self):
+        for _i in range(200):
+            x_min, y_min, x_max, y_max = rect = self.random_rect()
+            ranges = get_ranges(*rect, bits=self.BITS, max_ranges=1 << 2 * self.BITS)
+            self.assertNormalized(ranges)
+            for x, y in self.points:
+                inside = x_min <= x <= x_max and y_min <= y <= y_max
+                self.assertEqual(in_ranges(pm.interleave2(x, y), ranges), inside, (rect, x, y))
+
+    def test_max_ranges(self):
+        for max_ranges in (4, 5, 8, 16):
+            for _i in range(100):
+                x_min, y_min, x_max, y_max = rect = self.random_rect()
+                ranges = get_ranges(*rect, bits=self.BITS, max_ranges=max_ranges)
+                self.assertNormalized(ranges)
+                self.assertLessEqual(len(ranges), max_ranges)
+                # все точки прямоугольника покрыты, лишние допустимы
+                for x, y in self.points:
+                    if x_min <= x <= x_max and y_min <= y <= y_max:
+                        self.assertTrue(in_ranges(pm.interleave2(x, y), ranges), (rect, max_ranges, x, y))
+
+    def test_whole(self):
+        size = 1 << self.BITS
+        self.assertEqual(get_ranges(0, 0, size - 1, size - 1, bits=self.BITS), [(0, size * size - 1)])
+        self.assertEqual(get_ranges(3, 5, 3, 5, bits=self.BITS), [(pm.interleave2(3, 5), pm.interleave2(3, 5))])
+
+    def test_geo(self):
+        self.assertEqual(geo_to_args(-180, -90, bits=8), (0, 0))
+        self.assertEqual(geo_to_args(180, 90, bits=8), (255, 255))
+        self.assertEqual(geo_to_args(200, -100, bits=8), (255, 0))
+        x, y = geo_to_args(37.6, 55.75)
+        ranges = get_geo_ranges(37.5, 55.7, 37.7, 55.8)
+        self.assertTrue(in_ranges(pm.interleave2(x, y), ranges))
+        x, y = geo_to_args(30.3, 59.9)
+        self.assertFalse(in_ranges(pm.interleave2(x, y), ranges))
+
+
+class MortonRangesLookupTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.random = random.Random(32)
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute('CREATE TABLE t (code VARCHAR(255))')
+        # коды разной длины: строковое сравнение отличается от числового
+        self.codes = sorted(set(list(range(0, 1200)) + [self.random.randrange(10 ** 7) for _i in range(2000)]))
+        self.connection.executemany('INSERT INTO t (code) VALUES (?)', [(str(code),) for code in self.codes])
+
+    def tearDown(self):
+        self.connection.close()
+
+    def select(self, ranges):
+        lookup = MortonRangesMatchedLookup(_Column(), ranges)
+        sql, params = lookup.as_sql(_Compiler(), None)
+        cursor = self.connection.execute('SELECT code FROM "t" WHERE {}'.format(sql.replace('%s', '?')), params)
+        return sorted(int(row[0]) for row in cursor)
+
+    def test_lookup(self):
+        for _i in range(50):
+            ranges = []
+            for _j in range(self.random.randrange(1, 5)):
+                start = self.random.randrange(10 ** self.random.randrange(1, 8))
+                ranges.append((start, start + self.random.randrange(10 ** self.random.randrange(1, 7))))
+            expected = [code for code in self.codes if in_ranges(code, ranges)]
+            self.assertEqual(self.select(ranges), expected, ranges)
+
+    def test_string_ranges(self):
+        self.assertEqual(self.select([('8', '12')]), [8, 9, 10, 11, 12])
+
+    def test_empty(self):
+        self.assertEqual(self.select([]), [])
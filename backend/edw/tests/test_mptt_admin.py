@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+import mock
+
+from django.contrib.admin import AdminSite
+from django.test import RequestFactory, SimpleTestCase
+
+from edw.admin.mptt.tree import EdwMpttAdmin
+from edw.models.defaults.term import Term
+
+
+class EdwMpttAdminTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.admin = EdwMpttAdmin(Term, AdminSite())
+        self.factory = RequestFactory()
+        patcher = mock.patch.object(EdwMpttAdmin, 'get_queryset', return_value=Term.objects.none())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_node_param(self):
+        response = self.admin.tree_json_view(self.factory.get('/', {'node': 'abc'}))
+        self.assertEqual(response.status_code, 400)
+        response = self.admin.tree_json_view(self.factory.get('/', {'node': '1'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode('utf-8')), [])
+
+    def test_node_version(self):
+        term = Term(id=1, name="Term", slug='term', path='term', active=True, tree_id=1, lft=1, rght=2, level=0,
+                    system_flags=0)
+        version = EdwMpttAdmin.get_node_version(term)
+        # перестроение дерева не меняет отображение узла
+        term.tree_id, term.lft, term.rght = 3, 5, 6
+        self.assertEqual(EdwMpttAdmin.get_node_version(term), version)
+        term.active = False
+        self.assertNotEqual(EdwMpttAdmin.get_node_version(term), version)
+        term.active = True
+        term.name = "Other"
+        self.assertNotEqual(EdwMpttAdmin.get_node_version(term), version)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import mock
+
+from django.test import SimpleTestCase
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from edw.rest.pagination import EDWLimitOffsetPagination
+
+
+class Pagination(EDWLimitOffsetPagination):
+    default_limit = 3
+    max_limit = 10
+
+
+class View(object):
+
+    def __init__(self, items):
+        self.items = items
+        self.get_queryset_count = mock.Mock(side_effect=len)
+        self.get_queryset_page = mock.Mock(side_effect=lambda queryset, offset, limit: queryset[offset:offset + limit])
+
+
+class SkipCountPaginationTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.items = list(range(7))
+
+    def paginate(self, params, pagination_class=Pagination):
+        paginator = pagination_class()
+        view = View(self.items)
+        request = Request(self.factory.get('/api/entities/', params))
+        page = paginator.paginate_queryset(self.items, request, view=view)
+        return paginator, view, page, paginator.get_paginated_response(page).data
+
+    def test_skip_count(self):
+        paginator, view, page, data = self.paginate({'skip_count': '1', 'offset': 3})
+        # выбирается на один объект больше, количество не подсчитывается
+        view.get_queryset_page.assert_called_once_with(self.items, 3, 4)
+        self.assertFalse(view.get_queryset_count.called)
+        self.assertEqual(page, [3, 4, 5])
+        self.assertIsNone(data['count'])
+        self.assertTrue(data['has_next'])
+        self.assertIn('offset=6', data['next'])
+        self.assertIn('skip_count=1', data['next'])
+        self.assertIsNotNone(data['previous'])
+        self.assertFalse(paginator.display_page_controls)
+
+    def test_skip_count_last_page(self):
+        paginator, view, page, data = self.paginate({'skip_count': 'true', 'offset': 6})
+        self.assertEqual(page, [6])
+        self.assertIsNone(data['count'])
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next'])
+        # ровно заполненная последняя страница
+        paginator, view, page, data = self.paginate({'skip_count': '1', 'offset': 4})
+        self.assertEqual(page, [4, 5, 6])
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next'])
+
+    def test_count(self):
+        paginator, view, page, data = self.paginate({'offset': 3})
+        view.get_queryset_page.assert_called_once_with(self.items, 3, 3)
+        self.assertEqual(data['count'], 7)
+        self.assertTrue(data['has_next'])
+        self.assertIn('offset=6', data['next'])
+        paginator, view, page, data = self.paginate({'offset': 6, 'skip_count': '0'})
+        self.assertEqual(data['count'], 7)
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next'])
+
+    def test_class_default(self):
+        class SkipCountPagination(Pagination):
+            skip_count = True
+
+        paginator, view, page, data = self.paginate({}, SkipCountPagination)
+        self.assertIsNone(data['count'])
+        self.assertTrue(data['has_next'])
+        paginator, view, page, data = self.paginate({'skip_count': 'false'}, SkipCountPagination)
+        self.assertEqual(data['count'], 7)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import mock
+
+from django.test import SimpleTestCase
+
+from edw.models.mixins.entity.place import PlaceMixin
+from edw.utils.geo import GeocoderException
+
+
+class Entity(object):
+
+    def validate_terms(self, origin, **kwargs):
+        pass
+
+
+class Place(PlaceMixin, Entity):
+
+    def __init__(self):
+        self.geoposition = mock.Mock(longitude=37.6, latitude=55.7)
+        self.terms = mock.Mock()
+
+
+class PlaceValidateTermsTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.zone = mock.Mock()
+        self.zone.term.id = 5
+        self.zone.term.is_leaf_node.return_value = True
+
+    def test_geocoder_error(self):
+        place = Place()
+        with mock.patch('edw.models.mixins.entity.place.get_zones_from_cache',
+                        side_effect=GeocoderException("Geocoder is not configured")), \
+                mock.patch('edw.models.mixins.entity.place.get_boundary', return_value=self.zone) as get_boundary, \
+                mock.patch('edw.models.mixins.entity.place.zone_changed') as zone_changed:
+            place.validate_terms(None, context={'validate_place': True})
+        # при ошибке геокодера зона определяется по границам
+        get_boundary.assert_called_once_with(37.6, 55.7)
+        place.terms.add.assert_called_once_with(5)
+        self.assertTrue(zone_changed.send.called)
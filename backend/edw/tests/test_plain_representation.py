@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from edw.rest.renderers import FastJSONEncoder, FastJSONRenderer
+from edw.rest.serializers.plain import PlainRepresentationSerializerMixin
+
+
+class Item(object):
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class ValueSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    values = serializers.ListField(child=serializers.CharField())
+
+
+class ItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    created_at = serializers.DateTimeField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    parent = serializers.CharField(allow_null=True)
+    password = serializers.CharField(write_only=True)
+    characteristics = ValueSerializer(many=True)
+    extra = serializers.SerializerMethodField()
+
+    def get_extra(self, item):
+        return {'size': item.id}
+
+
+class PlainValueSerializer(PlainRepresentationSerializerMixin, ValueSerializer):
+    plain_representation = True
+
+
+class PlainItemSerializer(PlainRepresentationSerializerMixin, ItemSerializer):
+    plain_representation = True
+
+    characteristics = PlainValueSerializer(many=True)
+
+
+class PlainRepresentationTestCase(SimpleTestCase):
+
+    def setUp(self):
+        now = timezone.now().replace(microsecond=0)
+        self.items = [Item(id=i, name="Item {}".format(i), created_at=now - datetime.timedelta(days=i),
+                           price=decimal.Decimal('1.5') * i, parent=None if i % 2 else "root", password='secret',
+                           characteristics=[Item(name="color", values=["red", "blue"])]) for i in range(3)]
+
+    def test_representation(self):
+        expected = ItemSerializer(self.items, many=True).data
+        data = PlainItemSerializer(self.items, many=True).data
+        self.assertIs(type(data[0]), dict)
+        self.assertIs(type(data[0]['characteristics'][0]), dict)
+        self.assertEqual(data, json.loads(json.dumps(expected)))
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            self.assertEqual(json.loads(renderer.render(data).decode('utf-8')),
+                             json.loads(JSONRenderer().render(expected).decode('utf-8')))
+
+    def test_disabled(self):
+        class Serializer(PlainItemSerializer):
+            plain_representation = False
+
+        data = Serializer(self.items[0]).data
+        # используется представление сериалайзера DRF
+        self.assertIsInstance(data, OrderedDict)
+        self.assertIsInstance(data['characteristics'][0], dict)
+        self.assertEqual(list(data.keys()), ['id', 'name', 'created_at', 'price', 'parent', 'characteristics',
+                                             'extra'])
+
+
+class FastJSONEncoderTestCase(SimpleTestCase):
+
+    def test_register(self):
+        class Encoder(FastJSONEncoder):
+            pass
+
+        class SubEncoder(Encoder):
+            pass
+
+        self.assertIs(FastJSONEncoder.get_encode_function(decimal.Decimal), float)
+        self.assertIs(SubEncoder.get_encode_function(decimal.Decimal), float)
+        Encoder.register(decimal.Decimal, str)
+        # таблица базового класса не изменяется, таблица потомка сбрасывается
+        self.assertIs(FastJSONEncoder.get_encode_function(decimal.Decimal), float)
+        self.assertIs(Encoder.get_encode_function(decimal.Decimal), str)
+        self.assertIs(SubEncoder.get_encode_function(decimal.Decimal), str)
+        self.assertEqual(json.loads(Encoder().encode([decimal.Decimal('1.50')])), ['1.50'])
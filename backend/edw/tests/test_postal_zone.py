@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+
+from django.test import SimpleTestCase
+
+from edw.models.postal_zone import BasePostZone, PostalZoneMatcher
+
+
+class _Zone(object):
+    codes_pattern = BasePostZone.__dict__['codes_pattern']
+    code_pattern = BasePostZone.__dict__['code_pattern']
+    is_postal_code_match = BasePostZone.__dict__['is_postal_code_match']
+
+    def __init__(self, id, term_id, postal_codes):
+        self.id, self.term_id, self.postal_codes = id, term_id, postal_codes
+
+
+class PostalZoneMatcherTestCase(SimpleTestCase):
+
+    def setUp(self):
+        # зон больше, чем групп в одном выражении, шаблоны пересекаются, порядок списка - приоритет
+        self.zones = []
+        for i in range(1, 251):
+            if i % 50 == 0:
+                postal_codes = '{:03d}*'.format(i // 50)
+            elif i % 7 == 0:
+                postal_codes = '{:03d}?{}  9_9??'.format(i, i % 10)
+            else:
+                postal_codes = '{:03d}*\n{:03d}99'.format(i, i + 500)
+            self.zones.append(_Zone(i, 1000 + i % 20, postal_codes))
+        self.zones.extend([
+            _Zone(300, 1300, ''),
+            _Zone(301, 1301, '   '),
+            _Zone(302, 1302, '12( 13'),
+            _Zone(303, 1303, '*'),
+        ])
+        self.matcher = PostalZoneMatcher(self.zones)
+        self.postcodes = ['', 'abc', '9 911', '9  9ab', '99']
+        for i in range(0, 800):
+            self.postcodes.extend(['{:03d}'.format(i), '{:03d}123'.format(i), '{:03d}99'.format(i),
+                                   '{:03d}0{}'.format(i, i % 10), '{:03d}0{}1'.format(i, i % 10)])
+
+    def find_by_zones(self, postcode, term_ids=None):
+        """
+        Lookup of the old `get_postal_zone`: test zones one by one in priority order
+        """
+        for zone in self.zones:
+            if term_ids is not None and zone.term_id not in term_ids:
+                continue
+            if not zone.postal_codes or not zone.postal_codes.strip():
+                continue
+            try:
+                if zone.is_postal_code_match(postcode):
+                    return zone.id
+            except re.error:
+                continue
+        return None
+
+    def test_chunks(self):
+        self.assertEqual(len(self.matcher.entries), 251)
+        self.assertEqual(len(self.matcher.patterns), 3)
+
+    def test_find(self):
+        for postcode in self.postcodes:
+            self.assertEqual(self.matcher.find(postcode), self.find_by_zones(postcode), postcode)
+
+    def test_find_term_ids(self):
+        term_ids = {1000, 1007, 1013, 1303}
+        for postcode in self.postcodes:
+            self.assertEqual(self.matcher.find(postcode, term_ids), self.find_by_zones(postcode, term_ids), postcode)
+
+    def test_find_many(self):
+        postcodes = self.postcodes + self.postcodes[::3]
+        self.assertEqual(self.matcher.find_many(postcodes), [self.find_by_zones(x) for x in postcodes])
+        term_ids = {1001, 1010}
+        self.assertEqual(self.matcher.find_many(postcodes, term_ids),
+                         [self.find_by_zones(x, term_ids) for x in postcodes])
+
+    def test_priority(self):
+        # первая зона в списке выигрывает, в том числе на границе групп выражений
+        self.assertEqual(self.matcher.find('050123'), 303)
+        self.assertEqual(self.matcher.find('001123'), 1)
+        self.assertEqual(self.matcher.find('090123'), 90)
+        self.assertEqual(self.matcher.find('092123'), 92)
+        self.assertEqual(self.matcher.find('181123'), 181)
+        self.assertEqual(self.matcher.find('xyz'), 303)
+
+    def test_empty(self):
+        matcher = PostalZoneMatcher([])
+        self.assertIsNone(matcher.find('123'))
+        self.assertEqual(matcher.find_many(['1', '2']), [None, None])
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from edw.models.defaults.term import Term
+from edw.signals.mptt import tree_batch_done
+
+
+class RebuildTreeTestCase(TestCase):
+
+    def create(self, slug, parent=None):
+        return Term.objects.create(name=slug, slug=slug, parent=parent, system_flags=0)
+
+    def get_tree(self, queryset=None):
+        queryset = Term.objects.all() if queryset is None else queryset
+        return dict((x[0], x[1:]) for x in queryset.values_list('slug', 'tree_id', 'lft', 'rght', 'level'))
+
+    def setUp(self):
+        self.root1 = self.create('root1')
+        self.a = self.create('a', self.root1)
+        self.b = self.create('b', self.root1)
+        self.c = self.create('c', self.root1)
+        self.c1 = self.create('c1', self.c)
+        self.root2 = self.create('root2')
+        self.d = self.create('d', self.root2)
+        self.e = self.create('e', self.root2)
+        # ручной порядок отличается от порядка создания
+        Term.objects.get(pk=self.c.pk).move_to(Term.objects.get(pk=self.a.pk), 'left')
+        Term.objects.get(pk=self.e.pk).move_to(Term.objects.get(pk=self.d.pk), 'left')
+        self.expected = {
+            'root1': (1, 1, 10, 0),
+            'c': (1, 2, 5, 1),
+            'c1': (1, 3, 4, 2),
+            'a': (1, 6, 7, 1),
+            'b': (1, 8, 9, 1),
+            'root2': (2, 1, 6, 0),
+            'e': (2, 2, 3, 1),
+            'd': (2, 4, 5, 1),
+        }
+
+    def spoil(self, queryset):
+        # сохраняем относительный порядок lft, остальные поля портим
+        for pk, lft in queryset.values_list('pk', 'lft'):
+            Term.objects.filter(pk=pk).update(lft=lft * 10 + 7, rght=1, level=9)
+
+    def test_rebuild(self):
+        self.assertEqual(self.get_tree(), self.expected)
+        self.spoil(Term.objects.all())
+        Term.objects.filter(pk=self.root2.pk).update(tree_id=7)
+        Term.objects.filter(tree_id=2).update(tree_id=7)
+        Term.objects.rebuild2()
+        self.assertEqual(self.get_tree(), self.expected)
+        self.assertEqual([x.slug for x in Term.objects.get(pk=self.root1.pk).get_descendants()],
+                         ['c', 'c1', 'a', 'b'])
+
+    def test_rebuild_tree_ids(self):
+        self.spoil(Term.objects.all())
+        spoiled = self.get_tree(Term.objects.filter(tree_id=2))
+        Term.objects.rebuild2(tree_ids=[1])
+        tree = self.get_tree()
+        self.assertEqual(dict((k, v) for k, v in tree.items() if v[0] == 1),
+                         dict((k, v) for k, v in self.expected.items() if v[0] == 1))
+        # остальные деревья не изменяются
+        self.assertEqual(dict((k, v) for k, v in tree.items() if v[0] == 2), spoiled)
+        Term.objects.rebuild2(tree_ids=[2])
+        self.assertEqual(self.get_tree(), self.expected)
+
+    def test_rebuild_unchanged(self):
+        with CaptureQueriesContext(connection) as queries:
+            Term.objects.rebuild2()
+        # неизмененные узлы не записываются
+        self.assertFalse([x for x in queries.captured_queries if x['sql'].startswith('UPDATE')])
+        self.assertEqual(self.get_tree(), self.expected)
+        # поля `order_insertion_by` вставляемых узлов не учитываются при сравнении
+        with CaptureQueriesContext(connection) as queries:
+            Term.objects.rebuild2(tree_ids=[1], insert_ids=set([self.c1.pk]))
+        self.assertFalse([x for x in queries.captured_queries if x['sql'].startswith('UPDATE')])
+        self.assertEqual(self.get_tree(), self.expected)
+
+
+class BulkMoveToTestCase(TestCase):
+
+    def create(self, slug, parent=None):
+        return Term.objects.create(name=slug, slug=slug, parent=parent, system_flags=0)
+
+    def get_tree(self):
+        return dict((x[0], x[1:]) for x in Term.objects.values_list('slug', 'tree_id', 'lft', 'rght', 'level'))
+
+    def setUp(self):
+        self.target = self.create('target')
+        self.a = self.create('a', self.target)
+        self.source = self.create('source')
+        self.s1 = self.create('s1', self.source)
+        self.b = self.create('b', self.target)
+        self.s2 = self.create('s2', self.source)
+        self.x = self.create('x', self.s2)
+        # ручной порядок детей `target` отличается от порядка создания
+        Term.objects.get(pk=self.b.pk).move_to(Term.objects.get(pk=self.a.pk), 'left')
+
+    def test_move(self):
+        received = []
+
+        def receiver(sender, **kwargs):
+            received.append(kwargs)
+
+        tree_batch_done.connect(receiver, sender=Term)
+        self.addCleanup(tree_batch_done.disconnect, receiver, sender=Term)
+        ids = Term.objects.bulk_move_to([self.s2.pk, self.s1.pk, self.a.pk, self.target.pk], self.target)
+        # дети и предки `target` пропускаются
+        self.assertEqual(sorted(ids), sorted([self.s1.pk, self.s2.pk]))
+        # перенесенные узлы размещаются по дате создания, порядок остальных сохраняется
+        self.assertEqual([x.slug for x in Term.objects.get(pk=self.target.pk).get_children()],
+                         ['s1', 'b', 'a', 's2'])
+        self.assertEqual(self.get_tree(), {
+            'target': (1, 1, 12, 0),
+            's1': (1, 2, 3, 1),
+            'b': (1, 4, 5, 1),
+            'a': (1, 6, 7, 1),
+            's2': (1, 8, 11, 1),
+            'x': (1, 9, 10, 2),
+            'source': (2, 1, 2, 0),
+        })
+        self.assertEqual(Term.objects.get(pk=self.s2.pk).path, 'target/s2')
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]['ids'], set(ids))
+        self.assertEqual(received[0]['parent_ids'], set([self.source.pk, self.target.pk]))
+
+    def test_move_nothing(self):
+        self.assertEqual(Term.objects.bulk_move_to([self.a.pk], self.target), [])
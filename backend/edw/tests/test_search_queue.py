@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import mock
+
+from django.test import TestCase
+
+from haystack.utils import get_model_ct, loading
+
+from edw.models.defaults.search_queue import SearchIndexQueue
+from edw.models.entity import EntityModel
+from edw.models.search_queue import BaseSearchIndexQueue
+from edw.models.term import TermModel
+
+
+UPDATE, DELETE = BaseSearchIndexQueue.ACTION_UPDATE, BaseSearchIndexQueue.ACTION_DELETE
+
+
+class SearchIndexQueueTestCase(TestCase):
+
+    def setUp(self):
+        self.entity_model = get_model_ct(EntityModel.materialized)
+        self.term_model = get_model_ct(TermModel.materialized)
+
+    def get_queue(self):
+        return sorted(SearchIndexQueue.objects.values_list('model', 'object_id', 'action'))
+
+    def process(self, **kwargs):
+        """
+        Process queue, return list of applied operations
+        """
+        applied = []
+        with mock.patch.object(BaseSearchIndexQueue, 'apply', side_effect=lambda x: applied.append(x)):
+            kwargs.setdefault('delay', 0)
+            BaseSearchIndexQueue.process(**kwargs)
+        return applied
+
+    def test_enqueue_dedup(self):
+        SearchIndexQueue.enqueue(EntityModel.materialized, [1, 2, 2, 3])
+        SearchIndexQueue.enqueue(self.entity_model, [3, 4])
+        SearchIndexQueue.enqueue(self.entity_model, [2], DELETE)
+        SearchIndexQueue.enqueue(self.entity_model, [])
+        self.assertEqual(self.get_queue(), [
+            (self.entity_model, 1, UPDATE),
+            (self.entity_model, 2, DELETE),
+            (self.entity_model, 3, UPDATE),
+            (self.entity_model, 4, UPDATE),
+        ])
+
+    def test_enqueue_debounce(self):
+        SearchIndexQueue.enqueue(self.entity_model, [1, 2])
+        entry = SearchIndexQueue.objects.get(object_id=1)
+        SearchIndexQueue.enqueue(self.entity_model, [1], DELETE)
+        updated = SearchIndexQueue.objects.get(object_id=1)
+        self.assertEqual(updated.id, entry.id)
+        self.assertGreater(updated.updated_at, entry.updated_at)
+
+    def test_process_coalesce_terms(self):
+        SearchIndexQueue.enqueue(self.entity_model, [1, 2])
+        SearchIndexQueue.enqueue(self.entity_model, [3], DELETE)
+        SearchIndexQueue.enqueue(self.term_model, [10, 11])
+        entities_by_terms = {self.entity_model: {2, 3, 5, 6}}
+        with mock.patch.object(BaseSearchIndexQueue, 'get_entities_by_terms',
+                               return_value=entities_by_terms) as get_entities_by_terms:
+            applied = self.process()
+        get_entities_by_terms.assert_called_once_with({10, 11})
+        # объекты терминов объединены с обновлениями, удаляемые объекты не обновляются
+        self.assertEqual(applied, [{
+            (self.entity_model, UPDATE): {1, 2, 5, 6},
+            (self.entity_model, DELETE): {3},
+        }])
+        self.assertEqual(self.get_queue(), [])
+
+    def test_process_batches(self):
+        SearchIndexQueue.enqueue(self.entity_model, range(1, 8))
+        with mock.patch.object(BaseSearchIndexQueue, 'get_entities_by_terms', return_value={}):
+            applied = self.process(batch_size=3)
+        self.assertEqual(len(applied), 3)
+        self.assertEqual(set().union(*[x[(self.entity_model, UPDATE)] for x in applied]), set(range(1, 8)))
+        self.assertEqual(self.get_queue(), [])
+
+    def test_process_delay(self):
+        SearchIndexQueue.enqueue(self.entity_model, [1])
+        with mock.patch.object(BaseSearchIndexQueue, 'get_entities_by_terms', return_value={}):
+            applied = self.process(delay=3600)
+        self.assertEqual(applied, [])
+        self.assertEqual(self.get_queue(), [(self.entity_model, 1, UPDATE)])
+
+    def test_process_keeps_changed_entries(self):
+        SearchIndexQueue.enqueue(self.entity_model, [1, 2])
+
+        def apply(operations):
+            # объект изменен во время обработки пакета
+            SearchIndexQueue.enqueue(self.entity_model, [2], DELETE)
+            SearchIndexQueue.enqueue(self.entity_model, [3])
+
+        with mock.patch.object(BaseSearchIndexQueue, 'get_entities_by_terms', return_value={}):
+            with mock.patch.object(BaseSearchIndexQueue, 'apply', side_effect=apply):
+                BaseSearchIndexQueue.process(delay=0)
+        self.assertEqual(self.get_queue(), [
+            (self.entity_model, 2, DELETE),
+            (self.entity_model, 3, UPDATE),
+        ])
+
+    def test_process_simple_backend(self):
+        connections = loading.ConnectionHandler({
+            'default': {'ENGINE': 'haystack.backends.simple_backend.SimpleEngine'},
+        })
+        SearchIndexQueue.enqueue(self.entity_model, [1, 2])
+        SearchIndexQueue.enqueue(self.entity_model, [3], DELETE)
+        SearchIndexQueue.enqueue('edw.unknown', [1])
+        with mock.patch('edw.models.search_queue.connections', connections):
+            self.assertEqual(BaseSearchIndexQueue.process(delay=0), 4)
+        self.assertEqual(self.get_queue(), [])
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from edw.models.defaults.term import Term
+from edw.rest.pagination import EDWLimitOffsetPagination
+from edw.rest.templatetags import BaseRetrieveDataTag, Request, get_queryset_key, prefetch_tags
+
+
+class Pagination(EDWLimitOffsetPagination):
+    default_limit = 2
+    max_limit = 10
+
+
+class ListTag(BaseRetrieveDataTag):
+    action = 'list'
+    pagination_class = Pagination
+
+    def __init__(self, queryset, query_string=''):
+        self.queryset = queryset
+        self.query_string = query_string
+
+    def prefetch(self, context):
+        self.request = Request(context['request'], query_params=QueryDict(self.query_string))
+        skip_count = self.paginator.get_skip_count(self.request)
+        limit = self.paginator.get_limit(self.request)
+        return (self.queryset, self.paginator.get_offset(self.request), limit + 1 if skip_count else limit,
+                not skip_count)
+
+
+class SkipCountTagTestCase(TestCase):
+
+    def setUp(self):
+        for i in range(5):
+            Term.objects.create(name='term{}'.format(i), slug='term{}'.format(i), system_flags=0)
+        self.queryset = Term.objects.order_by('id')
+        self.context = {'request': RequestFactory().get('/')}
+
+    def paginate(self, tag):
+        tag.prefetch(self.context)
+        page = tag.paginate_queryset(tag.queryset)
+        return page, tag.get_paginated_data([x.slug for x in page])
+
+    def test_prefetch(self):
+        skip_count = ListTag(self.queryset, 'skip_count=1')
+        counted = ListTag(self.queryset.filter(active=True))
+        with CaptureQueriesContext(connection) as queries:
+            prefetch_tags(self.context, [skip_count, counted])
+        memo = self.context['request']._edw_render_memo
+        # количество подсчитывается только для тега без `skip_count`
+        self.assertEqual(list(memo['counts'].keys()), [get_queryset_key(counted.queryset)])
+        self.assertEqual(len([x for x in queries.captured_queries if 'COUNT' in x['sql']]), 1)
+        # для тега без подсчета выбирается на один объект больше
+        self.assertEqual(len(memo['pages'][(get_queryset_key(self.queryset), 0, 3)]), 3)
+        self.assertEqual(len(memo['pages'][(get_queryset_key(counted.queryset), 0, 2)]), 2)
+
+        # теги используют предварительную выборку
+        with self.assertNumQueries(0):
+            page, data = self.paginate(skip_count)
+        self.assertEqual(data, {'count': None, 'has_next': True, 'is_paginated': True,
+                                'results': ['term0', 'term1']})
+        with self.assertNumQueries(0):
+            page, data = self.paginate(counted)
+        self.assertEqual(data, {'count': 5, 'has_next': True, 'is_paginated': True,
+                                'results': ['term0', 'term1']})
+
+    def test_last_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            page, data = self.paginate(ListTag(self.queryset, 'skip_count=1&offset=4'))
+        self.assertFalse([x for x in queries.captured_queries if 'COUNT' in x['sql']])
+        self.assertEqual(data, {'count': None, 'has_next': False, 'is_paginated': True, 'results': ['term4']})
+        page, data = self.paginate(ListTag(self.queryset, 'skip_count=1&offset=2'))
+        self.assertEqual(data['has_next'], True)
+        page, data = self.paginate(ListTag(self.queryset, 'skip_count=1&limit=5'))
+        # все объекты на первой странице
+        self.assertEqual(data['has_next'], False)
+        self.assertEqual(data['is_paginated'], False)
+        self.assertEqual(len(data['results']), 5)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.test import TestCase
+
+from edw.models.defaults.term import Term
+from edw.models.term_import import bulk_import_terms, TermImportError
+
+
+class BulkImportTermsTestCase(TestCase):
+
+    def create(self, slug, parent=None):
+        return Term.objects.create(name=slug, slug=slug, parent=parent, system_flags=0)
+
+    def get_tree(self, **filters):
+        return dict((x[0], x[1:]) for x in Term.objects.filter(**filters).values_list(
+            'path', 'tree_id', 'lft', 'rght', 'level'))
+
+    def setUp(self):
+        self.catalog = self.create('catalog')
+        self.a = self.create('a', self.catalog)
+        self.b = self.create('b', self.catalog)
+        self.other = self.create('other')
+        self.unrelated = self.create('unrelated')
+        self.create('u', self.unrelated)
+
+    def test_import_forest(self):
+        existing = self.get_tree()
+        ids = bulk_import_terms([
+            {'name': "Colors", 'children': [
+                {'name': "Red"},
+                {'name': "Blue", 'children': [{'name': "Navy"}]},
+            ]},
+            {'name': "Sizes", 'slug': 'size', 'active': False},
+        ])
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(set(Term.objects.filter(id__in=ids).values_list('path', flat=True)),
+                         set(['colors', 'colors/red', 'colors/blue', 'colors/blue/navy', 'size']))
+        # новые деревья нумеруются после существующих
+        self.assertEqual(self.get_tree(id__in=ids), {
+            'colors': (4, 1, 8, 0),
+            'colors/red': (4, 2, 3, 1),
+            'colors/blue': (4, 4, 7, 1),
+            'colors/blue/navy': (4, 5, 6, 2),
+            'size': (5, 1, 2, 0),
+        })
+        self.assertEqual(self.get_tree(tree_id__lte=3), existing)
+        self.assertEqual([x.slug for x in Term.objects.get(path='colors').get_children()], ['red', 'blue'])
+        self.assertFalse(Term.objects.get(path='size').active)
+
+    def test_attach_to_existing(self):
+        # поля несвязанного дерева испорчены, при импорте оно не перестраивается
+        Term.objects.filter(tree_id=3).update(level=9)
+        unrelated = self.get_tree(tree_id=3)
+        ids = bulk_import_terms([
+            {'name': "C", 'children': [{'name': "C1"}]},
+            {'key': 'd', 'name': "D"},
+            {'name': "E", 'parent': 'other'},
+            {'name': "D1", 'parent': 'd'},
+        ], parent=self.catalog)
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(self.get_tree(tree_id__lte=2), {
+            'catalog': (1, 1, 14, 0),
+            'catalog/a': (1, 2, 3, 1),
+            'catalog/b': (1, 4, 5, 1),
+            'catalog/c': (1, 6, 9, 1),
+            'catalog/c/c1': (1, 7, 8, 2),
+            'catalog/d': (1, 10, 13, 1),
+            'catalog/d/d1': (1, 11, 12, 2),
+            'other': (2, 1, 4, 0),
+            'other/e': (2, 2, 3, 1),
+        })
+        self.assertEqual(self.get_tree(tree_id=3), unrelated)
+        self.assertEqual(Term.objects.get(path='catalog/d/d1').parent_id, Term.objects.get(path='catalog/d').id)
+
+    def test_slug_collisions(self):
+        bulk_import_terms([{'name': "X"}, {'name': "X"}], parent=self.catalog)
+        paths = list(Term.objects.filter(parent=self.catalog).values_list('path', flat=True))
+        self.assertEqual(len(paths), 4)
+        self.assertEqual(len(set(paths)), 4)
+        with self.assertRaises(TermImportError) as context:
+            bulk_import_terms([{'name': "A"}], parent=self.catalog)
+        self.assertEqual(context.exception.errors, ["Term `catalog/a` already exists"])
+
+    def test_active(self):
+        Term.objects.filter(tree_id=1).update(active=False)
+        catalog_a = Term.objects.get(pk=self.a.pk)
+        bulk_import_terms([
+            {'name': "X", 'active': False, 'children': [{'name': "X1"}]},
+            {'name': "Y", 'active': False, 'children': [{'name': "Y1", 'active': False}]},
+        ], parent=catalog_a)
+        # как при сохранении активный термин активирует предков
+        self.assertEqual(set(Term.objects.filter(tree_id=1, active=True).values_list('path', flat=True)),
+                         set(['catalog', 'catalog/a', 'catalog/a/x', 'catalog/a/x/x1']))
+
+    def test_errors(self):
+        count = Term.objects.count()
+        with self.assertRaises(TermImportError) as context:
+            bulk_import_terms([
+                {'key': 'x', 'name': "X", 'parent': 'y'},
+                {'key': 'y', 'name': "Y", 'parent': 'x'},
+                {'key': 'z', 'name': "Z", 'parent': 'missing/path'},
+                {'key': 'z', 'name': "Z2"},
+            ])
+        self.assertEqual(sorted(context.exception.errors), [
+            "Duplicate key `z`",
+            "Parent `missing/path` not found",
+            "Term `x` is part of parent references cycle",
+            "Term `y` is part of parent references cycle",
+        ])
+        self.assertEqual(Term.objects.count(), count)
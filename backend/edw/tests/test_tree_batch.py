@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from edw.models.defaults.term import Term
+from edw.signals.handlers.term import get_children_keys
+from edw.signals.mptt import tree_batch, tree_batch_done
+
+
+class TreeBatchTestCase(TestCase):
+
+    def create(self, slug, parent=None, **kwargs):
+        return Term.objects.create(name=slug, slug=slug, parent=parent, system_flags=0, **kwargs)
+
+    def get(self, node):
+        return Term.objects.get(pk=node.pk)
+
+    def get_tree(self):
+        return dict((x[0], x[1:]) for x in Term.objects.values_list('slug', 'tree_id', 'lft', 'rght', 'level'))
+
+    def setUp(self):
+        cache.clear()
+        self.root1 = self.create('root1')
+        self.a = self.create('a', self.root1)
+        self.root2 = self.create('root2')
+        self.d = self.create('d', self.root2)
+        self.b = self.create('b', self.root1)
+        self.c = self.create('c', self.root1)
+        # ручной порядок отличается от порядка создания
+        self.get(self.c).move_to(self.get(self.a), 'left')
+        self.received = []
+        tree_batch_done.connect(self.receiver, sender=Term)
+        self.addCleanup(tree_batch_done.disconnect, self.receiver, sender=Term)
+
+    def tearDown(self):
+        cache.clear()
+
+    def receiver(self, sender, **kwargs):
+        self.received.append(kwargs)
+
+    def test_sibling_order(self):
+        with tree_batch(Term):
+            b = self.get(self.b)
+            b.name = 'B'
+            b.save()
+            # перенесенный узел размещается по дате создания как при обычном сохранении
+            d = self.get(self.d)
+            d.parent = self.get(self.root1)
+            d.save()
+            self.create('x', self.get(self.root1))
+            self.create('y')
+        self.assertEqual(self.get_tree(), {
+            'root1': (1, 1, 12, 0),
+            'd': (1, 2, 3, 1),
+            'c': (1, 4, 5, 1),
+            'a': (1, 6, 7, 1),
+            'b': (1, 8, 9, 1),
+            'x': (1, 10, 11, 1),
+            'root2': (2, 1, 2, 0),
+            'y': (3, 1, 2, 0),
+        })
+        self.assertEqual(self.get(self.d).path, 'root1/d')
+        self.assertEqual(len(self.received), 1)
+        self.assertEqual(self.received[0]['parent_ids'], set([self.root1.pk, self.root2.pk]))
+        self.assertEqual(self.received[0]['originals'], {
+            self.b.pk: (self.root1.pk, True),
+            self.d.pk: (self.root2.pk, True)
+        })
+
+    def test_move_to(self):
+        with tree_batch(Term):
+            # явно заданная позиция сохраняется
+            self.get(self.d).move_to(self.get(self.b), 'right')
+            self.get(self.a).move_to(self.get(self.c), 'left')
+        self.assertEqual([x.slug for x in self.get(self.root1).get_children()], ['a', 'c', 'b', 'd'])
+        self.assertEqual(self.get_tree()['root1'], (1, 1, 10, 0))
+
+    def test_active(self):
+        root1 = self.get(self.root1)
+        root1.active = False
+        root1.save()
+        self.assertFalse(Term.objects.filter(tree_id=1, active=True).exists())
+        with tree_batch(Term):
+            self.create('a1', self.get(self.a))
+            root2 = self.get(self.root2)
+            root2.active = False
+            root2.save()
+        # активация распространяется на предков после перестроения дерева
+        self.assertEqual(set(Term.objects.filter(active=True).values_list('slug', flat=True)),
+                         set(['root1', 'a', 'a1']))
+        self.assertEqual(self.received[0]['originals'], {self.root2.pk: (None, True)})
+
+    def test_nested(self):
+        with tree_batch(Term):
+            with tree_batch(Term):
+                self.create('x', self.get(self.a))
+            self.assertEqual(self.received, [])
+            self.create('y', self.get(self.a))
+        self.assertEqual(len(self.received), 1)
+        self.assertEqual([x.slug for x in self.get(self.a).get_children()], ['x', 'y'])
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            with tree_batch(Term):
+                self.create('x', self.get(self.a))
+                raise ValueError
+        # при ошибке сигнал не отправляется
+        self.assertEqual(self.received, [])
+
+    def test_cache_invalidation(self):
+        root1 = self.get(self.root1)
+        root1.active = False
+        root1.save()
+        keys = get_children_keys(Term, self.root1.pk) + get_children_keys(Term, None)
+        for key in keys:
+            cache.set(key, 'cached')
+        with tree_batch(Term):
+            self.create('a1', self.get(self.a))
+        # активированы предки нового узла, кэш их детей сброшен
+        self.assertEqual(cache.get_many(keys), {})
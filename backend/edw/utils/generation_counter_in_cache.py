@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+
+#==============================================================================
+# Generation counter
+#==============================================================================
+class GenerationCounter(object):
+    """
+    ENG: Monotonically increasing counter stored in cache, used to invalidate all
+    dependent cache entries at once by incrementing it.
+    If the counter value expire, it starts again from current time in milliseconds,
+    so it never goes back.
+    RUS: Монотонно возрастающий счетчик в кэше, используется для одновременной инвалидации
+    всех зависимых элементов кэша.
+    """
+    GENERATION_CACHE_KEY_PATTERN = 'gen_cnt:{key}'
+
+    GENERATION_CACHE_TIMEOUT = 2592000  # 60*60*24*30, 30 days
+
+    _registry = {}
+
+    @staticmethod
+    def factory(key):
+        result = GenerationCounter._registry.get(key, None)
+        if result is None:
+            result = GenerationCounter._registry[key] = GenerationCounter(key, True)
+        return result
+
+    def __init__(self, key, from_factory=False):
+        assert from_factory, 'use "factory" method, for instance create'
+        self.key = key
+
+    @cached_property
+    def generation_cache_key(self):
+        return GenerationCounter.GENERATION_CACHE_KEY_PATTERN.format(key=self.key)
+
+    @staticmethod
+    def initial_value():
+        return int(time.time() * 1000)
+
+    @property
+    def value(self):
+        val = cache.get(self.generation_cache_key, None)
+        if val is None:
+            val = self.initial_value()
+            cache.add(self.generation_cache_key, val, self.GENERATION_CACHE_TIMEOUT)
+        return val
+
+    def incr(self):
+        """increment generation"""
+        try:
+            result = cache.incr(self.generation_cache_key)
+        except ValueError:  # HACK: if cache timeout expire
+            result = self.initial_value()
+            cache.set(self.generation_cache_key, result, self.GENERATION_CACHE_TIMEOUT)
+        return result
+
+    @staticmethod
+    def get_values(keys):
+        """
+        ENG: Return generations values for `keys` with one cache request.
+        RUS: Возвращает значения счетчиков по ключам одним запросом к кэшу.
+        """
+        counters = [GenerationCounter.factory(key) for key in keys]
+        heap = cache.get_many([counter.generation_cache_key for counter in counters])
+        result = []
+        for counter in counters:
+            val = heap.get(counter.generation_cache_key, None)
+            if val is None:
+                val = counter.value
+            result.append(val)
+        return result
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 
 
 from functools import wraps
+from math import cos, degrees, radians
 import time
 
 from django.conf import settings
@@ -10,11 +11,13 @@ from django.db import models
 from django.db.models.query import QuerySet
 
 from django.db.models import Value, F
+from django.utils.module_loading import import_string
 from django.utils.translation import ugettext_lazy as _
 
 from geopy.geocoders import get_geocoder_for_service
 from geopy.exc import GeocoderQuotaExceeded
 
+from edw import settings as edw_settings
 from edw.utils.common import dict2obj
 
 from edw.models.expressions import (
@@ -123,6 +126,17 @@ def get_location_from_geocoder(geoposition=None, query=None):
     return location
 
 
+#=================================================
+# Get configured geocoder function
+#=================================================
+def get_geocoder():
+    '''
+    Get geocoder function configured by `EDW_GEOCODER` setting
+    :return: geocoder: function(geoposition=None, query=None) --> location object
+    '''
+    return import_string(edw_settings.GEOCODER)
+
+
 #=================================================
 # Get location postcode
 #=================================================
@@ -224,3 +238,41 @@ def get_closest(model_or_queryset, geo_field, latitude, longitude):
         distance=expression).order_by('distance')
 
     return places
+
+
+#=================================================
+# Bounding box utils
+#=================================================
+def _wrap_longitude(longitude):
+    return longitude if -180.0 <= longitude <= 180.0 else (longitude + 180.0) % 360.0 - 180.0
+
+
+def get_bboxes(min_longitude, min_latitude, max_longitude, max_latitude):
+    '''
+    Normalize bounding box and split it by antimeridian
+    :return: bboxes: list of (min_longitude, min_latitude, max_longitude, max_latitude)
+    '''
+    min_latitude, max_latitude = max(float(min_latitude), -90.0), min(float(max_latitude), 90.0)
+    min_longitude, max_longitude = float(min_longitude), float(max_longitude)
+    if max_longitude - min_longitude >= 360.0:
+        return [(-180.0, min_latitude, 180.0, max_latitude)]
+    min_longitude, max_longitude = _wrap_longitude(min_longitude), _wrap_longitude(max_longitude)
+    if min_longitude <= max_longitude:
+        return [(min_longitude, min_latitude, max_longitude, max_latitude)]
+    return [(min_longitude, min_latitude, 180.0, max_latitude), (-180.0, min_latitude, max_longitude, max_latitude)]
+
+
+def get_bboxes_around(latitude, longitude, radius):
+    '''
+    Get bounding boxes of circle
+    :param radius: circle radius in meters
+    :return: bboxes: list of (min_longitude, min_latitude, max_longitude, max_latitude)
+    '''
+    latitude, longitude = float(latitude), float(longitude)
+    delta_latitude = degrees(float(radius) / EARTH_RADIUS_METERS)
+    if abs(latitude) + delta_latitude >= 90.0:
+        # circle covers the pole
+        return get_bboxes(-180.0, latitude - delta_latitude, 180.0, latitude + delta_latitude)
+    delta_longitude = delta_latitude / cos(radians(abs(latitude) + delta_latitude))
+    return get_bboxes(longitude - delta_longitude, latitude - delta_latitude,
+                      longitude + delta_longitude, latitude + delta_latitude)
@@ -23,7 +23,13 @@ from edw.rest.serializers.data_mart import (
 from edw.rest.filters.data_mart import DataMartFilter
 from edw.rest.filters.backends import EDWFilterBackend
 from edw.models.data_mart import DataMartModel
-from edw.rest.viewsets import CustomSerializerViewSetMixin, remove_empty_params_from_request
+from edw.models.term import TermModel
+from edw.rest.viewsets import (
+    CustomSerializerViewSetMixin,
+    remove_empty_params_from_request,
+    cache_response,
+    conditional_response
+)
 from edw.rest.pagination import DataMartPagination
 from edw.rest.permissions import IsSuperuserOrReadOnly
 from edw.views.generics import get_object_or_404
@@ -98,6 +104,8 @@ class DataMartViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
         return obj
 
     @list_route(filter_backends=())
+    @conditional_response(TermModel, DataMartModel)
+    @cache_response(TermModel, DataMartModel)
     def tree(self, request, data_mart_pk=None, *args, **kwargs):
         if data_mart_pk is not None:
             request.GET.setdefault('parent_id', data_mart_pk)
@@ -119,11 +127,16 @@ class DataMartViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
         serializer = DataMartTreeSerializer(queryset, many=True, context={"request": request})
         return Response(serializer.data)
 
+    @cache_response(TermModel, DataMartModel)
     def list(self, request, data_mart_pk=None, *args, **kwargs):
         if data_mart_pk is not None:
             request.GET.setdefault('parent_id', data_mart_pk)
         return super(DataMartViewSet, self).list(request, *args, **kwargs)
 
+    @cache_response(TermModel, DataMartModel)
+    def retrieve(self, request, *args, **kwargs):
+        return super(DataMartViewSet, self).retrieve(request, *args, **kwargs)
+
 
 class RebuildDataMartTreeView(APIView):
     """
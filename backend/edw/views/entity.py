@@ -2,11 +2,13 @@
 from __future__ import unicode_literals
 
 from django.apps import apps
-from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer, TemplateHTMLRenderer
+from rest_framework import serializers
+from rest_framework.renderers import BrowsableAPIRenderer, TemplateHTMLRenderer
 from rest_framework.response import Response
 
 from edw.models.data_mart import DataMartModel
 from edw.models.entity import EntityModel
+from edw.models.term import TermModel
 from edw.rest.filters.entity import (
     EntityFilter,
     EntityMetaFilter,
@@ -16,22 +18,24 @@ from edw.rest.filters.entity import (
 )
 from edw.rest.filters.backends import EDWFilterBackend
 from edw.rest.pagination import EntityPagination
+from edw.rest.renderers import get_json_renderer_class
 from edw.rest.permissions import IsReadOnly
 from edw.rest.serializers.data_mart import DataMartDetailSerializer
 from edw.rest.serializers.entity import (
+    EntityClusterSerializer,
     EntityCommonSerializer,
     EntityTotalSummarySerializer,
     EntityDetailSerializer,
     # EntitySummarySerializer
 )
-from edw.rest.viewsets import CustomSerializerViewSetMixin, remove_empty_params_from_request
+from edw.rest.viewsets import CustomSerializerViewSetMixin, remove_empty_params_from_request, cache_response
 from edw.views.generics import get_object_or_404
 
 from rest_framework_bulk.generics import BulkModelViewSet
 
 try:
     # rest_framework 3.3.3
-    from rest_framework.decorators import detail_route
+    from rest_framework.decorators import detail_route, list_route
 except ImportError:
     # rest_framework 3.10.3
     from rest_framework.decorators import action
@@ -39,12 +43,17 @@ except ImportError:
     def detail_route(methods=None, **kwargs):
         return action(detail=True, **kwargs)
 
+    def list_route(methods=None, **kwargs):
+        return action(detail=False, **kwargs)
+
 
 class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
     """
     A simple ViewSet for listing or retrieving entities.
     Additional actions:
         `data_mart` - retrieve data mart for entity. `GET /edw/api/entities/<id>/data-mart/`
+        `clusters` - place entities clusters for map zoom level.
+            `GET /edw/api/entities/clusters/?zoom=<zoom>&bbox=<min_lng,min_lat,max_lng,max_lat>`
     """
     queryset = EntityModel.objects.all()
     serializer_class = EntityCommonSerializer
@@ -70,7 +79,7 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
 
     permission_classes = [IsReadOnly]
 
-    renderer_classes = (JSONRenderer, BrowsableAPIRenderer, TemplateHTMLRenderer)
+    renderer_classes = (get_json_renderer_class(), BrowsableAPIRenderer, TemplateHTMLRenderer)
 
     filter_class = EntityFilter
     filter_backends = (EDWFilterBackend, EntityDynamicFilter, EntityMetaFilter, EntityGroupByFilter,
@@ -86,7 +95,7 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
         return super(EntityViewSet, self).initialize_request(*args, **kwargs)
 
     def initial(self, request, data_mart_pk=None, *args, **kwargs):
-        if self.action in ('retrieve', 'list'):
+        if self.action in ('retrieve', 'list', 'clusters'):
             # Позваляем устанавливать фильтр активности только для персонала и администраторов
             if request.user.is_active and (request.user.is_staff or request.user.is_superuser):
                 request.GET.setdefault('active', True)
@@ -122,6 +131,25 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
         else:
             return Response({})
 
+    @list_route(filter_backends=(EDWFilterBackend,))
+    @cache_response(TermModel, DataMartModel, EntityModel)
+    def clusters(self, request, format=None, **kwargs):
+        '''
+        Retrieve place entities clusters grouped by Morton code prefix chosen from `zoom` level,
+        entities filtered by the same filters as the list, use `bbox` to restrict the map area
+        :param request:
+        :param format:
+        :return:
+        '''
+        zoom = serializers.IntegerField(min_value=0).run_validation(request.GET.get('zoom', 0))
+        queryset = self.filter_queryset(self.get_queryset())
+        clusters = queryset.clusters(zoom)
+        return Response({
+            'zoom': zoom,
+            'count': sum([cluster['count'] for cluster in clusters]),
+            'results': EntityClusterSerializer(clusters, many=True).data
+        })
+
     def get_format_suffix(self, **kwargs):
         """
         Determine if the request includes a '.json' style format suffix
@@ -130,6 +158,7 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
             kwargs[self.settings.FORMAT_SUFFIX_KWARG] = self.format
         return super(EntityViewSet, self).get_format_suffix(**kwargs)
 
+    @cache_response(TermModel, DataMartModel, EntityModel)
     def list(self, request, *args, **kwargs):
         if self.terms is not None:
             request.GET['terms'] = ','.join([str(x) for x in self.terms]) if isinstance(
@@ -139,6 +168,10 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
                 self.subj, (list, tuple)) else str(self.subj)
         return super(EntityViewSet, self).list(request, *args, **kwargs)
 
+    @cache_response(TermModel, DataMartModel, EntityModel)
+    def retrieve(self, request, *args, **kwargs):
+        return super(EntityViewSet, self).retrieve(request, *args, **kwargs)
+
     def get_object(self):
         obj = getattr(self, '_obj', None)
         if obj is None:
@@ -167,7 +200,7 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
         if self.action in ('retrieve', 'update', 'partial_update', 'destroy'):
             obj = self.get_object()
             model_class = obj.__class__
-        elif self.action in ('create', 'list', 'bulk_update', 'partial_bulk_update', 'bulk_destroy'):
+        elif self.action in ('create', 'list', 'clusters', 'bulk_update', 'partial_bulk_update', 'bulk_destroy'):
             value = self.kwargs.get('data_mart_pk', request.GET.get('data_mart_pk', None))
             if value is not None:
                 key = 'pk'
@@ -180,7 +213,7 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
                     DataMartModel.objects.active(), **{key: value})
 
                 # check data mart permissions
-                if self.action != 'list':
+                if self.action not in ('list', 'clusters'):
                     request.GET['_data_mart_permissions'] = data_mart_permissions = \
                         data_mart.get_permissions_from_request(request)
                     if (self.action == 'create' and not data_mart_permissions['can_add'] or
@@ -268,8 +301,22 @@ class EntityViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
                 self.serializer_context[key] = None
         return queryset
 
+    def get_queryset_page(self, queryset, offset, limit):
+        """
+        Return page of entities for paginator, the list page is built with `values()` if the serializer supports it
+        """
+        page = queryset[offset:offset + limit]
+        if self.action == 'list':
+            get_values_page = getattr(self.get_serializer_class(), 'get_values_page', None)
+            if get_values_page is not None:
+                values_page = get_values_page(page, self.get_serializer_context())
+                if values_page is not None:
+                    return values_page
+        return list(page)
+
     def finalize_response(self, request, response, *args, **kwargs):
-        request.GET[self.REQUEST_CACHED_SERIALIZED_DATA_KEY] = response.data
+        # response may be restored from cache as plain `HttpResponse` without data
+        request.GET[self.REQUEST_CACHED_SERIALIZED_DATA_KEY] = getattr(response, 'data', None)
         return super(EntityViewSet, self).finalize_response(request, response, *args, **kwargs)
 
 
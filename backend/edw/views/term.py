@@ -23,7 +23,13 @@ from edw.rest.serializers.term import (
 from edw.rest.filters.term import TermFilter
 from edw.rest.filters.backends import EDWFilterBackend
 from edw.models.term import TermModel
-from edw.rest.viewsets import CustomSerializerViewSetMixin, remove_empty_params_from_request
+from edw.models.data_mart import DataMartModel
+from edw.rest.viewsets import (
+    CustomSerializerViewSetMixin,
+    remove_empty_params_from_request,
+    cache_response,
+    conditional_response
+)
 from edw.rest.pagination import TermPagination
 from edw.rest.permissions import IsSuperuserOrReadOnly
 from edw.views.generics import get_object_or_404
@@ -98,6 +104,8 @@ class TermViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
         return obj
 
     @list_route(filter_backends=())
+    @conditional_response(TermModel, DataMartModel)
+    @cache_response(TermModel, DataMartModel)
     def tree(self, request, data_mart_pk=None, term_pk=None, format=None):
         '''
         Retrieve tree action
@@ -140,6 +148,7 @@ class TermViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
         serializer = TermTreeSerializer(queryset, many=True, context=context)
         return Response(serializer.data)
 
+    @cache_response(TermModel, DataMartModel)
     def list(self, request, data_mart_pk=None, term_pk=None, *args, **kwargs):
         if term_pk is not None:
             request.GET.setdefault('parent_id', term_pk)
@@ -147,6 +156,10 @@ class TermViewSet(CustomSerializerViewSetMixin, BulkModelViewSet):
             request.GET.setdefault('data_mart_pk', data_mart_pk)
         return super(TermViewSet, self).list(request, *args, **kwargs)
 
+    @cache_response(TermModel, DataMartModel)
+    def retrieve(self, request, *args, **kwargs):
+        return super(TermViewSet, self).retrieve(request, *args, **kwargs)
+
 
 class RebuildTermTreeView(APIView):
     """
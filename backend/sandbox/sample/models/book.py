@@ -47,6 +47,9 @@ class Book(AddedDateTermsValidationMixin, ApiReferenceMixin, BaseEntity):
     # filter expression used to lookup for a book item using the Select2 widget
     lookup_fields = ('name__icontains',)
 
+    # entity_name column for the `values()` summary mode
+    SUMMARY_VALUES_FIELDS = {'entity_name': 'name'}
+
     @property
     def entity_name(self):
         return self.name
@@ -98,4 +101,7 @@ class AdultBook(Book):
         verbose_name_plural = _("Adult books")
 
     class RESTMeta:
-        exclude = ['genre', 'images', 'name']
\ No newline at end of file
+        exclude = ['genre', 'images', 'name']
+
+    # `SUMMARY_VALUES_FIELDS` is not inherited, the model has no RESTMeta include fields
+    SUMMARY_VALUES_FIELDS = Book.SUMMARY_VALUES_FIELDS
\ No newline at end of file
@@ -54,6 +54,9 @@ class Todo(AddedDateTermsValidationMixin, ApiReferenceMixin, BaseEntity):
     # filter expression used to lookup for a Todo item using the Select2 widget
     lookup_fields = ('name__icontains',)
 
+    # entity_name column for the `values()` summary mode
+    SUMMARY_VALUES_FIELDS = {'entity_name': 'name'}
+
     @property
     def entity_name(self):
         return self.name